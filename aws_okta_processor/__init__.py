@@ -1,7 +1,6 @@
 """Root Module for the AWS Okta Processor package."""
 
 import importlib.metadata
-import tomlkit
 
 
 def get_version():
@@ -25,6 +24,8 @@ def get_version():
         return importlib.metadata.version(__package__)
     except importlib.metadata.PackageNotFoundError:
         # If distribution not found, load the version from pyproject.toml file
+        import tomlkit  # pylint: disable=C0415
+
         with open("../../pyproject.toml", encoding="utf-8") as pyproject:
             file_contents = pyproject.read()
 
@@ -0,0 +1,656 @@
+"""
+asyncio client fetching AWS credentials through Okta.
+
+The Okta authentication flow, the AWS sign-in page and AssumeRoleWithSAML
+all run on the event loop over one aiohttp connection pool, so that many
+role assumptions run concurrently without threads. Concurrent requests of
+the same user share one Okta login, and those of the same application share
+one SAML assertion.
+
+Requires the 'aio' extra: pip install aws-okta-processor[aio]
+
+    from aws_okta_processor.aio import AsyncClient
+    from aws_okta_processor.api import Config
+
+    async with AsyncClient() as client:
+        credentials = await asyncio.gather(*[
+            client.get_credentials(Config(..., role=role)) for role in roles
+        ])
+
+Configurations use the library API's 'Config'; secondary roles are not
+supported by this client, which raises 'Error' for them.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import time
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from defusedxml import ElementTree  # type: ignore[import-untyped]
+
+from aws_okta_processor.api import (
+    AuthenticationError,
+    Config,
+    Credentials,
+    Error,
+    PromptError,
+)
+from aws_okta_processor.core import hooks, prompt, saml
+from aws_okta_processor.core.okta import (
+    DEFAULT_FACTOR_TIMEOUT,
+    OKTA_APPLICATIONS_URL,
+    OKTA_AUTH_URL,
+    OKTA_SESSION_URL,
+    FactorType,
+    get_supported_factors,
+)
+
+try:
+    import aiohttp  # type: ignore[import-not-found]
+except ImportError as exception:  # pragma: no cover
+    raise ImportError(
+        "The asyncio client requires aiohttp: pip install aws-okta-processor[aio]"
+    ) from exception
+
+LOGGER = logging.getLogger("aws_okta_processor")
+
+# STS endpoints; AssumeRoleWithSAML needs no request signature
+STS_URL = "https://sts.amazonaws.com/"
+STS_REGIONAL_URL = "https://sts.{}.amazonaws.com/"
+STS_NAMESPACE = "{https://sts.amazonaws.com/doc/2011-06-15/}"
+
+# Seconds between polls of a pending push notification
+FACTOR_POLL_INTERVAL = 1
+
+# Connections kept open by the client's own connection pool
+DEFAULT_CONNECTION_LIMIT = 100
+
+OKTA_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "Cache-Control": "no-cache",
+}
+
+
+class AsyncClient:  # pylint: disable=R0902
+    """
+    Fetches AWS credentials for any number of configurations on one event loop.
+
+    Okta sessions are kept in memory per organization and user for the
+    lifetime of the client.
+    """
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        session: Any = None,
+        select: Optional[Callable[[str, List[str]], Any]] = None,
+        password: Optional[Callable[[], Any]] = None,
+        passcode: Optional[Callable[[str], Any]] = None,
+        limit: int = DEFAULT_CONNECTION_LIMIT,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            session: An optional aiohttp.ClientSession; by default the client
+                opens its own when entered as an async context manager.
+            select: Called with a label and the available keys when several
+                match; returns one of the keys. May be a coroutine function.
+            password: Called when the configuration has no password. May be a
+                coroutine function.
+            passcode: Called with the factor type for TOTP and hardware tokens.
+                May be a coroutine function.
+            limit: The connection limit of the client's own connection pool.
+        """
+        self._session = session
+        self._own_session = False
+        self._select = select
+        self._password = password
+        self._passcode = passcode
+        self._limit = limit
+        self._okta_sessions: Dict[Any, asyncio.Future] = {}
+        self._saml_assertions: Dict[Any, asyncio.Future] = {}
+        self._account_roles: Dict[Any, asyncio.Future] = {}
+        self.account_role_cache = saml.AccountRoleCache()
+
+    async def __aenter__(self):
+        if self._session is None:
+            # Okta session cookies are sent explicitly, never stored
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._limit),
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            self._own_session = True
+        return self
+
+    async def __aexit__(self, *args):
+        if self._own_session:
+            await self._session.close()
+            self._session = None
+            self._own_session = False
+
+    async def get_credentials(self, config: Config) -> Credentials:
+        """
+        Fetches the AWS credentials of a configuration.
+
+        Args:
+            config: The configuration.
+
+        Returns:
+            Credentials: The credentials.
+
+        Raises:
+            AuthenticationError: If Okta or STS rejects a request.
+            PromptError: If a prompt is needed but no callback was given for it.
+            Error: If the credentials cannot be fetched otherwise, within the
+                deadline, or for a secondary role.
+        """
+        if config.secondary_role:
+            raise Error("ERROR: Secondary roles are not supported by AsyncClient!")
+
+        if config.deadline is None:
+            return await self.fetch_credentials(config)
+
+        deadline = float(config.deadline)
+        try:
+            return await asyncio.wait_for(self.fetch_credentials(config), deadline)
+        except asyncio.TimeoutError as error:
+            raise Error(f"Error: Deadline of {deadline:g}s exceeded") from error
+
+    async def fetch_credentials(self, config: Config) -> Credentials:
+        """
+        Fetches the AWS credentials of a configuration, without a deadline.
+
+        Args:
+            config: The configuration.
+
+        Returns:
+            Credentials: The credentials.
+        """
+        saml_assertion = await self.get_saml_assertion(config)
+        aws_roles = await self.get_aws_roles(config, saml_assertion)
+
+        if not aws_roles:
+            raise Error("ERROR: No AWS Roles were found!")
+
+        if config.role:
+            aws_role = prompt.get_deep_value(items=aws_roles, key=config.role)
+            if not aws_role:
+                raise Error(f"ERROR: AWS Role {config.role} not found!")
+        else:
+            aws_role = await self.select(label="AWS Role", items=aws_roles)
+
+        return await self.assume_role_with_saml(
+            aws_role=aws_role,
+            saml_assertion=saml_assertion,
+            duration=config.duration,
+            region=config.region,
+        )
+
+    async def get_saml_assertion(self, config: Config) -> str:
+        """
+        Fetches a SAML assertion for the configured application, sharing it
+        with concurrent requests for the same application.
+
+        Args:
+            config: The configuration.
+
+        Returns:
+            str: The base64-encoded SAML assertion.
+        """
+        okta_key = (config.organization, config.user)
+
+        async def fetch():
+            session_id = await self.get_okta_session(config)
+            application_url = config.application or await self.select_application(
+                config, session_id
+            )
+            saml_assertion = await self.fetch_saml_assertion(
+                application_url, session_id
+            )
+
+            if saml_assertion is None:
+                # The Okta session is not sufficient anymore; log in again
+                self._okta_sessions.pop(okta_key, None)
+                session_id = await self.get_okta_session(config)
+                saml_assertion = await self.fetch_saml_assertion(
+                    application_url, session_id
+                )
+
+            if saml_assertion is None:
+                raise Error("ERROR: SAMLResponse tag was not found!")
+
+            return saml_assertion
+
+        key = (config.organization, config.user, config.application)
+        return await _share(self._saml_assertions, key, fetch, keep=False)
+
+    async def get_okta_session(self, config: Config) -> str:
+        """
+        Returns the Okta session ID of the configured user, logging in once
+        for all concurrent requests.
+
+        Args:
+            config: The configuration.
+
+        Returns:
+            str: The Okta session ID.
+        """
+
+        async def login():
+            user_pass = config.password
+            if not user_pass:
+                user_pass = await _call(self._password, "password")
+
+            session_token = await self.authenticate(config, user_pass)
+            response_json = await self.call_okta(
+                OKTA_SESSION_URL.format(config.organization),
+                json_payload={"sessionToken": session_token},
+            )
+            return response_json["id"]
+
+        key = (config.organization, config.user)
+        return await _share(self._okta_sessions, key, login, keep=True)
+
+    async def authenticate(self, config: Config, user_pass: str) -> str:
+        """
+        Authenticates with Okta, verifying an MFA factor if required.
+
+        Args:
+            config: The configuration.
+            user_pass: The Okta password.
+
+        Returns:
+            str: The single-use Okta session token.
+        """
+        response_json = await self.call_okta(
+            OKTA_AUTH_URL.format(config.organization),
+            json_payload={"username": config.user, "password": user_pass},
+        )
+
+        if "sessionToken" in response_json:
+            return response_json["sessionToken"]
+
+        if response_json.get("status", None) != "MFA_REQUIRED":
+            raise AuthenticationError("Error: Unexpected authentication status")
+
+        factors = get_supported_factors(factors=response_json["_embedded"]["factors"])
+        if config.factor:
+            if config.factor not in factors:
+                raise Error(f"ERROR: Factor {config.factor} not found!")
+            factor = factors[config.factor]
+        else:
+            factor = await self.select(label="Factor", items=factors)
+
+        return await self.verify_factor(
+            factor, response_json["stateToken"], timeout=_get_factor_timeout(config)
+        )
+
+    async def verify_factor(
+        self, factor: Any, state_token: str, timeout: float = DEFAULT_FACTOR_TIMEOUT
+    ) -> str:
+        """
+        Verifies an MFA factor, polling until a push notification is answered.
+
+        Args:
+            factor (FactorBase): The factor.
+            state_token: The state token of the authentication.
+            timeout: Seconds the factor may stay pending.
+
+        Returns:
+            str: The single-use Okta session token.
+
+        Raises:
+            AuthenticationError: If the factor is rejected or stays pending for
+                too long.
+        """
+        json_payload = {"stateToken": state_token}
+        if factor.factor in [FactorType.TOTP, FactorType.HARDWARE]:
+            json_payload["passCode"] = await _call(
+                self._passcode, "passcode", factor.factor
+            )
+
+        link = factor.link
+        started = time.monotonic()
+        while True:
+            response_json = await self.call_okta(link, json_payload=json_payload)
+
+            if "sessionToken" in response_json:
+                return response_json["sessionToken"]
+
+            if not factor.retry(response_json):
+                raise AuthenticationError(
+                    f"Error: Factor result: {response_json.get('factorResult', None)}"
+                )
+
+            if time.monotonic() - started + FACTOR_POLL_INTERVAL > timeout:
+                raise AuthenticationError(
+                    f"Error: MFA was not verified within {timeout:g} seconds"
+                )
+
+            link = response_json["_links"]["next"]["href"]
+            await asyncio.sleep(FACTOR_POLL_INTERVAL)
+
+    async def select_application(self, config: Config, session_id: str) -> str:
+        """
+        Selects one of the user's AWS applications.
+
+        Args:
+            config: The configuration.
+            session_id: The Okta session ID.
+
+        Returns:
+            str: The application URL.
+        """
+        app_links = await self.call_okta(
+            OKTA_APPLICATIONS_URL.format(config.organization), session_id=session_id
+        )
+
+        applications = OrderedDict()
+        for application in app_links:
+            if application["appName"] == "amazon_aws":
+                applications[application["label"].rstrip()] = application["linkUrl"]
+
+        if not applications:
+            raise Error("ERROR: No AWS applications were found!")
+
+        return await self.select(label="AWS application", items=applications)
+
+    async def fetch_saml_assertion(
+        self, application_url: str, session_id: str
+    ) -> Optional[str]:
+        """
+        Fetches the SAML assertion of an application.
+
+        Args:
+            application_url: The Okta application URL.
+            session_id: The Okta session ID.
+
+        Returns:
+            str or None: The SAML assertion, or None if the Okta session does
+            not suffice.
+        """
+        _, text = await self.request(
+            "GET", application_url, headers={"Cookie": f"sid={session_id}"}
+        )
+        return _parse(saml.get_saml_assertion, saml_response=text)
+
+    async def get_aws_roles(self, config: Config, saml_assertion: str) -> Dict:
+        """
+        Lists the AWS roles of a SAML assertion by account.
+
+        Args:
+            config: The configuration.
+            saml_assertion: The base64-encoded SAML assertion.
+
+        Returns:
+            OrderedDict: Mapping of account names to dictionaries of role ARNs and AWSRole instances.
+        """  # noqa: E501
+        role_principals = _parse(
+            saml.get_role_principals, saml_assertion=saml_assertion
+        )
+        account_roles = None
+
+        if len(role_principals) > 1:
+            account_roles = self.account_role_cache.get_account_roles(
+                role_arns=role_principals.keys()
+            )
+
+            if account_roles is None:
+
+                async def fetch():
+                    _, text = await self.request(
+                        "POST",
+                        config.sign_in_url or saml.AWS_SIGN_IN_URL,
+                        data={"SAMLResponse": saml_assertion, "RelayState": ""},
+                    )
+                    account_roles = _parse(saml.parse_account_roles, sign_in_page=text)
+                    self.account_role_cache.set_account_roles(
+                        account_roles=account_roles
+                    )
+                    return account_roles
+
+                # Concurrent requests of the same roles share one sign-in page
+                key = tuple(sorted(role_principals.items()))
+                account_roles = await _share(self._account_roles, key, fetch)
+
+        return saml.build_aws_roles(
+            role_principals=role_principals,
+            account_roles=account_roles,
+            accounts_filter=config.account_alias,
+        )
+
+    async def assume_role_with_saml(
+        self,
+        aws_role: Any,
+        saml_assertion: str,
+        duration: int = 3600,
+        region: Optional[str] = None,
+    ) -> Credentials:
+        """
+        Calls STS AssumeRoleWithSAML.
+
+        Args:
+            aws_role (AWSRole): The role and its principal.
+            saml_assertion: The base64-encoded SAML assertion.
+            duration: The duration of the role session in seconds.
+            region: An optional region of the STS endpoint.
+
+        Returns:
+            Credentials: The credentials of the role.
+        """
+        status, text = await self.request(
+            "POST",
+            STS_REGIONAL_URL.format(region) if region else STS_URL,
+            data={
+                "Action": "AssumeRoleWithSAML",
+                "Version": "2011-06-15",
+                "RoleArn": aws_role.role_arn,
+                "PrincipalArn": aws_role.principal_arn,
+                "SAMLAssertion": saml_assertion,
+                "DurationSeconds": str(duration),
+            },
+        )
+        document = ElementTree.fromstring(text)
+
+        if status != 200:
+            message = document.findtext(f"{STS_NAMESPACE}Error/{STS_NAMESPACE}Message")
+            code = document.findtext(f"{STS_NAMESPACE}Error/{STS_NAMESPACE}Code")
+            raise AuthenticationError(
+                f"Error: STS: {message}", status_code=status, error_code=code
+            )
+
+        credentials = document.find(
+            f"{STS_NAMESPACE}AssumeRoleWithSAMLResult/{STS_NAMESPACE}Credentials"
+        )
+        return Credentials(
+            access_key_id=credentials.findtext(f"{STS_NAMESPACE}AccessKeyId"),
+            secret_access_key=credentials.findtext(f"{STS_NAMESPACE}SecretAccessKey"),
+            session_token=credentials.findtext(f"{STS_NAMESPACE}SessionToken"),
+            expiration=credentials.findtext(f"{STS_NAMESPACE}Expiration"),
+        )
+
+    async def select(self, label: str, items: Dict) -> Any:
+        """
+        Returns the only item, or the one picked by the 'select' callback.
+
+        Args:
+            label: Descriptive label of the items.
+            items (dict): Dictionary with nested dictionaries.
+
+        Returns:
+            object: The selected item.
+        """
+        keys = prompt.get_deep_keys(items=items)
+        if len(keys) == 1:
+            return prompt.get_deep_value(items=items)
+
+        key = await _call(self._select, "select", label, keys)
+        if key not in keys:
+            raise Error(f"ERROR: {label} {key} not found!")
+
+        return prompt.get_deep_value(items=items, key=key)
+
+    async def call_okta(
+        self,
+        endpoint: str,
+        json_payload: Optional[Dict] = None,
+        session_id: Optional[str] = None,
+    ) -> Any:
+        """
+        Calls the Okta API.
+
+        Args:
+            endpoint: The URL of the API.
+            json_payload: The JSON body of a POST request, GET if None.
+            session_id: An optional Okta session ID to send as cookie.
+
+        Returns:
+            The decoded JSON response.
+
+        Raises:
+            AuthenticationError: If Okta returns an error or invalid JSON.
+        """
+        headers = dict(OKTA_HEADERS)
+        if session_id is not None:
+            headers["Cookie"] = f"sid={session_id}"
+
+        status, text = await self.request(
+            "GET" if json_payload is None else "POST",
+            endpoint,
+            headers=headers,
+            json=json_payload,
+        )
+
+        try:
+            response_json = json.loads(text)
+        except ValueError as error:
+            raise AuthenticationError(
+                f"Error: Status Code: {status}\nError: Invalid JSON", status_code=status
+            ) from error
+
+        if status >= 400:
+            messages = [f"Error: Status Code: {status}"]
+            if "errorSummary" in response_json:
+                messages.append(f"Error: Summary: {response_json['errorSummary']}")
+            raise AuthenticationError(
+                "\n".join(messages),
+                status_code=status,
+                error_code=response_json.get("errorCode", None),
+            )
+
+        return response_json
+
+    async def request(self, method: str, url: str, **kwargs) -> Any:
+        """
+        Sends an HTTP request over the shared connection pool.
+
+        Args:
+            method: The HTTP method.
+            url: The URL.
+            **kwargs: Arguments of aiohttp.ClientSession.request.
+
+        Returns:
+            tuple: The status code and the text of the response.
+
+        Raises:
+            Error: If the connection fails.
+        """
+        if self._session is None:
+            raise Error("AsyncClient must be used as 'async with AsyncClient()'.")
+
+        LOGGER.debug("Info: Calling %s", url)
+
+        try:
+            async with self._session.request(method, url, **kwargs) as response:
+                return response.status, await response.text()
+        except aiohttp.ClientError as error:
+            raise Error(f"Error: Connection Error: {error}") from error
+
+
+def _get_factor_timeout(config: Config) -> float:
+    """
+    Returns the seconds an MFA factor of a configuration may stay pending, no
+    longer than its deadline.
+
+    Args:
+        config: The configuration.
+
+    Returns:
+        float: The timeout.
+    """
+    timeout = float(config.factor_timeout or DEFAULT_FACTOR_TIMEOUT)
+    if config.deadline is not None:
+        timeout = min(timeout, float(config.deadline))
+    return timeout
+
+
+async def _share(
+    futures: Dict[Any, asyncio.Future],
+    key: Any,
+    factory: Callable[[], Awaitable[Any]],
+    keep: bool = False,
+) -> Any:
+    """
+    Awaits the result of a factory, sharing it with concurrent callers.
+
+    Args:
+        futures (dict): The pending or kept results by key.
+        key: The key of the result.
+        factory: A coroutine function producing the result.
+        keep: Whether to keep successful results for later callers.
+
+    Returns:
+        The result of the factory.
+    """
+    future = futures.get(key, None)
+
+    if future is None:
+        future = asyncio.ensure_future(factory())
+        futures[key] = future
+
+        def forget(done):
+            if futures.get(key, None) is done and (
+                not keep or done.cancelled() or done.exception() is not None
+            ):
+                del futures[key]
+
+        future.add_done_callback(forget)
+
+    return await asyncio.shield(future)
+
+
+async def _call(callback: Optional[Callable], name: str, *args) -> Any:
+    """
+    Calls a callback that may be a coroutine function.
+
+    Raises:
+        PromptError: If the callback was not given.
+    """
+    if callback is None:
+        raise PromptError(f"A '{name}' callback is required.")
+
+    result = callback(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def _parse(function: Callable, **kwargs) -> Any:
+    """
+    Runs one of the synchronous parsers, turning its exits into errors.
+
+    Raises:
+        Error: If the parser exits.
+    """
+    lines: List[str] = []
+
+    with hooks.use_hooks(output=lines.append):
+        try:
+            return function(**kwargs)
+        except SystemExit as error:
+            raise Error("\n".join(lines) or "Failed to parse a response.") from error
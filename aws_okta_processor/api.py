@@ -0,0 +1,312 @@
+"""
+Python API for fetching AWS credentials through Okta.
+
+The API takes a typed configuration instead of command-line options, raises
+exceptions instead of exiting, and never uses the terminal: selections,
+passwords and MFA passcodes are answered by callbacks, and output goes to the
+'aws_okta_processor' logger. A 'Client' may be shared by many threads; Okta
+sessions are reused across calls and concurrent requests for the same
+credentials wait on a single refresh.
+
+    from aws_okta_processor.api import Client, Config
+
+    client = Client(passcode=lambda factor: read_totp())
+    credentials = client.get_credentials(Config(
+        organization="mycompany.okta.com",
+        user="jdoe",
+        password=password,
+        application="https://mycompany.okta.com/home/amazon_aws/...",
+        role="arn:aws:iam::123456789012:role/Dev",
+    ))
+"""
+
+import logging
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.okta import OktaError
+from aws_okta_processor.core.pool import CredentialPool
+from aws_okta_processor.core.saml import AWS_SIGN_IN_URL
+
+LOGGER = logging.getLogger("aws_okta_processor")
+
+
+class Error(Exception):
+    """
+    Raised when credentials cannot be fetched.
+
+    Attributes:
+        message (str): The error message.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class AuthenticationError(Error):
+    """
+    Raised when Okta rejects a request.
+
+    Attributes:
+        status_code (int): The HTTP status code of the response.
+        error_code (str): The Okta error code of the response, if any.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        error_code: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+
+
+class PromptError(Error):
+    """Raised when a prompt is needed but no callback was given for it."""
+
+
+@dataclass(frozen=True)
+class Config:  # pylint: disable=R0902
+    """
+    The options of one set of credentials, as for 'aws-okta-processor authenticate'.
+
+    Attributes:
+        organization: Okta organization domain.
+        user: Okta user name.
+        password: Okta password, asked through the 'password' callback if None.
+        application: Okta application URL, selected through the 'select' callback if None.
+        role: AWS role ARN, selected through the 'select' callback if None.
+        secondary_role: Secondary AWS role ARN to assume with the role's credentials.
+        region: AWS region name.
+        sign_in_url: AWS SAML sign-in URL.
+        account_alias: AWS account alias filter (uses wildcards).
+        duration: Duration of the role session in seconds.
+        key: Key used for generating and accessing the cache.
+        factor: Factor type for MFA, such as 'push:okta'.
+        factor_timeout: Seconds to wait for a pending MFA factor.
+        factor_poll_max: Maximum seconds between polls of a pending MFA factor.
+        remember_device: Ask Okta to skip MFA for this device next time.
+        totp_seed: Seed of the TOTP factor, to verify it without the 'passcode' callback.
+        totp_seed_file: File containing the seed of the TOTP factor.
+        totp_seed_command: Command printing the seed of the TOTP factor.
+        no_okta_cache: Do not reuse an Okta session.
+        no_aws_cache: Do not reuse cached credentials.
+        refresh_window: Fixed number of seconds before expiry to refresh credentials.
+        refresh_fraction: Fraction of the session duration used as refresh window.
+        refresh_jitter: Maximum per-host extension of the refresh window.
+        failure_ttl: Seconds to remember a failed authentication.
+        retries: Times a request failing transiently is sent again.
+        hedge: Send a second request when a page takes unusually long to load.
+        deadline: Seconds the whole authentication may take.
+    """  # noqa: E501
+
+    organization: str
+    user: str
+    password: Optional[str] = None
+    application: Optional[str] = None
+    role: Optional[str] = None
+    secondary_role: Optional[str] = None
+    region: Optional[str] = None
+    sign_in_url: str = AWS_SIGN_IN_URL
+    account_alias: Optional[str] = None
+    duration: int = 3600
+    key: Optional[str] = None
+    factor: Optional[str] = None
+    factor_timeout: Optional[int] = None
+    factor_poll_max: Optional[float] = None
+    remember_device: bool = False
+    totp_seed: Optional[str] = None
+    totp_seed_file: Optional[str] = None
+    totp_seed_command: Optional[str] = None
+    no_okta_cache: bool = False
+    no_aws_cache: bool = False
+    refresh_window: Optional[int] = None
+    refresh_fraction: Optional[float] = None
+    refresh_jitter: Optional[float] = None
+    failure_ttl: Optional[int] = None
+    retries: Optional[int] = None
+    hedge: bool = False
+    deadline: Optional[float] = None
+
+    def get_configuration(self) -> Dict[str, Any]:
+        """
+        Returns the configuration in the format of the 'authenticate' command.
+
+        Returns:
+            dict: A configuration dictionary.
+        """
+        return {
+            "AWS_OKTA_ENVIRONMENT": None,
+            "AWS_OKTA_USER": self.user,
+            "AWS_OKTA_PASS": self.password,
+            "AWS_OKTA_ORGANIZATION": self.organization,
+            "AWS_OKTA_APPLICATION": self.application,
+            "AWS_OKTA_ROLE": self.role,
+            "AWS_OKTA_SECONDARY_ROLE": self.secondary_role,
+            "AWS_OKTA_REGION": self.region,
+            "AWS_OKTA_SIGN_IN_URL": self.sign_in_url,
+            "AWS_OKTA_DURATION": str(self.duration),
+            "AWS_OKTA_KEY": self.key,
+            "AWS_OKTA_FACTOR": self.factor,
+            "AWS_OKTA_FACTOR_TIMEOUT": self.factor_timeout,
+            "AWS_OKTA_FACTOR_POLL_MAX": self.factor_poll_max,
+            "AWS_OKTA_REMEMBER_DEVICE": self.remember_device,
+            "AWS_OKTA_TOTP_SEED": self.totp_seed,
+            "AWS_OKTA_TOTP_SEED_FILE": self.totp_seed_file,
+            "AWS_OKTA_TOTP_SEED_COMMAND": self.totp_seed_command,
+            "AWS_OKTA_SILENT": True,
+            "AWS_OKTA_NO_OKTA_CACHE": self.no_okta_cache,
+            "AWS_OKTA_NO_AWS_CACHE": self.no_aws_cache,
+            "AWS_OKTA_ACCOUNT_ALIAS": self.account_alias,
+            "AWS_OKTA_TARGET_SHELL": None,
+            "AWS_OKTA_REFRESH_WINDOW": self.refresh_window,
+            "AWS_OKTA_REFRESH_FRACTION": self.refresh_fraction,
+            "AWS_OKTA_REFRESH_JITTER": self.refresh_jitter,
+            "AWS_OKTA_FAILURE_TTL": self.failure_ttl,
+            "AWS_OKTA_TIMING": False,
+            "AWS_OKTA_RETRIES": self.retries,
+            "AWS_OKTA_HEDGE": self.hedge,
+            "AWS_OKTA_DEADLINE": self.deadline,
+            "AWS_OKTA_BATCH": None,
+            "AWS_OKTA_BATCH_WORKERS": None,
+        }
+
+
+@dataclass(frozen=True)
+class Credentials:
+    """
+    Temporary AWS credentials.
+
+    Attributes:
+        access_key_id: The AWS access key ID.
+        secret_access_key: The AWS secret access key.
+        session_token: The AWS session token.
+        expiration: The expiration time, in ISO 8601 format.
+    """
+
+    access_key_id: str
+    secret_access_key: str
+    session_token: str
+    expiration: str
+
+
+class ConfigCommand:
+    """
+    Presents a 'Config' the way 'SAMLFetcher' expects an 'Authenticate' command.
+
+    A new one is created for every call, since fetchers clear the user and
+    password of the configuration once used.
+    """
+
+    def __init__(self, config: Config):
+        self.configuration = config.get_configuration()
+
+    def get_pass(self) -> Optional[str]:
+        """Returns the Okta password, if configured."""
+        return self.configuration["AWS_OKTA_PASS"] or None
+
+    def get_key_dict(self) -> Dict[str, Optional[str]]:
+        """Returns the cache key entries, the same as 'Authenticate' ones."""
+        return {
+            "Organization": self.configuration["AWS_OKTA_ORGANIZATION"],
+            "User": self.configuration["AWS_OKTA_USER"],
+            "Key": self.configuration["AWS_OKTA_KEY"],
+        }
+
+
+class Client:
+    """
+    Fetches AWS credentials for any number of configurations, from any thread.
+
+    Credentials and Okta sessions are kept in memory only, unless a 'cache'
+    such as botocore's JSONFileCache and 'persist=True' are given to share
+    them with the command line.
+    """
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        select: Optional[Callable[[str, List[str]], str]] = None,
+        password: Optional[Callable[[], str]] = None,
+        passcode: Optional[Callable[[str], str]] = None,
+        cache: Any = None,
+        persist: bool = False,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            select: Called with a label ('Factor', 'AWS application' or 'AWS Role')
+                and the available keys when several match; returns one of the keys.
+            password: Called when the configuration has no password.
+            passcode: Called with the factor type for TOTP and hardware tokens.
+            cache: An optional dict-like cache backing the in-memory credentials.
+            persist: If True, Okta sessions are also kept in the session cache file.
+        """  # noqa: E501
+        self._select = select
+        self._password = password
+        self._passcode = passcode
+        self._pool = CredentialPool(cache=cache, persist=persist)
+
+    def get_credentials(self, config: Config) -> Credentials:
+        """
+        Fetches the AWS credentials of a configuration.
+
+        Args:
+            config: The configuration.
+
+        Returns:
+            Credentials: The credentials, from memory if they are still fresh.
+
+        Raises:
+            AuthenticationError: If Okta rejects a request.
+            PromptError: If a prompt is needed but no callback was given for it.
+            Error: If the credentials cannot be fetched otherwise.
+        """
+        lines: List[str] = []
+
+        def output(line):
+            LOGGER.debug(line)
+            lines.append(line)
+
+        try:
+            with hooks.use_hooks(
+                select=self._select or _missing_callback("select"),
+                password=self._password or _missing_callback("password"),
+                passcode=self._passcode or _missing_callback("passcode"),
+                output=output,
+            ):
+                credentials = self._pool.fetch_credentials(
+                    authenticate=ConfigCommand(config)
+                )
+        except OktaError as error:
+            raise AuthenticationError(
+                error.message,
+                status_code=error.status_code,
+                error_code=error.error_code,
+            ) from error
+        except SystemExit as error:
+            errors = [line for line in lines if line.lower().startswith("error")]
+            raise Error(
+                "\n".join(errors) or "Failed to fetch credentials."
+            ) from error
+
+        return Credentials(
+            access_key_id=credentials["AccessKeyId"],
+            secret_access_key=credentials["SecretAccessKey"],
+            session_token=credentials["SessionToken"],
+            expiration=credentials["Expiration"],
+        )
+
+
+def _missing_callback(name: str) -> Callable[..., Any]:
+    """Returns a hook raising PromptError for a callback that was not given."""
+
+    def callback(*args):  # pylint: disable=W0613
+        raise PromptError(f"A '{name}' callback is required.")
+
+    return callback
@@ -9,6 +9,11 @@ Options:
 Commands:
   authenticate  used to authenticate into AWS using Okta
   get-roles     used to get AWS roles
+  warm          used to refresh the credentials of configured profiles
+  login         used to log in to several Okta organizations at once
+  keepalive     used to keep cached Okta sessions from expiring
+  agent         used to serve credentials to aws-okta-processor-client
+  serve         used to serve credentials to AWS SDKs over HTTP
 
 Help:
   For help using this tool, visit here for docs and issues:
@@ -40,6 +45,26 @@ def main():
             options = docopt(commands.getroles.__doc__, argv=argv)
             command = commands.getroles.GetRoles(options)
             command.run()
+        elif args["<command>"] == "warm":
+            options = docopt(commands.warm.__doc__, argv=argv)
+            command = commands.warm.Warm(options)
+            command.run()
+        elif args["<command>"] == "login":
+            options = docopt(commands.login.__doc__, argv=argv)
+            command = commands.login.Login(options)
+            command.run()
+        elif args["<command>"] == "keepalive":
+            options = docopt(commands.keepalive.__doc__, argv=argv)
+            command = commands.keepalive.KeepAlive(options)
+            command.run()
+        elif args["<command>"] == "agent":
+            options = docopt(commands.agent.__doc__, argv=argv)
+            command = commands.agent.Agent(options)
+            command.run()
+        elif args["<command>"] == "serve":
+            options = docopt(commands.serve.__doc__, argv=argv)
+            command = commands.serve.Serve(options)
+            command.run()
         else:
             sys.exit(
                 f"{args['<command>']!r} is not an aws-okta-processor "
@@ -0,0 +1,187 @@
+"""
+Thin client for the aws-okta-processor agent.
+
+Forwards 'authenticate' commands to a running 'aws-okta-processor agent' over
+its Unix socket and prints the reply. When no agent is running, when it does
+not answer in time or needs a login, or for any other command, the command
+runs in process as with 'aws-okta-processor'.
+
+Usage in a profile:
+    credential_process=aws-okta-processor-client authenticate [options]
+"""
+
+import json
+import os
+import socket
+import sys
+
+# Default Unix socket of the agent, overridden by AWS_OKTA_AGENT_SOCKET
+DEFAULT_SOCKET_PATH = "~/.aws-okta-processor/agent.sock"
+
+# Default Unix socket of a system-wide broker, used when no agent socket exists
+DEFAULT_BROKER_SOCKET_PATH = "/run/aws-okta-processor/broker.sock"
+
+# Prefix of the environment variables forwarded to the agent
+ENVIRON_PREFIX = "AWS_OKTA_"
+
+# Commands the agent answers
+AGENT_COMMANDS = ["authenticate"]
+
+# Seconds to wait for the agent's reply, overridden by AWS_OKTA_AGENT_TIMEOUT;
+# longer than a push MFA may stay pending
+DEFAULT_TIMEOUT = 360
+
+
+def get_socket_path(environ=None):
+    """
+    Returns the path of the agent's Unix socket.
+
+    Without AWS_OKTA_AGENT_SOCKET, the user's agent is preferred over a
+    system-wide broker.
+
+    Args:
+        environ (Mapping, optional): The environment, the process one by default.
+
+    Returns:
+        str: The socket path.
+    """
+    if environ is None:
+        environ = os.environ
+
+    if "AWS_OKTA_AGENT_SOCKET" in environ:
+        return os.path.expanduser(environ["AWS_OKTA_AGENT_SOCKET"])
+
+    socket_path = os.path.expanduser(DEFAULT_SOCKET_PATH)
+    if not os.path.exists(socket_path) and os.path.exists(DEFAULT_BROKER_SOCKET_PATH):
+        return DEFAULT_BROKER_SOCKET_PATH
+
+    return socket_path
+
+
+def get_timeout(environ=None):
+    """
+    Returns the seconds to wait for the agent's reply.
+
+    Args:
+        environ (Mapping, optional): The environment, the process one by default.
+
+    Returns:
+        float: The timeout.
+    """
+    if environ is None:
+        environ = os.environ
+
+    return float(environ.get("AWS_OKTA_AGENT_TIMEOUT", None) or DEFAULT_TIMEOUT)
+
+
+def is_batch(argv=None, environ=None):
+    """
+    Tells whether an 'authenticate' command runs a batch, which reads its job
+    file and prints its results as they come, and so runs in process.
+
+    Args:
+        argv (list): The command and its arguments.
+        environ (Mapping, optional): The environment, the process one by default.
+
+    Returns:
+        bool: True if '--batch' or AWS_OKTA_BATCH is given.
+    """
+    if environ is None:
+        environ = os.environ
+
+    if environ.get("AWS_OKTA_BATCH", None):
+        return True
+
+    return any(arg == "--batch" or arg.startswith("--batch=") for arg in argv)
+
+
+def read_message(stream=None):
+    """
+    Reads one newline-delimited JSON message.
+
+    Args:
+        stream: A binary file-like object.
+
+    Returns:
+        dict or None: The message, or None if the stream is closed.
+    """
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode())
+
+
+def write_message(stream=None, message=None):
+    """
+    Writes one newline-delimited JSON message.
+
+    Args:
+        stream: A binary file-like object.
+        message (dict): The message to write.
+    """
+    stream.write(json.dumps(message).encode() + b"\n")
+    stream.flush()
+
+
+def send_request(argv=None, socket_path=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Sends a command to the agent and waits for its reply.
+
+    Args:
+        argv (list): The command and its arguments.
+        socket_path (str): The path of the agent's Unix socket.
+        timeout (float): Seconds to wait for the agent.
+
+    Returns:
+        dict or None: The reply with 'status' and 'stdout', and 'login' if the
+        command needs a login, or None if no agent is listening on the socket
+        or it did not reply in time.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    request = {
+        "argv": argv,
+        "environ": {
+            key: value
+            for key, value in os.environ.items()
+            if key.startswith(ENVIRON_PREFIX)
+        },
+        "cwd": os.getcwd(),
+    }
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=E1101
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+
+    with client, client.makefile("rwb") as stream:
+        try:
+            write_message(stream=stream, message=request)
+            return read_message(stream=stream)
+        except OSError:
+            # Timed out, or the agent went away
+            return None
+
+
+def main():
+    """Client entrypoint."""
+    argv = sys.argv[1:]
+
+    if argv and argv[0] in AGENT_COMMANDS and not is_batch(argv=argv):
+        reply = send_request(
+            argv=argv, socket_path=get_socket_path(), timeout=get_timeout()
+        )
+        if reply is not None and not reply.get("login", False):
+            sys.stdout.write(reply["stdout"])
+            sys.stdout.flush()
+            sys.exit(reply["status"])
+
+    # No agent is running, or a login is needed; run the command in this
+    # process, which can prompt on the user's terminal
+    from . import cli  # pylint: disable=C0415
+
+    cli.main()
@@ -1,4 +1,9 @@
 """Module to import all the commands."""
 
+from . import agent  # noqa
 from . import authenticate  # noqa
 from . import getroles  # noqa
+from . import keepalive  # noqa
+from . import login  # noqa
+from . import serve  # noqa
+from . import warm  # noqa
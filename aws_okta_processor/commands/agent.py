@@ -0,0 +1,344 @@
+# pylint: disable=C0301
+"""
+Module for the long-lived credential agent.
+
+This module defines the 'Agent' class, which listens on a per-user Unix socket and answers
+'authenticate' requests from 'aws-okta-processor-client' out of an in-memory credential pool.
+The Okta session, the pooled HTTP connections and the decoded credentials stay in memory
+between requests.
+
+With '--broker', a single agent serves every user of the host from a shared socket. Callers
+are identified by their Unix peer credentials and each user gets an isolated, memory-only pool.
+
+Usage:
+    aws-okta-processor agent [options]
+
+Options:
+    -h --help                                                   Show this screen.
+    --version                                                   Show version.
+    -S <socket_path>, --socket=<socket_path>                    Unix socket path (~/.aws-okta-processor/agent.sock).
+    -b --broker                                                 Serve every user of the host (/run/aws-okta-processor/broker.sock).
+    --max-users <max_users>                                     Users kept in memory by the broker [default: 256].
+    --idle-timeout <idle_seconds>                               Seconds before the broker drops an idle user [default: 3600].
+    -s --silent                                                 Run silently.
+"""  # noqa: E501
+
+from __future__ import print_function
+
+import os
+import socket
+import socketserver
+import struct
+import sys
+
+from botocore.credentials import JSONFileCache  # type: ignore[import-untyped]
+from docopt import docopt, DocoptExit  # type: ignore[import-untyped]
+
+from aws_okta_processor import client
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.pool import CredentialPool, UserPools
+from aws_okta_processor.core.tty import print_tty
+
+from . import authenticate
+from .base import Base
+
+# Map command-line options to environment variable names.
+CONFIG_MAP = {
+    "--socket": "AWS_OKTA_AGENT_SOCKET",
+    "--broker": "AWS_OKTA_AGENT_BROKER",
+    "--max-users": "AWS_OKTA_AGENT_MAX_USERS",
+    "--idle-timeout": "AWS_OKTA_AGENT_IDLE_TIMEOUT",
+    "--silent": "AWS_OKTA_SILENT",
+}
+
+# Map environment variables to internal configuration keys.
+EXTEND_CONFIG_MAP = {
+    "AWS_OKTA_AGENT_SOCKET": "socket",
+    "AWS_OKTA_AGENT_BROKER": "broker",
+    "AWS_OKTA_AGENT_MAX_USERS": "max-users",
+    "AWS_OKTA_AGENT_IDLE_TIMEOUT": "idle-timeout",
+    "AWS_OKTA_SILENT": "silent",
+}
+
+
+class PromptRefused(SystemExit):
+    """Raised instead of prompting for a request that no terminal can answer."""
+
+    def __init__(self):
+        super().__init__(1)
+
+
+def refuse_prompt():
+    """
+    Fails a prompt of a request, which would otherwise wait for input on the
+    agent's terminal while the client waits for the reply.
+
+    Raises:
+        PromptRefused: Always.
+    """
+    raise PromptRefused()
+
+
+# Settings of a forwarded request a broker refuses, as it would read the file
+# or run the command as its own user rather than the caller's
+BROKER_REFUSED_SETTINGS = ["AWS_OKTA_TOTP_SEED_FILE", "AWS_OKTA_TOTP_SEED_COMMAND"]
+
+
+def get_forwarded_environ(environ=None):
+    """
+    Keeps the environment variables of a forwarded request that configure
+    'authenticate'.
+
+    Args:
+        environ (dict): The environment variables sent by the client.
+
+    Returns:
+        dict: The variables of authenticate.CONFIG_MAP.
+    """
+    allowed = set(authenticate.CONFIG_MAP.values())
+    return {key: value for key, value in environ.items() if key in allowed}
+
+
+def get_peer_uid(connection=None):
+    """
+    Returns the user ID of the process at the other end of a Unix socket.
+
+    Args:
+        connection (socket.socket): A connected Unix socket.
+
+    Returns:
+        int: The user ID of the peer.
+    """
+    credentials = connection.getsockopt(
+        socket.SOL_SOCKET,
+        socket.SO_PEERCRED,  # pylint: disable=E1101
+        struct.calcsize("3i"),
+    )
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid
+
+
+def get_request_label(command=None):
+    """
+    Returns a label for a request in the agent's log.
+
+    Args:
+        command (Authenticate): The command of the request, if it was parsed.
+
+    Returns:
+        str: The role or the cache key of the request.
+    """
+    if command is None:
+        return "request"
+
+    configuration = command.configuration
+    return configuration["AWS_OKTA_ROLE"] or configuration["AWS_OKTA_KEY"] or "request"
+
+
+class AgentRequestHandler(socketserver.StreamRequestHandler):
+    """Answers the newline-delimited JSON requests of one client connection."""
+
+    def handle(self):
+        request = client.read_message(stream=self.rfile)
+        if request is None:
+            return
+
+        uid = None
+        if self.server.agent.pools is not None:
+            uid = get_peer_uid(connection=self.request)
+
+        reply = self.server.agent.handle_request(request=request, uid=uid)
+        client.write_message(stream=self.wfile, message=reply)
+
+
+class Agent(Base):
+    """
+    Serves 'authenticate' requests from a Unix socket until interrupted.
+
+    Inherits from:
+        Base: The base class that provides common functionality for commands.
+    """
+
+    def __init__(self, options, *args, **kwargs):
+        super().__init__(options, *args, **kwargs)
+        self.pool = None
+        self.pools = None
+
+        if self.configuration["AWS_OKTA_AGENT_BROKER"]:
+            self.pools = UserPools(
+                max_users=int(self.configuration["AWS_OKTA_AGENT_MAX_USERS"] or 256),
+                idle_timeout=int(
+                    self.configuration["AWS_OKTA_AGENT_IDLE_TIMEOUT"] or 3600
+                ),
+            )
+        else:
+            self.pool = CredentialPool(cache=JSONFileCache())
+
+    def handle_request(self, request=None, uid=None):
+        """
+        Runs a forwarded command against the credential pool.
+
+        Only the environment variables of 'authenticate' are used. A broker
+        runs it against the pool of the calling user and ignores the dotfiles,
+        which it cannot safely read on the user's behalf; it refuses TOTP seed
+        files and commands for the same reason.
+
+        The agent does not prompt, as the user is not at its terminal: when a
+        login is needed, it replies so and the client runs the command itself.
+
+        Args:
+            request (dict): The 'argv', 'environ' and 'cwd' of the client.
+            uid (int): The user ID of the client, used by a broker.
+
+        Returns:
+            dict: The reply with the exit 'status' and 'stdout' of the command,
+            and 'login' if the command needs a login.
+        """
+        argv = request.get("argv", [])
+
+        if not argv or argv[0] not in client.AGENT_COMMANDS:
+            return {"status": 1, "stdout": ""}
+
+        if self.pools is not None:
+            pool = self.pools.get_pool(uid=uid)
+            kwargs = {"dotfiles": False}
+        else:
+            pool = self.pool
+            kwargs = {"cwd": request.get("cwd", None)}
+
+        command = None
+        try:
+            options = docopt(authenticate.__doc__, argv=argv)
+            command = authenticate.Authenticate(
+                options,
+                environ=get_forwarded_environ(environ=request.get("environ", {})),
+                pool=pool,
+                **kwargs,
+            )
+            if self.pools is not None and any(
+                command.configuration[var] for var in BROKER_REFUSED_SETTINGS
+            ):
+                print_tty("ERROR: The broker refuses TOTP seed files and commands!")
+                return {"status": 1, "stdout": ""}
+            if command.configuration["AWS_OKTA_BATCH"]:
+                # Batches run in the client's process
+                return {"status": 1, "stdout": ""}
+            with hooks.use_hooks(prompt=refuse_prompt):
+                output = command.get_output(command.authenticate())
+        except PromptRefused:
+            # The client logs in itself, on its own terminal
+            return {"status": 1, "stdout": "", "login": True}
+        except (DocoptExit, SystemExit):
+            return {"status": 1, "stdout": ""}
+        except Exception:  # pylint: disable=W0718
+            # The arguments are left out of the log, as they may hold a password
+            print_tty(f"ERROR: Failed to authenticate {get_request_label(command)}!")
+            return {"status": 1, "stdout": ""}
+
+        return {"status": 0, "stdout": output + "\n"}
+
+    def get_socket_path(self):
+        """
+        Returns the path of the Unix socket to listen on.
+
+        Returns:
+            str: The socket path.
+        """
+        if self.configuration["AWS_OKTA_AGENT_SOCKET"]:
+            return os.path.expanduser(self.configuration["AWS_OKTA_AGENT_SOCKET"])
+
+        if self.pools is not None:
+            return client.DEFAULT_BROKER_SOCKET_PATH
+
+        return os.path.expanduser(client.DEFAULT_SOCKET_PATH)
+
+    def create_server(self, socket_path=None):
+        """
+        Creates the Unix socket server, readable by the current user only, or
+        by every user for a broker.
+
+        Args:
+            socket_path (str): The path of the Unix socket.
+
+        Returns:
+            socketserver.ThreadingUnixStreamServer: The server.
+        """
+        broker = self.pools is not None
+
+        socket_directory = os.path.dirname(socket_path)
+        if not os.path.isdir(socket_directory):
+            os.makedirs(socket_directory, mode=0o755 if broker else 0o700)
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        previous_umask = os.umask(0o111 if broker else 0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(  # pylint: disable=E1101
+                socket_path, AgentRequestHandler
+            )
+        finally:
+            os.umask(previous_umask)
+
+        server.daemon_threads = True
+        server.agent = self
+
+        if broker:
+            # Called by serve_forever() between requests
+            server.service_actions = self.pools.evict
+
+        return server
+
+    def run(self):
+        """
+        Main entry point for the 'agent' command.
+
+        Listens on the Unix socket until interrupted and removes it afterwards.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            print_tty("ERROR: The agent requires Unix domain sockets!")
+            sys.exit(1)
+
+        if self.pools is not None and not hasattr(socket, "SO_PEERCRED"):
+            print_tty("ERROR: The broker requires Unix socket peer credentials!")
+            sys.exit(1)
+
+        socket_path = self.get_socket_path()
+        server = self.create_server(socket_path=socket_path)
+
+        print_tty(
+            f"Agent listening on {socket_path}",
+            silent=self.configuration["AWS_OKTA_SILENT"],
+        )
+
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+    def get_configuration(self, options=None):
+        """
+        Builds the configuration dictionary from options and environment variables.
+
+        Args:
+            options (dict, optional): Command-line options parsed by docopt.
+
+        Returns:
+            dict: A configuration dictionary.
+        """
+        configuration = {}
+        environ = self.get_environ()
+
+        for param, var in CONFIG_MAP.items():
+            if options.get(param, None):
+                configuration[var] = options[param]
+
+            if var not in configuration:
+                if var in environ:
+                    configuration[var] = environ[var]
+                else:
+                    configuration[var] = None
+
+        return self.extend_configuration(configuration, "agent", EXTEND_CONFIG_MAP)
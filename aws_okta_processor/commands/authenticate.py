@@ -27,18 +27,41 @@ Options:
     -d <duration_seconds>, --duration=<duration_seconds>        Duration of role session [default: 3600].
     -k <key>, --key=<key>                                       Key used for generating and accessing cache.
     -f <factor> --factor=<factor>                               Factor type for MFA.
+    --factor-timeout <factor_timeout>                           Seconds to wait for a pending MFA factor (300).
+    --factor-poll-max <factor_poll_max>                         Maximum seconds between polls of a pending MFA factor (5).
+    --remember-device                                           Ask Okta to skip MFA for this device next time.
+    --totp-seed-file <totp_seed_file>                           File containing the seed of the TOTP factor, to verify it without prompting.
+    --totp-seed-command <totp_seed_command>                     Command printing the seed of the TOTP factor.
     -s --silent                                                 Run silently.
     --target-shell <target_shell>                               Target shell to output the export command.
+    --refresh-window <refresh_window>                           Fixed number of seconds before expiry to refresh credentials.
+    --refresh-fraction <refresh_fraction>                       Fraction of the session duration used as refresh window (0.1).
+    --refresh-jitter <refresh_jitter>                           Maximum per-host extension of the refresh window, as a fraction of it (0.5).
+    --failure-ttl <failure_ttl>                                 Seconds to remember a failed authentication (60).
+    --timing                                                    Print how long each network step took.
+    --retries <retries>                                         Times a request failing transiently is sent again (2).
+    --hedge                                                     Send a second request when a page takes unusually long to load.
+    --deadline <deadline>                                       Seconds the whole authentication may take, failing instead of prompting without a terminal.
+    --batch <jobs_file>                                         Authenticate every job of a JSON lines file ('-' for stdin), printing a JSON line per job.
+    --batch-workers <batch_workers>                             Number of users and organizations authenticated at once in batch mode (4).
 """  # noqa: E501
 
 from __future__ import print_function
 
 import os
+import sys
 import json
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from botocore.credentials import JSONFileCache  # type: ignore[import-untyped]
 
+from aws_okta_processor.core import hooks
 from aws_okta_processor.core.fetcher import SAMLFetcher
+from aws_okta_processor.core.logins import DEFAULT_LOGIN_WORKERS, get_login_label
+from aws_okta_processor.core.tty import use_prompt_label
 
 from .base import Base
 
@@ -68,6 +91,9 @@ NT_EXPORT_STRING = (
     "$env:AWS_CREDENTIAL_EXPIRATION='{}'"
 )
 
+# Batch options a job cannot set
+BATCH_OPTIONS = ("--batch", "--batch-workers")
+
 # Map command-line options to environment variable names.
 CONFIG_MAP = {
     "--environment": "AWS_OKTA_ENVIRONMENT",
@@ -82,11 +108,28 @@ CONFIG_MAP = {
     "--duration": "AWS_OKTA_DURATION",
     "--key": "AWS_OKTA_KEY",
     "--factor": "AWS_OKTA_FACTOR",
+    "--factor-timeout": "AWS_OKTA_FACTOR_TIMEOUT",
+    "--factor-poll-max": "AWS_OKTA_FACTOR_POLL_MAX",
+    "--remember-device": "AWS_OKTA_REMEMBER_DEVICE",
+    # No option, to keep the seed out of the process list
+    "--totp-seed": "AWS_OKTA_TOTP_SEED",
+    "--totp-seed-file": "AWS_OKTA_TOTP_SEED_FILE",
+    "--totp-seed-command": "AWS_OKTA_TOTP_SEED_COMMAND",
     "--silent": "AWS_OKTA_SILENT",
     "--no-okta-cache": "AWS_OKTA_NO_OKTA_CACHE",
     "--no-aws-cache": "AWS_OKTA_NO_AWS_CACHE",
     "--account-alias": "AWS_OKTA_ACCOUNT_ALIAS",
     "--target-shell": "AWS_OKTA_TARGET_SHELL",
+    "--refresh-window": "AWS_OKTA_REFRESH_WINDOW",
+    "--refresh-fraction": "AWS_OKTA_REFRESH_FRACTION",
+    "--refresh-jitter": "AWS_OKTA_REFRESH_JITTER",
+    "--failure-ttl": "AWS_OKTA_FAILURE_TTL",
+    "--timing": "AWS_OKTA_TIMING",
+    "--retries": "AWS_OKTA_RETRIES",
+    "--hedge": "AWS_OKTA_HEDGE",
+    "--deadline": "AWS_OKTA_DEADLINE",
+    "--batch": "AWS_OKTA_BATCH",
+    "--batch-workers": "AWS_OKTA_BATCH_WORKERS",
 }
 
 # Map environment variables to internal configuration keys.
@@ -103,11 +146,27 @@ EXTEND_CONFIG_MAP = {
     "AWS_OKTA_DURATION": "duration",
     "AWS_OKTA_KEY": "key",
     "AWS_OKTA_FACTOR": "factor",
+    "AWS_OKTA_FACTOR_TIMEOUT": "factor-timeout",
+    "AWS_OKTA_FACTOR_POLL_MAX": "factor-poll-max",
+    "AWS_OKTA_REMEMBER_DEVICE": "remember-device",
+    "AWS_OKTA_TOTP_SEED": "totp-seed",
+    "AWS_OKTA_TOTP_SEED_FILE": "totp-seed-file",
+    "AWS_OKTA_TOTP_SEED_COMMAND": "totp-seed-command",
     "AWS_OKTA_SILENT": "silent",
     "AWS_OKTA_NO_OKTA_CACHE": "no-okta-cache",
     "AWS_OKTA_NO_AWS_CACHE": "no-aws-cache",
     "AWS_OKTA_ACCOUNT_ALIAS": "account-alias",
     "AWS_OKTA_TARGET_SHELL": "target-shell",
+    "AWS_OKTA_REFRESH_WINDOW": "refresh-window",
+    "AWS_OKTA_REFRESH_FRACTION": "refresh-fraction",
+    "AWS_OKTA_REFRESH_JITTER": "refresh-jitter",
+    "AWS_OKTA_FAILURE_TTL": "failure-ttl",
+    "AWS_OKTA_TIMING": "timing",
+    "AWS_OKTA_RETRIES": "retries",
+    "AWS_OKTA_HEDGE": "hedge",
+    "AWS_OKTA_DEADLINE": "deadline",
+    "AWS_OKTA_BATCH": "batch",
+    "AWS_OKTA_BATCH_WORKERS": "batch-workers",
 }
 
 
@@ -124,9 +183,16 @@ class Authenticate(Base):
         """
         Authenticates with Okta and fetches AWS credentials.
 
+        When the command was created with a 'pool' keyword argument, the
+        credentials are served from that in-memory credential pool.
+
         Returns:
             dict: A dictionary containing AWS credentials.
         """
+        pool = self.kwargs.get("pool", None)
+        if pool is not None:
+            return pool.fetch_credentials(authenticate=self)
+
         cache = JSONFileCache()
         saml_fetcher = SAMLFetcher(self, cache=cache)
 
@@ -141,16 +207,155 @@ class Authenticate(Base):
         Authenticates with Okta, fetches AWS credentials, and outputs them
         either as environment variables or as JSON, depending on the configuration.
         """
+        if self.configuration["AWS_OKTA_BATCH"]:
+            self.run_batch()
+            return
+
         credentials = self.authenticate()
 
+        print(self.get_output(credentials))
+
+    def run_batch(self):
+        """
+        Authenticates every job of the batch file and prints a JSON line per
+        job as soon as it is done, exiting with an error status if any failed.
+
+        Jobs are grouped by user and organization, so that each Okta session
+        is created once, and the groups run concurrently.
+        """
+        groups = OrderedDict()
+        failed = False
+        lock = threading.Lock()
+
+        def write(result):
+            nonlocal failed
+            with lock:
+                failed = failed or "error" in result
+                print(json.dumps(result), flush=True)
+
+        for job_id, command in self.get_batch_jobs():
+            if isinstance(command, Exception):
+                write({"id": job_id, "error": str(command)})
+                continue
+
+            configuration = command.configuration
+            label = get_login_label(
+                user_name=configuration["AWS_OKTA_USER"],
+                organization=configuration["AWS_OKTA_ORGANIZATION"],
+            )
+            groups.setdefault(label, []).append((job_id, command))
+
+        def run_group(label):
+            self.run_batch_group(label=label, jobs=groups[label], write=write)
+
+        workers = int(self.configuration["AWS_OKTA_BATCH_WORKERS"] or 0)
+        with ThreadPoolExecutor(
+            max_workers=max(1, workers or DEFAULT_LOGIN_WORKERS)
+        ) as executor:
+            list(executor.map(hooks.bind_hooks(run_group), groups))
+
+        if failed:
+            sys.exit(1)
+
+    def run_batch_group(self, label=None, jobs=None, write=None):
+        """
+        Authenticates the jobs of a user and organization in turn, sharing the
+        Okta session created for the first job whose credentials aren't cached.
+
+        Args:
+            label (str): The label of the user and organization's prompts.
+            jobs (list): (id, 'Authenticate' instance) tuples.
+            write (callable): Called with the result of each job.
+        """
+        cache = JSONFileCache()
+        okta = None
+        login_error = None
+
+        for job_id, command in jobs:
+            fetcher = SAMLFetcher(command, cache=cache, okta=okta)
+            try:
+                with fetcher.within_deadline(), use_prompt_label(label=label):
+                    if okta is None and fetcher.needs_refresh():
+                        if login_error is None:
+                            okta, login_error = create_batch_okta(
+                                fetcher=fetcher,
+                                no_okta_cache=command.configuration[
+                                    "AWS_OKTA_NO_OKTA_CACHE"
+                                ],
+                            )
+                        if okta is None:
+                            # Don't try a failed Okta login again
+                            write({"id": job_id, "error": login_error})
+                            continue
+                        fetcher.okta = okta
+
+                    credentials = fetcher.fetch_credentials()
+            except (SystemExit, Exception) as error:  # pylint: disable=W0718
+                write({"id": job_id, "error": get_batch_error(error=error)})
+                continue
+
+            credentials["Version"] = 1
+            write({"id": job_id, "credentials": credentials})
+
+    def get_batch_jobs(self):
+        """
+        Reads the jobs of the batch file, one JSON object per line mapping long
+        option names without their dashes, like 'role', to values. The options
+        a job leaves out are those of the batch, and its 'id' is echoed in its
+        result, the line number by default.
+
+        Returns:
+            list: (id, 'Authenticate' instance) tuples, with the exception
+            instead of the instance for invalid jobs.
+        """
+        jobs_file = self.configuration["AWS_OKTA_BATCH"]
+        if jobs_file == "-":
+            lines = sys.stdin.readlines()
+        else:
+            with open(os.path.expanduser(jobs_file), encoding="utf-8") as file:
+                lines = file.readlines()
+
+        defaults = {param: self.configuration[var] for param, var in CONFIG_MAP.items()}
+        for param in BATCH_OPTIONS:
+            defaults[param] = None
+
+        kwargs = {k: v for k, v in self.kwargs.items() if k != "pool"}
+        jobs = []
+
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+
+            job_id = number
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    raise ValueError("A job must be a JSON object")
+                job_id = job.pop("id", number)
+                options = get_job_options(job=job, defaults=defaults)
+                jobs.append((job_id, Authenticate(options, **kwargs)))
+            except ValueError as error:
+                jobs.append((job_id, error))
+
+        return jobs
+
+    def get_output(self, credentials):
+        """
+        Formats AWS credentials as the command output.
+
+        Args:
+            credentials (dict): AWS credentials.
+
+        Returns:
+            str: Export commands if the environment option is set, JSON otherwise.
+        """
         if self.configuration["AWS_OKTA_ENVIRONMENT"]:
             if os.name == "nt":
-                print(self.nt_output(credentials))
-            else:
-                print(self.unix_output(credentials))
-        else:
-            credentials["Version"] = 1
-            print(json.dumps(credentials))
+                return self.nt_output(credentials)
+            return self.unix_output(credentials)
+
+        credentials["Version"] = 1
+        return json.dumps(credentials)
 
     def nt_output(self, credentials):
         """
@@ -231,17 +436,88 @@ class Authenticate(Base):
             dict: A configuration dictionary.
         """
         configuration = {}
+        environ = self.get_environ()
 
         for param, var in CONFIG_MAP.items():
             if options.get(param, None):
                 configuration[var] = options[param]
 
             if var not in configuration:
-                if var in os.environ:
-                    configuration[var] = os.environ[var]
+                if var in environ:
+                    configuration[var] = environ[var]
                 else:
                     configuration[var] = None
 
         return self.extend_configuration(
             configuration, "authenticate", EXTEND_CONFIG_MAP
         )
+
+
+def get_job_options(job=None, defaults=None):
+    """
+    Builds the options of a batch job.
+
+    Args:
+        job (dict): The options of the job, by long option name without dashes.
+        defaults (dict): The options of the batch.
+
+    Returns:
+        dict: The options, as docopt would have parsed them.
+
+    Raises:
+        ValueError: If the job sets an unknown or batch option.
+    """
+    options = dict(defaults)
+
+    for name, value in job.items():
+        param = f"--{name}"
+        if param not in CONFIG_MAP or param in BATCH_OPTIONS:
+            raise ValueError(f"Unknown job option {name!r}")
+
+        if value is True:
+            options[param] = True
+        elif value is None or value is False:
+            options[param] = None
+        else:
+            options[param] = str(value)
+
+    return options
+
+
+def create_batch_okta(fetcher=None, no_okta_cache=None):
+    """
+    Creates the Okta session of a batch job's user and organization.
+
+    Args:
+        fetcher (SAMLFetcher): The fetcher of the job.
+        no_okta_cache (bool): If True, does not use the cached Okta session.
+
+    Returns:
+        tuple: The Okta session and None, or None and the reason it failed.
+    """
+    try:
+        return fetcher.create_okta(no_okta_cache=no_okta_cache), None
+    except (SystemExit, Exception) as error:  # pylint: disable=W0718
+        return None, get_batch_error(error=error)
+
+
+def get_batch_error(error=None):
+    """
+    Describes why a batch job failed.
+
+    Args:
+        error (BaseException): The exception raised by the job.
+
+    Returns:
+        str: The message of the exception, or a generic one for an exit without
+        one, whose reason was printed to the terminal.
+    """
+    message = getattr(error, "message", None)
+    if message:
+        # Okta errors and exceeded deadlines keep the message they printed
+        return message
+
+    if isinstance(error, SystemExit) and not isinstance(error.code, str):
+        return "Failed to authenticate"
+
+    return str(error) or type(error).__name__
@@ -24,8 +24,10 @@ class Base:
         Args:
             options (dict): A dictionary of command options.
             *args: Variable length argument list.
-            **kwargs: Arbitrary keyword arguments.
-        """
+            **kwargs: Arbitrary keyword arguments. 'environ' and 'cwd' replace the
+                process environment and working directory the configuration is read from,
+                and 'dotfiles=False' ignores the dotfiles.
+        """  # noqa: E501
         self.args = args
         self.kwargs = kwargs
 
@@ -67,16 +69,31 @@ class Base:
         return None
 
     @staticmethod
-    def get_cwdfile():
+    def get_cwdfile(cwd=None):
         """Get the path to the dotfile in the current working directory if it exists.
 
+        Args:
+            cwd (str, optional): The working directory, the process one by default.
+
         Returns:
             str or None: The filename of the dotfile, or None if it doesn't exist.
         """
-        if os.path.exists(DOTFILE):
-            return DOTFILE
+        cwd_file = DOTFILE if cwd is None else os.path.join(cwd, DOTFILE)
+        if os.path.exists(cwd_file):
+            return cwd_file
         return None
 
+    def get_environ(self):
+        """Get the environment the configuration is read from.
+
+        Returns:
+            Mapping: The 'environ' keyword argument, or the process environment.
+        """
+        environ = self.kwargs.get("environ", None)
+        if environ is None:
+            return os.environ
+        return environ
+
     def extend_configuration(self, configuration, command, mapping):
         """Extend the given configuration with options from dotfiles.
 
@@ -92,13 +109,14 @@ class Base:
             dict: The updated configuration dictionary.
         """  # noqa: E501
         files = []
-        user_file = Base.get_userfile()
-        if user_file is not None:
-            files.append(user_file)
-
-        cwd_file = Base.get_cwdfile()
-        if cwd_file is not None:
-            files.append(cwd_file)
+        if self.kwargs.get("dotfiles", True):
+            user_file = Base.get_userfile()
+            if user_file is not None:
+                files.append(user_file)
+
+            cwd_file = Base.get_cwdfile(cwd=self.kwargs.get("cwd", None))
+            if cwd_file is not None:
+                files.append(cwd_file)
 
         if files:
             config = configparser.ConfigParser()
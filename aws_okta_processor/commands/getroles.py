@@ -12,6 +12,7 @@ Options:
     -p <user_pass>, --pass=<user_pass>                          Okta user password.
     -o <okta_organization>, --organization=<okta_organization>  Okta organization domain.
     -a <okta_application>, --application=<okta_application>     Okta application url.
+    --all-applications                                          Get the roles of every AWS application, concurrently.
     -r <role_name>, --role=<role_name>                          AWS role ARN.
     -R <region_name>, --region=<region_name>                    AWS region name.
     -U <sign_in_url>, --sign-in-url=<sign_in_url>               AWS Sign In URL.
@@ -61,6 +62,7 @@ CONFIG_MAP = {
     "--pass": "AWS_OKTA_PASS",
     "--organization": "AWS_OKTA_ORGANIZATION",
     "--application": "AWS_OKTA_APPLICATION",
+    "--all-applications": "AWS_OKTA_ALL_APPLICATIONS",
     "--role": "AWS_OKTA_ROLE",
     "--duration": "AWS_OKTA_DURATION",
     "--key": "AWS_OKTA_KEY",
@@ -79,7 +81,7 @@ class GetRoles(Base):
     Retrieves AWS accounts and roles available to the Okta user and outputs them in the specified format.
     """  # noqa: E501
 
-    def get_accounts_and_roles(self):  # pylint: disable=R0914
+    def get_accounts_and_roles(self):
         """
         Retrieves the list of AWS accounts and roles available to the Okta user by fetching the SAML assertion
         from Okta and parsing the AWS accounts and roles included in it.
@@ -103,6 +105,33 @@ class GetRoles(Base):
         # Fetch the application and roles from Okta
         app_and_role = saml_fetcher.get_app_roles()
 
+        return self.get_results(app_and_role)
+
+    def get_all_accounts_and_roles(self):
+        """
+        Retrieves the AWS accounts and roles of every AWS application of the Okta user, over one Okta session.
+
+        Returns:
+            list: A dictionary like that of get_accounts_and_roles() per application.
+        """  # noqa: E501
+        cache = JSONFileCache()
+        saml_fetcher = SAMLFetcher(self, cache=cache)
+
+        return [
+            self.get_results(app_and_role)
+            for app_and_role in saml_fetcher.get_all_app_roles()
+        ]
+
+    def get_results(self, app_and_role):  # pylint: disable=R0914
+        """
+        Converts the application and roles fetched from Okta to the results of the command.
+
+        Args:
+            app_and_role (dict): The result of SAMLFetcher.get_app_roles().
+
+        Returns:
+            dict: The results, see get_accounts_and_roles().
+        """  # noqa: E501
         result_accounts = []
         results = {
             "application_url": app_and_role["Application"],
@@ -149,12 +178,20 @@ class GetRoles(Base):
         If the output is 'profiles', generates AWS CLI profile configurations using the 'credential_process' method.
 
         Otherwise, formats the output using the specified output format string.
+
+        With '--all-applications', the JSON output is a list of the results of each application,
+        and the other outputs list the roles of every application.
         """  # noqa: E501
-        accounts_and_roles = self.get_accounts_and_roles()
+        if self.configuration.get("AWS_OKTA_ALL_APPLICATIONS", None):
+            all_accounts_and_roles = self.get_all_accounts_and_roles()
+            json_output = all_accounts_and_roles
+        else:
+            json_output = self.get_accounts_and_roles()
+            all_accounts_and_roles = [json_output]
 
         output = self.configuration.get("AWS_OKTA_OUTPUT", "json").lower()
         if output == "json":
-            sys.stdout.write(json.dumps(accounts_and_roles))
+            sys.stdout.write(json.dumps(json_output))
         else:
             output_format = self.configuration.get(
                 "AWS_OKTA_OUTPUT_FORMAT", "{account},{role}"
@@ -168,11 +205,12 @@ class GetRoles(Base):
                     '--role="{role}" --key="{account}-{role}"'
                 )
             # Generate formatted output for each role
-            formatted_roles = self.get_formatted_roles(
-                accounts_and_roles, output_format
-            )
-            for role in formatted_roles:
-                sys.stdout.write(role + "\n")
+            for accounts_and_roles in all_accounts_and_roles:
+                formatted_roles = self.get_formatted_roles(
+                    accounts_and_roles, output_format
+                )
+                for role in formatted_roles:
+                    sys.stdout.write(role + "\n")
 
     def get_formatted_roles(self, accounts_and_roles, output_format):
         """
@@ -253,14 +291,15 @@ class GetRoles(Base):
             dict: A dictionary of configuration variables.
         """  # noqa: E501
         configuration = {}
+        environ = self.get_environ()
 
         for param, var in CONFIG_MAP.items():
             if options.get(param, None):
                 configuration[var] = options[param]
 
             if var not in configuration:
-                if var in os.environ:
-                    configuration[var] = os.environ[var]
+                if var in environ:
+                    configuration[var] = environ[var]
                 else:
                     configuration[var] = None
 
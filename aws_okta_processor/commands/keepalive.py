@@ -0,0 +1,248 @@
+# pylint: disable=C0301
+"""
+Module for keeping cached Okta sessions alive.
+
+This module defines the 'KeepAlive' class, which refreshes the cached Okta sessions that expire
+within a threshold, so that they don't idle out between uses, for as long as a working day after
+they were created. Run it from a timer, or with --daemon to keep it running.
+
+Usage:
+    aws-okta-processor keepalive [options]
+
+Options:
+    -h --help                                                   Show this screen.
+    --version                                                   Show version.
+    -t <threshold_seconds>, --threshold=<threshold_seconds>     Refresh sessions expiring within this many seconds [default: 600].
+    -m <max_span_seconds>, --max-span=<max_span_seconds>        Stop refreshing sessions created this many seconds ago [default: 36000].
+    -d --daemon                                                 Keep running, checking the sessions every interval.
+    -i <interval_seconds>, --interval=<interval_seconds>        Seconds between checks with --daemon [default: 60].
+    -s --silent                                                 Run silently.
+"""  # noqa: E501
+
+from __future__ import print_function
+
+import datetime
+import sys
+import threading
+
+import dateutil  # type: ignore[import-untyped]
+
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.deadline import Deadline
+from aws_okta_processor.core.logins import get_login_label
+from aws_okta_processor.core.okta import UTC, Okta, get_cached_sessions
+from aws_okta_processor.core.tty import print_tty
+
+from .base import Base
+
+# Seconds a session refresh may take; it fails instead of prompting for a
+# login without a terminal
+REFRESH_DEADLINE = 60
+
+# Map command-line options to environment variable names.
+CONFIG_MAP = {
+    "--threshold": "AWS_OKTA_KEEPALIVE_THRESHOLD",
+    "--max-span": "AWS_OKTA_KEEPALIVE_MAX_SPAN",
+    "--daemon": "AWS_OKTA_KEEPALIVE_DAEMON",
+    "--interval": "AWS_OKTA_KEEPALIVE_INTERVAL",
+    "--silent": "AWS_OKTA_SILENT",
+}
+
+# Map environment variables to internal configuration keys.
+EXTEND_CONFIG_MAP = {
+    "AWS_OKTA_KEEPALIVE_THRESHOLD": "threshold",
+    "AWS_OKTA_KEEPALIVE_MAX_SPAN": "max-span",
+    "AWS_OKTA_KEEPALIVE_DAEMON": "daemon",
+    "AWS_OKTA_KEEPALIVE_INTERVAL": "interval",
+    "AWS_OKTA_SILENT": "silent",
+}
+
+
+def get_session_time(okta_session=None, key=None):
+    """
+    Reads a time of a cached Okta session.
+
+    Args:
+        okta_session (dict): The cached Okta session data.
+        key (str): The key of the time, like 'expiresAt' or 'createdAt'.
+
+    Returns:
+        datetime.datetime: The time, or None if the session has none.
+    """
+    value = okta_session.get(key, None)
+    if not value:
+        return None
+
+    return dateutil.parser.parse(value)
+
+
+def is_session_due(okta_session=None, threshold=None, max_span=None, now=None):
+    """
+    Tells whether a cached Okta session should be refreshed: it expires within
+    the threshold and was created less than the maximum span ago.
+
+    Args:
+        okta_session (dict): The cached Okta session data.
+        threshold (float): Seconds before expiry a session is refreshed.
+        max_span (float): Seconds after creation a session stops being refreshed.
+        now (datetime.datetime): The current time.
+
+    Returns:
+        bool: True if the session should be refreshed now.
+    """
+    expires_at = get_session_time(okta_session=okta_session, key="expiresAt")
+    if expires_at - now > datetime.timedelta(seconds=threshold):
+        return False
+
+    created_at = get_session_time(okta_session=okta_session, key="createdAt")
+    if created_at is None:
+        return False
+
+    return now - created_at < datetime.timedelta(seconds=max_span)
+
+
+class KeepAlive(Base):
+    """
+    Refreshes the cached Okta sessions shortly before they expire, until the
+    end of the working day they were created on, so that logging in with a
+    password and MFA is needed once a day.
+
+    Inherits from:
+        Base: The base class that provides common functionality for commands.
+    """
+
+    def __init__(self, options, *args, **kwargs):
+        super().__init__(options, *args, **kwargs)
+        self.stopped = threading.Event()
+
+    def refresh_sessions(self):
+        """
+        Refreshes every cached Okta session that is due.
+
+        Returns:
+            list: The labels of the sessions that failed to refresh.
+        """
+        threshold = float(self.configuration["AWS_OKTA_KEEPALIVE_THRESHOLD"])
+        max_span = float(self.configuration["AWS_OKTA_KEEPALIVE_MAX_SPAN"])
+        silent = self.configuration["AWS_OKTA_SILENT"]
+        failed = []
+
+        sessions = get_cached_sessions(cache_directory=Okta.get_cache_directory())
+        for user_name, organization in sessions:
+            label = get_login_label(user_name=user_name, organization=organization)
+            try:
+                expires_at = self.refresh_session(
+                    user_name=user_name,
+                    organization=organization,
+                    threshold=threshold,
+                    max_span=max_span,
+                )
+            except (SystemExit, Exception):  # pylint: disable=W0718
+                print_tty(f"ERROR: Failed to refresh the Okta session of {label}!")
+                failed.append(label)
+                continue
+
+            if expires_at is None:
+                print_tty(f"Okta session of {label} is not due.", silent=silent)
+            else:
+                print_tty(
+                    f"Refreshed Okta session of {label} until {expires_at}.",
+                    silent=silent,
+                )
+
+        return failed
+
+    def refresh_session(
+        self, user_name=None, organization=None, threshold=None, max_span=None
+    ):
+        """
+        Refreshes the cached Okta session of a user and organization if it is due.
+
+        Args:
+            user_name (str): The Okta user name.
+            organization (str): The Okta organization domain.
+            threshold (float): Seconds before expiry a session is refreshed.
+            max_span (float): Seconds after creation a session stops being refreshed.
+
+        Returns:
+            str: The new expiry of the session, or None if it was not due.
+
+        Exits:
+            If Okta did not extend the session.
+        """  # noqa: E501
+        with hooks.use_deadline(Deadline(seconds=REFRESH_DEADLINE)):
+            # The cached session is read but not refreshed yet
+            okta = Okta(
+                user_name=user_name,
+                organization=organization,
+                silent=self.configuration["AWS_OKTA_SILENT"],
+                defer_refresh=True,
+            )
+
+            okta_session = okta.deferred_okta_session
+            if okta_session is None or not is_session_due(
+                okta_session=okta_session,
+                threshold=threshold,
+                max_span=max_span,
+                now=datetime.datetime.now(UTC()),
+            ):
+                return None
+
+            expires_at = okta_session["expiresAt"]
+            okta.refresh_deferred_okta_session()
+
+        okta_session = okta.get_okta_session_from_cache_file()
+        if get_session_time(okta_session=okta_session, key="expiresAt") <= (
+            dateutil.parser.parse(expires_at)
+        ):
+            # Okta rejected the refresh, as for a revoked session, and the
+            # error was printed
+            sys.exit(1)
+
+        return okta_session["expiresAt"]
+
+    def run(self):
+        """
+        Main entry point for the 'keepalive' command.
+
+        Refreshes the sessions that are due once, exiting with an error status
+        if any failed, or every interval until stopped with --daemon.
+        """
+        if not self.configuration["AWS_OKTA_KEEPALIVE_DAEMON"]:
+            if self.refresh_sessions():
+                sys.exit(1)
+            return
+
+        interval = float(self.configuration["AWS_OKTA_KEEPALIVE_INTERVAL"])
+        try:
+            while True:
+                self.refresh_sessions()
+                if self.stopped.wait(interval):
+                    return
+        except KeyboardInterrupt:
+            return
+
+    def get_configuration(self, options=None):
+        """
+        Builds the configuration dictionary from options and environment variables.
+
+        Args:
+            options (dict, optional): Command-line options parsed by docopt.
+
+        Returns:
+            dict: A configuration dictionary.
+        """
+        configuration = {}
+        environ = self.get_environ()
+
+        for param, var in CONFIG_MAP.items():
+            if options.get(param, None):
+                configuration[var] = options[param]
+
+            if var not in configuration:
+                if var in environ:
+                    configuration[var] = environ[var]
+                else:
+                    configuration[var] = None
+
+        return self.extend_configuration(configuration, "keepalive", EXTEND_CONFIG_MAP)
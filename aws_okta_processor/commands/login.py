@@ -0,0 +1,177 @@
+# pylint: disable=C0301
+"""
+Module for logging in to several Okta organizations at once.
+
+This module defines the 'Login' class, which creates or refreshes the cached Okta session of
+each user and organization given, concurrently. MFA and password prompts are shown one at a
+time, labelled with the login they are for, while the other logins go on in the background.
+
+Usage:
+    aws-okta-processor login [options] [<login>...]
+
+Arguments:
+    <login>                                                     Okta user and organization, like jdoe@mycompany.okta.com.
+                                                                    Read from AWS_OKTA_LOGINS or 'logins' if none is given.
+
+Options:
+    -h --help                                                   Show this screen.
+    --version                                                   Show version.
+    --no-okta-cache                                             Log in again even if a session is cached.
+    -f <factor>, --factor=<factor>                              Factor type for MFA.
+    --remember-device                                           Ask Okta to skip MFA for this device next time.
+    -w <workers>, --workers=<workers>                           Number of concurrent logins [default: 4].
+    -s --silent                                                 Run silently.
+"""  # noqa: E501
+
+from __future__ import print_function
+
+import sys
+
+from collections import OrderedDict
+
+from botocore.credentials import JSONFileCache  # type: ignore[import-untyped]
+from docopt import docopt  # type: ignore[import-untyped]
+
+from aws_okta_processor.core.fetcher import SAMLFetcher
+from aws_okta_processor.core.logins import get_login_label, login_all, parse_login
+from aws_okta_processor.core.tty import print_tty
+
+from . import authenticate
+from .base import Base
+
+# Map command-line options to environment variable names.
+CONFIG_MAP = {
+    "<login>": "AWS_OKTA_LOGINS",
+    "--no-okta-cache": "AWS_OKTA_NO_OKTA_CACHE",
+    "--factor": "AWS_OKTA_FACTOR",
+    "--remember-device": "AWS_OKTA_REMEMBER_DEVICE",
+    "--workers": "AWS_OKTA_LOGIN_WORKERS",
+    "--silent": "AWS_OKTA_SILENT",
+}
+
+# Map environment variables to internal configuration keys.
+EXTEND_CONFIG_MAP = {
+    "AWS_OKTA_LOGINS": "logins",
+    "AWS_OKTA_NO_OKTA_CACHE": "no-okta-cache",
+    "AWS_OKTA_FACTOR": "factor",
+    "AWS_OKTA_REMEMBER_DEVICE": "remember-device",
+    "AWS_OKTA_LOGIN_WORKERS": "workers",
+    "AWS_OKTA_SILENT": "silent",
+}
+
+
+class Login(Base):
+    """
+    Logs in to several Okta organizations, or as several users, concurrently.
+
+    Each login uses the configuration of the 'authenticate' command for its
+    user and organization, and its own session cache.
+
+    Inherits from:
+        Base: The base class that provides common functionality for commands.
+    """
+
+    def get_fetchers(self):
+        """
+        Creates a fetcher for each login, configured like 'authenticate'.
+
+        Returns:
+            OrderedDict: A mapping of login labels to 'SAMLFetcher' instances.
+        """
+        fetchers = OrderedDict()
+        cache = JSONFileCache()
+
+        for login in self.configuration["AWS_OKTA_LOGINS"]:
+            try:
+                user_name, organization = parse_login(login=login)
+            except ValueError as error:
+                print_tty(f"ERROR: {error}")
+                sys.exit(1)
+
+            argv = ["authenticate", "--user", user_name, "--organization", organization]
+            if self.configuration["AWS_OKTA_FACTOR"]:
+                argv += ["--factor", self.configuration["AWS_OKTA_FACTOR"]]
+            if self.configuration["AWS_OKTA_REMEMBER_DEVICE"]:
+                argv += ["--remember-device"]
+            if self.configuration["AWS_OKTA_SILENT"]:
+                argv += ["--silent"]
+
+            command = authenticate.Authenticate(docopt(authenticate.__doc__, argv=argv))
+            label = get_login_label(user_name=user_name, organization=organization)
+            fetchers[label] = SAMLFetcher(command, cache=cache)
+
+        return fetchers
+
+    def run(self):
+        """
+        Main entry point for the 'login' command.
+
+        Logs in to every organization and exits with an error status if any
+        of the logins failed.
+        """
+        fetchers = self.get_fetchers()
+        if not fetchers:
+            print_tty("ERROR: No logins were given!")
+            sys.exit(1)
+
+        no_okta_cache = bool(self.configuration["AWS_OKTA_NO_OKTA_CACHE"])
+
+        logins = OrderedDict(
+            (
+                label,
+                lambda fetcher=fetcher: fetcher.create_okta(
+                    no_okta_cache=no_okta_cache
+                ),
+            )
+            for label, fetcher in fetchers.items()
+        )
+        workers = max(1, int(self.configuration["AWS_OKTA_LOGIN_WORKERS"] or 1))
+
+        failed = False
+        for label, okta in login_all(logins=logins, workers=workers).items():
+            if okta is None:
+                print_tty(f"ERROR: Failed to log in to {label}!")
+                failed = True
+            else:
+                print_tty(
+                    f"Logged in to {label}.",
+                    silent=self.configuration["AWS_OKTA_SILENT"],
+                )
+
+        if failed:
+            sys.exit(1)
+
+    def get_configuration(self, options=None):
+        """
+        Builds the configuration dictionary from options and environment variables.
+
+        Args:
+            options (dict, optional): Command-line options parsed by docopt.
+
+        Returns:
+            dict: A configuration dictionary.
+        """
+        configuration = {}
+        environ = self.get_environ()
+
+        for param, var in CONFIG_MAP.items():
+            if options.get(param, None):
+                configuration[var] = options[param]
+
+            if var not in configuration:
+                if var in environ:
+                    configuration[var] = environ[var]
+                else:
+                    configuration[var] = None
+
+        configuration = self.extend_configuration(
+            configuration, "login", EXTEND_CONFIG_MAP
+        )
+
+        logins = configuration["AWS_OKTA_LOGINS"] or []
+        if isinstance(logins, str):
+            # A whitespace separated list in the environment or a dotfile
+            logins = logins.split()
+        configuration["AWS_OKTA_LOGINS"] = logins
+
+        return configuration
@@ -0,0 +1,287 @@
+# pylint: disable=C0301
+"""
+Module for serving AWS credentials over the container credentials protocol.
+
+This module defines the 'Serve' class, which answers the HTTP requests AWS SDKs send to
+AWS_CONTAINER_CREDENTIALS_FULL_URI with the credentials of the aws-okta-processor profiles
+configured in the AWS config file, and refreshes them before they expire.
+
+Usage:
+    aws-okta-processor serve [options]
+
+Options:
+    -h --help                                                   Show this screen.
+    --version                                                   Show version.
+    -c <config_file>, --config=<config_file>                    AWS config file.
+    -H <host>, --host=<host>                                    Address to listen on (127.0.0.1).
+    -p <port>, --port=<port>                                    Port to listen on (51679).
+    -t <token>, --token=<token>                                 Authorization token clients must send (generated).
+    -P <profile>, --profile=<profile>                           Profile served at the root path.
+    -i <interval_seconds>, --interval=<interval_seconds>        Seconds between proactive refresh checks [default: 60].
+    -s --silent                                                 Run silently.
+"""  # noqa: E501
+
+from __future__ import print_function
+
+import hmac
+import json
+import secrets
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from botocore.credentials import JSONFileCache  # type: ignore[import-untyped]
+
+from aws_okta_processor.core.pool import CredentialPool
+from aws_okta_processor.core.tty import print_tty
+
+from . import authenticate
+from .base import Base
+from .warm import read_profile_options
+
+# Address and port listened on when neither option nor environment sets them
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 51679
+
+# Path prefix selecting a profile by name
+PROFILES_PATH = "/profiles/"
+
+# Map command-line options to environment variable names.
+CONFIG_MAP = {
+    "--config": "AWS_CONFIG_FILE",
+    "--host": "AWS_OKTA_SERVE_HOST",
+    "--port": "AWS_OKTA_SERVE_PORT",
+    "--token": "AWS_OKTA_SERVE_TOKEN",
+    "--profile": "AWS_OKTA_SERVE_PROFILE",
+    "--interval": "AWS_OKTA_SERVE_INTERVAL",
+    "--silent": "AWS_OKTA_SILENT",
+}
+
+# Map environment variables to internal configuration keys.
+EXTEND_CONFIG_MAP = {
+    "AWS_CONFIG_FILE": "config",
+    "AWS_OKTA_SERVE_HOST": "host",
+    "AWS_OKTA_SERVE_PORT": "port",
+    "AWS_OKTA_SERVE_TOKEN": "token",
+    "AWS_OKTA_SERVE_PROFILE": "profile",
+    "AWS_OKTA_SERVE_INTERVAL": "interval",
+    "AWS_OKTA_SILENT": "silent",
+}
+
+
+class ServeRequestHandler(BaseHTTPRequestHandler):
+    """Answers container credentials requests."""
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Replies with the credentials of the requested profile."""
+        status, body = self.server.serve.handle_request(
+            path=self.path, authorization=self.headers.get("Authorization", None)
+        )
+        payload = json.dumps(body).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """Keeps request logs off the terminal used for prompts."""
+
+
+class Serve(Base):
+    """
+    Serves the credentials of aws-okta-processor profiles to AWS SDKs until
+    interrupted.
+
+    The profile is picked by the request path, '/profiles/<name>', or the
+    configured default profile for '/'. All clients share one credential pool,
+    so any number of processes wait on a single refresh per role.
+
+    Inherits from:
+        Base: The base class that provides common functionality for commands.
+    """
+
+    def __init__(self, options, *args, **kwargs):
+        super().__init__(options, *args, **kwargs)
+        self.pool = CredentialPool(cache=JSONFileCache())
+        self.profiles = read_profile_options(
+            config_file=self.configuration["AWS_CONFIG_FILE"]
+        )
+        self.token = (
+            self.configuration["AWS_OKTA_SERVE_TOKEN"] or secrets.token_urlsafe(32)
+        )
+        self.served = set()
+        self.served_lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def get_profile(self, path=None):
+        """
+        Returns the name of the profile selected by a request path.
+
+        Args:
+            path (str): The request path.
+
+        Returns:
+            str or None: The profile name, or None if the path selects none.
+        """
+        path = path.split("?", 1)[0]
+
+        if path in ["", "/"]:
+            return self.configuration["AWS_OKTA_SERVE_PROFILE"]
+
+        if path.startswith(PROFILES_PATH):
+            return unquote(path[len(PROFILES_PATH) :])
+
+        return None
+
+    def get_authenticate(self, profile=None):
+        """
+        Builds the 'authenticate' command of a profile.
+
+        A command is built for every fetch, since a fetch clears the user and
+        password from its command's configuration, which the cache keys of
+        the credentials and of the Okta session are made of.
+
+        Args:
+            profile (str): The profile name.
+
+        Returns:
+            Authenticate: The command.
+        """
+        return authenticate.Authenticate(self.profiles[profile])
+
+    def handle_request(self, path=None, authorization=None):
+        """
+        Fetches the credentials of the profile selected by a request.
+
+        Args:
+            path (str): The request path.
+            authorization (str): The Authorization header of the request.
+
+        Returns:
+            tuple: The HTTP status and the JSON body of the reply.
+        """
+        if authorization is None or not hmac.compare_digest(
+            authorization.encode(), self.token.encode()
+        ):
+            return 401, {"Code": "AccessDenied", "Message": "Invalid token."}
+
+        profile = self.get_profile(path=path)
+        if profile not in self.profiles:
+            return 404, {"Code": "NotFound", "Message": "Unknown profile."}
+
+        try:
+            credentials = self.pool.fetch_credentials(
+                authenticate=self.get_authenticate(profile=profile)
+            )
+        except (SystemExit, Exception):  # pylint: disable=W0718
+            print_tty(f"ERROR: Failed to fetch credentials for profile {profile}!")
+            return 500, {
+                "Code": "CredentialsError",
+                "Message": f"Failed to fetch credentials for profile {profile}.",
+            }
+
+        with self.served_lock:
+            self.served.add(profile)
+
+        return 200, {
+            "AccessKeyId": credentials["AccessKeyId"],
+            "SecretAccessKey": credentials["SecretAccessKey"],
+            "Token": credentials["SessionToken"],
+            "Expiration": credentials["Expiration"],
+        }
+
+    def refresh(self):
+        """
+        Refreshes the credentials of every profile served so far that are
+        within their refresh window.
+        """
+        with self.served_lock:
+            served = sorted(self.served)
+
+        for profile in served:
+            try:
+                self.pool.fetch_credentials(
+                    authenticate=self.get_authenticate(profile=profile)
+                )
+            except (SystemExit, Exception):  # pylint: disable=W0718
+                print_tty(f"ERROR: Failed to refresh profile {profile}!")
+
+    def refresh_forever(self):
+        """Refreshes the served profiles at the configured interval until stopped."""
+        interval = int(self.configuration["AWS_OKTA_SERVE_INTERVAL"])
+
+        while not self.stopped.wait(interval):
+            self.refresh()
+
+    def create_server(self):
+        """
+        Creates the HTTP server.
+
+        Returns:
+            http.server.ThreadingHTTPServer: The server.
+        """
+        server = ThreadingHTTPServer(
+            (
+                self.configuration["AWS_OKTA_SERVE_HOST"] or DEFAULT_HOST,
+                int(self.configuration["AWS_OKTA_SERVE_PORT"] or DEFAULT_PORT),
+            ),
+            ServeRequestHandler,
+        )
+        server.daemon_threads = True
+        server.serve = self
+
+        return server
+
+    def run(self):
+        """
+        Main entry point for the 'serve' command.
+
+        Prints the environment SDK clients need and serves credentials until
+        interrupted.
+        """
+        server = self.create_server()
+        host, port = server.server_address[:2]
+
+        print(f"export AWS_CONTAINER_CREDENTIALS_FULL_URI='http://{host}:{port}/'")
+        print(f"export AWS_CONTAINER_AUTHORIZATION_TOKEN='{self.token}'", flush=True)
+        print_tty(
+            f"Serving {len(self.profiles)} profiles on http://{host}:{port}/",
+            silent=self.configuration["AWS_OKTA_SILENT"],
+        )
+
+        refresher = threading.Thread(target=self.refresh_forever, daemon=True)
+        refresher.start()
+
+        try:
+            server.serve_forever()
+        finally:
+            self.stopped.set()
+            server.server_close()
+
+    def get_configuration(self, options=None):
+        """
+        Builds the configuration dictionary from options and environment variables.
+
+        Args:
+            options (dict, optional): Command-line options parsed by docopt.
+
+        Returns:
+            dict: A configuration dictionary.
+        """
+        configuration = {}
+        environ = self.get_environ()
+
+        for param, var in CONFIG_MAP.items():
+            if options.get(param, None):
+                configuration[var] = options[param]
+
+            if var not in configuration:
+                if var in environ:
+                    configuration[var] = environ[var]
+                else:
+                    configuration[var] = None
+
+        return self.extend_configuration(configuration, "serve", EXTEND_CONFIG_MAP)
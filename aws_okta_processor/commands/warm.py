@@ -0,0 +1,383 @@
+# pylint: disable=C0301
+"""
+Module for pre-refreshing the AWS credentials of configured profiles.
+
+This module defines the 'Warm' class, which reads the AWS config file, finds every profile
+whose credential_process runs 'aws-okta-processor authenticate' and refreshes the cached
+credentials that expire within a threshold.
+
+Usage:
+    aws-okta-processor warm [options]
+
+Options:
+    -h --help                                                   Show this screen.
+    --version                                                   Show version.
+    -c <config_file>, --config=<config_file>                    AWS config file.
+    -t <threshold_seconds>, --threshold=<threshold_seconds>     Refresh credentials expiring within this many seconds [default: 1800].
+    -w <workers>, --workers=<workers>                           Number of concurrent refreshes [default: 4].
+    -P <profile>, --profile=<profile>                           Profile name filter (uses wildcards).
+    -s --silent                                                 Run silently.
+"""  # noqa: E501
+
+from __future__ import print_function
+
+import configparser
+import copy
+import functools
+import os
+import shlex
+import sys
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+
+from botocore.credentials import JSONFileCache  # type: ignore[import-untyped]
+from docopt import docopt, DocoptExit  # type: ignore[import-untyped]
+
+from aws_okta_processor.core.fetcher import SAMLFetcher
+from aws_okta_processor.core.logins import get_login_label, login_all
+from aws_okta_processor.core.tty import print_tty
+
+from . import authenticate
+from .base import Base
+
+# Name of the executable and command expected in credential_process
+PROCESSOR_COMMAND = "aws-okta-processor"
+AUTHENTICATE_COMMAND = "authenticate"
+
+# AWS config file used when neither --config nor AWS_CONFIG_FILE is set
+DEFAULT_CONFIG_FILE = "~/.aws/config"
+
+# Map command-line options to environment variable names.
+CONFIG_MAP = {
+    "--config": "AWS_CONFIG_FILE",
+    "--threshold": "AWS_OKTA_WARM_THRESHOLD",
+    "--workers": "AWS_OKTA_WARM_WORKERS",
+    "--profile": "AWS_OKTA_WARM_PROFILE",
+    "--silent": "AWS_OKTA_SILENT",
+}
+
+# Map environment variables to internal configuration keys.
+EXTEND_CONFIG_MAP = {
+    "AWS_CONFIG_FILE": "config",
+    "AWS_OKTA_WARM_THRESHOLD": "threshold",
+    "AWS_OKTA_WARM_WORKERS": "workers",
+    "AWS_OKTA_WARM_PROFILE": "profile",
+    "AWS_OKTA_SILENT": "silent",
+}
+
+
+def get_authenticate_args(credential_process=None):
+    """
+    Extracts the 'authenticate' arguments from a credential_process value.
+
+    Args:
+        credential_process (str): The credential_process value of a profile.
+
+    Returns:
+        list or None: The arguments following 'aws-okta-processor authenticate',
+        or None if the value does not run that command.
+    """
+    try:
+        tokens = shlex.split(credential_process)
+    except ValueError:
+        return None
+
+    for index, token in enumerate(tokens[:-1]):
+        executable = os.path.basename(token)
+        if executable.startswith(PROCESSOR_COMMAND) and (
+            tokens[index + 1] == AUTHENTICATE_COMMAND
+        ):
+            return tokens[index + 2 :]
+
+    return None
+
+
+def read_profile_options(config_file=None, profile_filter=None):
+    """
+    Reads an AWS config file and parses the 'authenticate' options of every
+    profile backed by aws-okta-processor.
+
+    Args:
+        config_file (str): The AWS config file, '~/.aws/config' by default.
+        profile_filter (str): An optional profile name filter (uses wildcards).
+
+    Returns:
+        OrderedDict: A mapping of profile names to options parsed by docopt.
+    """
+    profiles = OrderedDict()
+    config_file = os.path.expanduser(config_file or DEFAULT_CONFIG_FILE)
+
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(config_file)
+
+    for section in config.sections():
+        profile = section
+        if profile.startswith("profile "):
+            profile = profile[len("profile ") :]
+
+        if profile_filter and not fnmatch(profile, profile_filter):
+            continue
+
+        credential_process = config[section].get("credential_process", None)
+        if not credential_process:
+            continue
+
+        args = get_authenticate_args(credential_process=credential_process)
+        if args is None:
+            continue
+
+        try:
+            options = docopt(authenticate.__doc__, argv=[AUTHENTICATE_COMMAND] + args)
+        except DocoptExit:
+            print_tty(f"WARNING: Skipping profile {profile}, invalid options.")
+            continue
+
+        profiles[profile] = options
+
+    return profiles
+
+
+def read_profiles(config_file=None, profile_filter=None):
+    """
+    Reads an AWS config file and builds an 'Authenticate' command for every
+    profile backed by aws-okta-processor.
+
+    Args:
+        config_file (str): The AWS config file, '~/.aws/config' by default.
+        profile_filter (str): An optional profile name filter (uses wildcards).
+
+    Returns:
+        OrderedDict: A mapping of profile names to 'Authenticate' instances.
+    """
+    return OrderedDict(
+        (profile, authenticate.Authenticate(options))
+        for profile, options in read_profile_options(
+            config_file=config_file, profile_filter=profile_filter
+        ).items()
+    )
+
+
+class Warm(Base):
+    """
+    Refreshes the cached AWS credentials of every aws-okta-processor profile
+    that will expire within the configured threshold.
+
+    Okta sessions are shared per user and organization, and one SAML assertion
+    is fetched per application; the role assumptions then run concurrently.
+
+    Inherits from:
+        Base: The base class that provides common functionality for commands.
+    """
+
+    def get_profiles(self):
+        """
+        Reads the AWS config file and builds an 'Authenticate' command for every
+        profile backed by aws-okta-processor.
+
+        Returns:
+            OrderedDict: A mapping of profile names to 'Authenticate' instances.
+        """
+        return read_profiles(
+            config_file=self.configuration["AWS_CONFIG_FILE"],
+            profile_filter=self.configuration["AWS_OKTA_WARM_PROFILE"],
+        )
+
+    def get_stale_fetchers(self, profiles=None):
+        """
+        Creates a fetcher for each profile whose cached credentials expire
+        within the threshold.
+
+        Args:
+            profiles (OrderedDict): A mapping of profile names to 'Authenticate' instances.
+
+        Returns:
+            OrderedDict: A mapping of profile names to 'SAMLFetcher' instances.
+        """  # noqa: E501
+        fetchers = OrderedDict()
+        cache = JSONFileCache()
+        threshold = int(self.configuration["AWS_OKTA_WARM_THRESHOLD"])
+
+        for profile, command in profiles.items():
+            fetcher = SAMLFetcher(command, cache=cache)
+            if fetcher.expires_within(threshold):
+                fetchers[profile] = fetcher
+            else:
+                print_tty(
+                    f"Profile {profile} is fresh.",
+                    silent=self.configuration["AWS_OKTA_SILENT"],
+                )
+
+        return fetchers
+
+    def share_app_roles(self, profiles=None, fetchers=None):
+        """
+        Authenticates once per user and organization and fetches one SAML
+        assertion per application, handing both to every profile in the group.
+
+        Okta logins run concurrently, prompting one at a time, and so are the
+        SAML assertions of different applications.
+
+        Args:
+            profiles (OrderedDict): A mapping of profile names to 'Authenticate' instances.
+            fetchers (OrderedDict): A mapping of profile names to stale 'SAMLFetcher' instances.
+
+        Returns:
+            OrderedDict: A mapping of profile names to fetchers whose assertion is ready.
+        """  # noqa: E501
+        applications = OrderedDict()
+        cache = JSONFileCache()
+
+        for profile in fetchers:
+            configuration = profiles[profile].configuration
+            application_key = (
+                configuration["AWS_OKTA_ORGANIZATION"],
+                configuration["AWS_OKTA_USER"],
+                configuration["AWS_OKTA_APPLICATION"],
+            )
+            applications.setdefault(application_key, []).append(profile)
+
+        logins = OrderedDict()
+        leaders = {}
+        labels = {}
+        for application_key, group in applications.items():
+            organization, user_name, _ = application_key
+            label = get_login_label(user_name=user_name, organization=organization)
+            labels[application_key] = label
+            if label in logins:
+                continue
+
+            configuration = profiles[group[0]].configuration
+            logins[label] = functools.partial(
+                fetchers[group[0]].create_okta,
+                no_okta_cache=configuration["AWS_OKTA_NO_OKTA_CACHE"],
+            )
+            leaders[label] = group[0]
+
+        sessions = login_all(logins=logins, workers=self.get_workers())
+        for label, okta in sessions.items():
+            if okta is None:
+                print_tty(
+                    f"ERROR: Failed to authenticate for profile {leaders[label]}!"
+                )
+
+        def get_app_roles(application_key):
+            group = applications[application_key]
+            okta = sessions[labels[application_key]]
+
+            if okta is None:
+                return {}
+
+            # _get_app_roles() clears the user and password of its command's
+            # configuration, which the leader's credentials are cached under
+            command = copy.copy(profiles[group[0]])
+            command.configuration = dict(command.configuration)
+            leader = SAMLFetcher(command, cache=cache, okta=okta)
+
+            try:
+                app_roles = leader._get_app_roles()  # pylint: disable=W0212
+            except SystemExit:
+                print_tty(f"ERROR: Failed to fetch SAML assertion for {group[0]}!")
+                return {}
+
+            ready = OrderedDict()
+            for profile in group:
+                ready[profile] = SAMLFetcher(
+                    profiles[profile],
+                    cache=cache,
+                    okta=leader.okta,
+                    app_roles=app_roles,
+                )
+
+            return ready
+
+        ready = OrderedDict()
+        with ThreadPoolExecutor(max_workers=self.get_workers()) as executor:
+            for group in executor.map(get_app_roles, applications):
+                ready.update(group)
+
+        return ready
+
+    def refresh(self, fetchers=None):
+        """
+        Refreshes the credentials of every fetcher concurrently.
+
+        Args:
+            fetchers (OrderedDict): A mapping of profile names to 'SAMLFetcher' instances.
+
+        Returns:
+            list: The names of the profiles that failed to refresh.
+        """  # noqa: E501
+
+        def refresh_profile(profile):
+            try:
+                fetchers[profile].refresh()
+            except (SystemExit, Exception):  # pylint: disable=W0718
+                print_tty(f"ERROR: Failed to refresh profile {profile}!")
+                return profile
+
+            print_tty(
+                f"Refreshed profile {profile}.",
+                silent=self.configuration["AWS_OKTA_SILENT"],
+            )
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.get_workers()) as executor:
+            results = executor.map(refresh_profile, fetchers.keys())
+
+        return [profile for profile in results if profile is not None]
+
+    def get_workers(self):
+        """
+        Retrieves the number of concurrent workers from the configuration.
+
+        Returns:
+            int: The number of workers, at least one.
+        """
+        return max(1, int(self.configuration["AWS_OKTA_WARM_WORKERS"]))
+
+    def run(self):
+        """
+        Main entry point for the 'warm' command.
+
+        Refreshes every stale aws-okta-processor profile and exits with an error
+        status if any of them could not be refreshed.
+        """
+        profiles = self.get_profiles()
+        fetchers = self.get_stale_fetchers(profiles=profiles)
+
+        if not fetchers:
+            return
+
+        ready = self.share_app_roles(profiles=profiles, fetchers=fetchers)
+        failed = self.refresh(fetchers=ready)
+        failed += [profile for profile in fetchers if profile not in ready]
+
+        if failed:
+            sys.exit(1)
+
+    def get_configuration(self, options=None):
+        """
+        Builds the configuration dictionary from options and environment variables.
+
+        Args:
+            options (dict, optional): Command-line options parsed by docopt.
+
+        Returns:
+            dict: A configuration dictionary.
+        """
+        configuration = {}
+        environ = self.get_environ()
+
+        for param, var in CONFIG_MAP.items():
+            if options.get(param, None):
+                configuration[var] = options[param]
+
+            if var not in configuration:
+                if var in environ:
+                    configuration[var] = environ[var]
+                else:
+                    configuration[var] = None
+
+        return self.extend_configuration(configuration, "warm", EXTEND_CONFIG_MAP)
@@ -0,0 +1,268 @@
+"""
+This module bounds the time an authentication may take.
+
+A 'Deadline' is installed for the current thread with hooks.use_deadline(),
+and carried into the threads of its steps by hooks.bind_hooks(). Requests get
+the time left as their timeout, waits that would outlast it fail at once, and
+prompts fail instead of waiting when there is no terminal to answer them.
+
+The time is divided across the phases of an authentication: a phase may be
+given a share of the time left when it starts, so that it leaves time for the
+phases after it. When the deadline is exceeded, the error names the phase that
+was running and how long each phase took.
+"""
+
+import contextlib
+import threading
+import time
+
+from collections import OrderedDict
+
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.tty import print_tty
+
+# Share of the time left a phase may use; logging in to Okta, which includes
+# MFA, leaves time for the SAML assertion, the AWS sign-in page and STS
+PHASE_SHARES = {"okta_login": 0.7}
+
+
+class DeadlineError(SystemExit):
+    """
+    Raised when the deadline of an authentication is exceeded.
+
+    Attributes:
+        message (str): The error message.
+        phase (str): The phase that was running, if any.
+    """
+
+    def __init__(self, message=None, phase=None):
+        super().__init__(1)
+        self.message = message
+        self.phase = phase
+
+
+class Deadline:
+    """
+    The time budget of an authentication, divided across its phases.
+
+    Attributes:
+        seconds (float): The budget in seconds.
+        durations (OrderedDict): Mapping of phases to the seconds they took.
+    """
+
+    def __init__(self, seconds=None):
+        """
+        Starts the budget.
+
+        Args:
+            seconds (float): The budget in seconds.
+        """
+        self.seconds = float(seconds)
+        self.durations = OrderedDict()
+        self._started = time.monotonic()
+        self._end = self._started + self.seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def get_phases(self):
+        """Returns the phases running in the current thread, with their ends."""
+        if not hasattr(self._local, "phases"):
+            self._local.phases = []
+        return self._local.phases
+
+    @contextlib.contextmanager
+    def phase(self, name=None):
+        """
+        Runs a block as a phase, limited to its share of the time left.
+
+        Args:
+            name (str): The name of the phase.
+        """
+        phases = self.get_phases()
+        started = time.monotonic()
+        end = phases[-1][1] if phases else self._end
+        share = PHASE_SHARES.get(name, None)
+        if share is not None:
+            end = min(end, started + share * (end - started))
+
+        phases.append((name, end))
+        try:
+            yield
+        finally:
+            phases.pop()
+            with self._lock:
+                self.durations[name] = (
+                    self.durations.get(name, 0) + time.monotonic() - started
+                )
+
+    def get_remaining(self):
+        """
+        Returns the time left to the current phase, or to the deadline.
+
+        Returns:
+            float: The seconds left, negative once exceeded.
+        """
+        phases = self.get_phases()
+        end = phases[-1][1] if phases else self._end
+        return end - time.monotonic()
+
+    def get_timeout(self, timeout=None):
+        """
+        Limits the timeout of a request to the time left.
+
+        Args:
+            timeout (float or tuple): The timeout of the request, or its
+                connect and read timeouts.
+
+        Returns:
+            float or tuple: The timeout, no longer than the time left.
+
+        Raises:
+            DeadlineError: If no time is left.
+        """
+        remaining = self.get_remaining()
+        if remaining <= 0:
+            self.expire()
+
+        if timeout is None:
+            return remaining
+
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) for value in timeout)
+
+        return min(timeout, remaining)
+
+    def check(self, wait=0):
+        """
+        Fails if a wait would outlast the time left.
+
+        Args:
+            wait (float): The seconds about to be waited.
+
+        Raises:
+            DeadlineError: If the time left is shorter than the wait.
+        """
+        if self.get_remaining() <= wait:
+            self.expire()
+
+    def expire(self):
+        """
+        Reports the phase that exceeded the deadline and how long each took.
+
+        Raises:
+            DeadlineError: Always.
+        """
+        phases = self.get_phases()
+        phase = phases[-1][0] if phases else None
+        elapsed = time.monotonic() - self._started
+
+        message = f"Error: Deadline of {self.seconds:g}s exceeded"
+        if phase is not None:
+            message += f" in {phase}"
+        message += f" after {elapsed:.1f}s"
+
+        with self._lock:
+            durations = ", ".join(
+                f"{name} {duration:.1f}s" for name, duration in self.durations.items()
+            )
+        if durations:
+            message += f" (done: {durations})"
+
+        print_tty(message)
+        raise DeadlineError(message=message, phase=phase)
+
+    def fail_prompt(self):
+        """
+        Fails instead of prompting, when no terminal can answer the prompt.
+
+        Raises:
+            DeadlineError: Always.
+        """
+        message = "Error: Input is needed, but there is no terminal to prompt on"
+        print_tty(message)
+        raise DeadlineError(message=message)
+
+
+def phase(name=None):
+    """
+    Runs a block as a phase of the current deadline, if any.
+
+    Args:
+        name (str): The name of the phase.
+
+    Returns:
+        A context manager.
+    """
+    deadline = hooks.get_deadline()
+    if deadline is None:
+        return contextlib.nullcontext()
+
+    return deadline.phase(name=name)
+
+
+def get_timeout(timeout=None):
+    """
+    Limits the timeout of a request to the time left of the current deadline.
+
+    Args:
+        timeout (float or tuple): The timeout without a deadline.
+
+    Returns:
+        float or tuple: The timeout to use.
+    """
+    deadline = hooks.get_deadline()
+    if deadline is None:
+        return timeout
+
+    return deadline.get_timeout(timeout=timeout)
+
+
+def check_deadline(wait=0):
+    """
+    Fails if a wait would outlast the current deadline, if any.
+
+    Args:
+        wait (float): The seconds about to be waited.
+    """
+    deadline = hooks.get_deadline()
+    if deadline is not None:
+        deadline.check(wait=wait)
+
+
+def call_within_deadline(function, *args, **kwargs):
+    """
+    Calls a function that cannot be given a timeout, giving up on it once
+    the current deadline is exceeded.
+
+    Args:
+        function (callable): The function.
+        *args: Its arguments.
+        **kwargs: Its keyword arguments.
+
+    Returns:
+        The result of the function.
+    """
+    deadline = hooks.get_deadline()
+    if deadline is None:
+        return function(*args, **kwargs)
+
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = function(*args, **kwargs)
+        except BaseException as error:  # pylint: disable=W0718
+            outcome["error"] = error
+
+    thread = threading.Thread(target=hooks.bind_hooks(run), daemon=True)
+    thread.start()
+    thread.join(max(0, deadline.get_remaining()))
+
+    if thread.is_alive():
+        # The call is left to finish on its own
+        deadline.expire()
+
+    if "error" in outcome:
+        raise outcome["error"]
+
+    return outcome["result"]
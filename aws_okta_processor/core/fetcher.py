@@ -2,14 +2,58 @@
 
 import sys
 import json
+import contextlib
+import functools
 import hashlib
+import datetime
+import threading
+
 import boto3  # type: ignore[import-untyped]
+import dateutil.parser  # type: ignore[import-untyped]
+import dateutil.tz  # type: ignore[import-untyped]
+import requests  # type: ignore[import-untyped]
 
+from botocore.config import Config  # type: ignore[import-untyped]
 from botocore.credentials import CachedCredentialFetcher  # type: ignore[import-untyped]
 
-from aws_okta_processor.core.okta import Okta
+from aws_okta_processor.core.deadline import (
+    Deadline,
+    call_within_deadline,
+    get_timeout,
+    phase,
+)
+from aws_okta_processor.core.okta import Okta, OktaError, OKTA_AUTHENTICATION_FAILED
+from aws_okta_processor.core.ratelimit import get_rate_limiter
+from aws_okta_processor.core.refresh import get_refresh_policy
+from aws_okta_processor.core.retry import RetryPolicy
+from aws_okta_processor.core.steps import StepGraph
+from aws_okta_processor.core.totp import get_totp_provider
 from aws_okta_processor.core.tty import print_tty
-from aws_okta_processor.core import saml, prompt
+from aws_okta_processor.core import hooks, saml, prompt
+from aws_okta_processor.core.saml import AWS_SIGN_IN_URL
+
+# Seconds a failed authentication is remembered by default
+DEFAULT_FAILURE_TTL = 60
+
+# Suffix of the cache key under which failures are remembered
+FAILURE_KEY_SUFFIX = "-failure"
+
+# boto3.client() shares the default session, which is not safe to use from
+# several threads at once.
+CLIENT_LOCK = threading.Lock()
+
+# AWS applications whose roles are retrieved at once
+APPLICATION_WORKERS = 8
+
+# Connect and read timeouts of STS, botocore's defaults
+STS_TIMEOUT = (60, 60)
+
+
+def get_client_config():
+    """Returns the botocore configuration of an STS client, whose timeouts are
+    no longer than the time left of the deadline, if any."""
+    connect_timeout, read_timeout = get_timeout(timeout=STS_TIMEOUT)
+    return Config(connect_timeout=connect_timeout, read_timeout=read_timeout)
 
 
 class SAMLFetcher(CachedCredentialFetcher):
@@ -19,19 +63,59 @@ class SAMLFetcher(CachedCredentialFetcher):
     by authenticating with Okta and using the SAML assertion to assume AWS roles.
     """
 
-    def __init__(self, authenticate, cache=None, expiry_window_seconds=600):
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        authenticate,
+        cache=None,
+        expiry_window_seconds=None,
+        okta=None,
+        app_roles=None,
+        session=None,
+        persist=True,
+        account_role_cache=None,
+    ):
         """Initialize the SAMLFetcher.
 
         Args:
             authenticate: An authentication object that provides methods to interact with Okta.
             cache: An optional cache object to store and retrieve cached credentials.
             expiry_window_seconds: The window (in seconds) before expiry to refresh credentials.
+                Defaults to the window of the configured refresh policy.
+            okta: An optional, already authenticated Okta session to reuse.
+            app_roles: An optional result of a previous _get_app_roles() call to reuse
+                instead of fetching a new SAML assertion.
+            session: An optional HTTP session shared by the Okta sessions created
+                and the AWS sign-in page.
+            persist: If False, the Okta sessions created are kept in memory only.
+            account_role_cache: An optional saml.AccountRoleCache shared with other fetchers.
         """  # noqa: E501
 
         self._authenticate = authenticate
         self._configuration = authenticate.configuration
+        self.okta = okta
+        self._app_roles = app_roles
+        # Okta and the AWS sign-in page share one connection pool
+        self._session = session or requests.Session()
+        self._persist = persist
+        self._account_role_cache = account_role_cache
+        self.step_graphs = []
+        # Reads the seed only if a TOTP factor is verified
+        self._totp_provider = get_totp_provider(configuration=self._configuration)
+        self._retry_policy = RetryPolicy(
+            retries=self._configuration.get("AWS_OKTA_RETRIES", None),
+            hedge=bool(self._configuration.get("AWS_OKTA_HEDGE", False)),
+        )
+        # The configuration gets cleared of the user and password once used
+        self._initial_configuration = dict(self._configuration)
         super().__init__(cache, expiry_window_seconds)
 
+        if expiry_window_seconds is None:
+            policy = get_refresh_policy(configuration=self._configuration)
+            self._expiry_window_seconds = policy.get_window(
+                duration=int(self._configuration.get("AWS_OKTA_DURATION") or 3600),
+                key=self._cache_key,
+            )
+
     def _create_cache_key(self):
         """Creates a unique cache key based on the authentication configuration.
 
@@ -52,13 +136,14 @@ class SAMLFetcher(CachedCredentialFetcher):
         Returns:
             A dictionary containing AWS credentials and expiration time.
         """
-        if self._configuration["AWS_OKTA_NO_AWS_CACHE"]:
-            # Fetch new credentials and write them to cache
-            response = self._get_credentials()
-            self._write_to_cache(response)
+        with self.within_deadline():
+            if self._configuration["AWS_OKTA_NO_AWS_CACHE"]:
+                # Fetch new credentials and write them to cache
+                response = self._get_credentials()
+                self._write_to_cache(response)
 
-        # Fetch credentials from cache
-        credentials = super().fetch_credentials()
+            # Fetch credentials from cache
+            credentials = super().fetch_credentials()
 
         return {
             "AccessKeyId": credentials["access_key"],
@@ -67,6 +152,201 @@ class SAMLFetcher(CachedCredentialFetcher):
             "Expiration": credentials["expiry_time"],
         }
 
+    def expires_within(self, seconds):
+        """Checks whether the cached credentials expire within the given window.
+
+        Args:
+            seconds: The window (in seconds) to check the expiration against.
+
+        Returns:
+            True if no credentials are cached or they expire within the window.
+        """
+        if self._cache_key not in self._cache:
+            return True
+
+        credentials = self._cache[self._cache_key]["Credentials"]
+        expiration = credentials["Expiration"]
+        if not isinstance(expiration, datetime.datetime):
+            expiration = dateutil.parser.parse(expiration)
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=dateutil.tz.tzutc())
+
+        remaining = expiration - datetime.datetime.now(dateutil.tz.tzutc())
+        return remaining.total_seconds() < seconds
+
+    def needs_refresh(self):
+        """Checks whether fetch_credentials() would fetch new credentials
+        instead of reading cached ones.
+
+        Returns:
+            True if the AWS cache is not used or the cached credentials are
+            within the refresh window.
+        """
+        if self._configuration["AWS_OKTA_NO_AWS_CACHE"]:
+            return True
+
+        return self.expires_within(self._expiry_window_seconds)
+
+    def refresh(self):
+        """Fetches new AWS credentials and writes them to the cache."""
+        response = self._get_credentials()
+        self._write_to_cache(response)
+
+    def _get_failure_fingerprint(self):
+        """Creates a fingerprint of the configuration a failure was seen with.
+
+        The password only enters the fingerprint through a salted, slow hash.
+
+        Returns:
+            A string that changes whenever the configuration changes.
+        """
+        configuration = dict(self._initial_configuration)
+        user_pass = configuration.pop("AWS_OKTA_PASS", None) or ""
+        configuration["AWS_OKTA_PASS"] = hashlib.pbkdf2_hmac(
+            "sha256", user_pass.encode(), self._cache_key.encode(), 10000
+        ).hex()
+        key_string = json.dumps(configuration, sort_keys=True, default=str)
+        return hashlib.sha256(key_string.encode()).hexdigest()
+
+    def _get_failure_ttl(self):
+        """Returns the number of seconds a failure is remembered."""
+        failure_ttl = self._initial_configuration.get("AWS_OKTA_FAILURE_TTL", None)
+        if failure_ttl is None or failure_ttl == "":
+            return DEFAULT_FAILURE_TTL
+        return int(failure_ttl)
+
+    def _write_failure_to_cache(self, message):
+        """Remembers a failure so that repeated runs fail without calling Okta.
+
+        Args:
+            message: The error message printed for the failure.
+        """
+        failure_ttl = self._get_failure_ttl()
+        if failure_ttl <= 0:
+            return
+
+        expiration = datetime.datetime.now(dateutil.tz.tzutc()) + datetime.timedelta(
+            seconds=failure_ttl
+        )
+        self._cache[self._cache_key + FAILURE_KEY_SUFFIX] = {
+            "Error": message,
+            "Expiration": expiration.isoformat(),
+            "Fingerprint": self._get_failure_fingerprint(),
+        }
+
+    def _load_failure_from_cache(self):
+        """Loads a remembered failure that is still valid.
+
+        Returns:
+            The remembered error message, or None.
+        """
+        failure_key = self._cache_key + FAILURE_KEY_SUFFIX
+        if failure_key not in self._cache:
+            return None
+
+        try:
+            failure = self._cache[failure_key]
+        except KeyError:
+            return None
+
+        expiration = dateutil.parser.parse(failure["Expiration"])
+        if expiration <= datetime.datetime.now(dateutil.tz.tzutc()):
+            return None
+
+        if failure["Fingerprint"] != self._get_failure_fingerprint():
+            return None
+
+        return failure["Error"]
+
+    @contextlib.contextmanager
+    def within_deadline(self):
+        """Installs the deadline of '--deadline' for an authentication, unless
+        the calling thread already has one."""
+        seconds = self._configuration.get("AWS_OKTA_DEADLINE", None)
+        if not seconds or hooks.get_deadline() is not None:
+            yield
+            return
+
+        with hooks.use_deadline(Deadline(seconds=seconds)):
+            yield
+
+    def create_okta(self, no_okta_cache=None, defer_refresh=False):
+        """Creates an Okta session from the authentication configuration.
+
+        Args:
+            no_okta_cache: If True, does not use the cached Okta session.
+            defer_refresh: If True, the refresh of a cached Okta session is left
+                to Okta.refresh_deferred_okta_session().
+
+        Returns:
+            An authenticated Okta instance.
+        """
+        with phase(name="okta_login"):
+            return Okta(
+                user_name=self._configuration["AWS_OKTA_USER"],
+                user_pass=self._authenticate.get_pass(),
+                organization=self._configuration["AWS_OKTA_ORGANIZATION"],
+                factor=self._configuration["AWS_OKTA_FACTOR"],
+                silent=self._configuration["AWS_OKTA_SILENT"],
+                no_okta_cache=no_okta_cache,
+                session=self._session,
+                persist=self._persist,
+                defer_refresh=defer_refresh,
+                warm_urls=self.get_warm_urls(),
+                factor_timeout=self._configuration.get("AWS_OKTA_FACTOR_TIMEOUT", None),
+                factor_poll_max=self._configuration.get(
+                    "AWS_OKTA_FACTOR_POLL_MAX", None
+                ),
+                remember_device=self._configuration.get(
+                    "AWS_OKTA_REMEMBER_DEVICE", False
+                ),
+                totp_provider=self._totp_provider,
+                rate_limiter=get_rate_limiter(persist=self._persist),
+                retry_policy=self._retry_policy,
+            )
+
+    def get_warm_urls(self):
+        """Returns the URLs besides Okta to connect to while the user authenticates.
+
+        Returns:
+            A list with the AWS sign-in URL.
+        """
+        sign_in_url = self._configuration.get("AWS_OKTA_SIGN_IN_URL", None)
+        return [sign_in_url or AWS_SIGN_IN_URL]
+
+    def run_steps(self, graph, workers=4):
+        """Runs a graph of independent network steps, keeping it for the timing report.
+
+        Args:
+            graph: The StepGraph to run.
+            workers: The maximum number of steps running at once.
+
+        Returns:
+            The graph, to read the step results from.
+        """  # noqa: E501
+        self.step_graphs.append(graph)
+        return graph.run(workers=workers)
+
+    def print_timings(self):
+        """Prints the step and critical path timings if '--timing' was given."""
+        if not self._configuration.get("AWS_OKTA_TIMING", None):
+            return
+
+        for graph in self.step_graphs:
+            for line in graph.get_report():
+                print_tty(line)
+
+        if self.okta is not None and self.okta.warmer is not None:
+            for line in self.okta.warmer.get_report():
+                print_tty(line)
+
+        if self.okta is not None and self.okta.factor_metrics:
+            metrics = self.okta.factor_metrics
+            print_tty(
+                f"Timing: MFA {metrics['factor']} {metrics['result']}:"
+                f" {metrics['latency']:.3f}s, {metrics['polls']} requests"
+            )
+
     def _get_app_roles(self):
         """Retrieves AWS roles available to the user via Okta.
 
@@ -80,31 +360,37 @@ class SAMLFetcher(CachedCredentialFetcher):
                 - User name
                 - Organization name
         """  # noqa: E501
-        user = self._configuration["AWS_OKTA_USER"]
+        if self._app_roles is not None:
+            return self._app_roles
+
         user_pass = self._authenticate.get_pass()
-        organization = self._configuration["AWS_OKTA_ORGANIZATION"]
         no_okta_cache = self._configuration["AWS_OKTA_NO_OKTA_CACHE"]
 
-        # Initialize Okta authentication
-        okta = Okta(
-            user_name=user,
-            user_pass=user_pass,
-            organization=organization,
-            factor=self._configuration["AWS_OKTA_FACTOR"],
-            silent=self._configuration["AWS_OKTA_SILENT"],
-            no_okta_cache=no_okta_cache,
-        )
+        if self.okta is None:
+            # Initialize Okta authentication; a cached session is refreshed
+            # below, while the applications are listed
+            self.okta = self.create_okta(
+                no_okta_cache=no_okta_cache, defer_refresh=True
+            )
+
+        okta = self.okta
 
         # Clear sensitive information from configuration
         self._configuration["AWS_OKTA_USER"] = ""
         self._configuration["AWS_OKTA_PASS"] = ""
 
-        if self._configuration["AWS_OKTA_APPLICATION"]:
-            # Use specified application URL
-            application_url = self._configuration["AWS_OKTA_APPLICATION"]
-        else:
+        application_url = self._configuration["AWS_OKTA_APPLICATION"]
+
+        graph = StepGraph()
+        graph.add("okta_refresh", okta.refresh_deferred_okta_session)
+        if not application_url:
+            graph.add("okta_applications", okta.get_applications)
+        self.run_steps(graph)
+        graph.result("okta_refresh")
+
+        if not application_url:
             # Prompt user to select an application
-            applications = okta.get_applications()
+            applications = graph.result("okta_applications")
             application_url = prompt.get_item(
                 items=applications,
                 label="AWS application",
@@ -112,21 +398,16 @@ class SAMLFetcher(CachedCredentialFetcher):
             )
 
         # Get SAML response from Okta
-        saml_response = okta.get_saml_response(application_url=application_url)
+        with phase(name="okta_saml"):
+            saml_response = okta.get_saml_response(application_url=application_url)
         saml_assertion = saml.get_saml_assertion(saml_response=saml_response)
 
         if not saml_assertion and not no_okta_cache:
             # Retry without using Okta cache
             print_tty("Creating new Okta session.")
-            okta = Okta(
-                user_name=user,
-                user_pass=user_pass,
-                organization=organization,
-                factor=self._configuration["AWS_OKTA_FACTOR"],
-                silent=self._configuration["AWS_OKTA_SILENT"],
-                no_okta_cache=True,
-            )
-            saml_response = okta.get_saml_response(application_url=application_url)
+            okta = self.create_new_okta(okta=okta, user_pass=user_pass)
+            with phase(name="okta_saml"):
+                saml_response = okta.get_saml_response(application_url=application_url)
             saml_assertion = saml.get_saml_assertion(saml_response=saml_response)
 
         if not saml_assertion:
@@ -135,11 +416,11 @@ class SAMLFetcher(CachedCredentialFetcher):
             sys.exit(1)
 
         # Parse SAML assertion to get AWS roles
-        aws_roles = saml.get_aws_roles(
-            saml_assertion=saml_assertion,
-            accounts_filter=self._configuration.get("AWS_OKTA_ACCOUNT_ALIAS", None),
-            sign_in_url=self._configuration.get("AWS_OKTA_SIGN_IN_URL", None),
-        )
+        aws_roles = self._get_aws_roles(saml_assertion=saml_assertion)
+
+        if okta.warmer is not None:
+            # The remaining requests go to STS through boto3
+            okta.warmer.close()
 
         return (
             aws_roles,
@@ -149,6 +430,129 @@ class SAMLFetcher(CachedCredentialFetcher):
             okta.organization,
         )
 
+    def _get_aws_roles(self, saml_assertion=None):
+        """Lists the AWS roles of a SAML assertion on the AWS sign-in page.
+
+        Args:
+            saml_assertion: The base64 encoded SAML assertion.
+
+        Returns:
+            The AWS roles by account, filtered by the account alias.
+        """
+        with phase(name="aws_sign_in"):
+            return saml.get_aws_roles(
+                saml_assertion=saml_assertion,
+                accounts_filter=self._configuration.get("AWS_OKTA_ACCOUNT_ALIAS", None),
+                sign_in_url=self._configuration.get("AWS_OKTA_SIGN_IN_URL", None),
+                account_role_cache=self._account_role_cache,
+                session=self._session,
+                retry_policy=self._retry_policy,
+            )
+
+    def _get_application_roles(self, okta=None, application_url=None):
+        """Retrieves the AWS roles of one application with an Okta session.
+
+        Args:
+            okta: The authenticated Okta instance.
+            application_url: The Okta URL of the AWS application.
+
+        Returns:
+            The AWS roles by account.
+        """
+        with phase(name="okta_saml"):
+            saml_response = okta.get_saml_response(application_url=application_url)
+        saml_assertion = saml.get_saml_assertion(saml_response=saml_response)
+
+        if not saml_assertion:
+            print_tty(f"ERROR: SAMLResponse tag was not found for {application_url}!")
+            sys.exit(1)
+
+        return self._get_aws_roles(saml_assertion=saml_assertion)
+
+    def _get_all_app_roles(self):
+        """Retrieves the AWS roles of every AWS application of the user.
+
+        Logs in to Okta once, then fetches the SAML assertions and AWS sign-in
+        pages of the applications concurrently over that session.
+
+        Returns:
+            A list of (roles, application URL, user, organization) tuples, in the
+            order Okta lists the applications.
+        """
+        no_okta_cache = self._configuration["AWS_OKTA_NO_OKTA_CACHE"]
+
+        if self.okta is None:
+            self.okta = self.create_okta(
+                no_okta_cache=no_okta_cache, defer_refresh=True
+            )
+
+        okta = self.okta
+
+        # Clear sensitive information from configuration
+        self._configuration["AWS_OKTA_USER"] = ""
+        self._configuration["AWS_OKTA_PASS"] = ""
+
+        graph = StepGraph()
+        graph.add("okta_refresh", okta.refresh_deferred_okta_session)
+        graph.add("okta_applications", okta.get_applications)
+        self.run_steps(graph)
+        graph.result("okta_refresh")
+        applications = graph.result("okta_applications")
+
+        graph = StepGraph()
+        for label, application_url in applications.items():
+            graph.add(
+                label,
+                functools.partial(
+                    self._get_application_roles,
+                    okta=okta,
+                    application_url=application_url,
+                ),
+            )
+        self.run_steps(graph, workers=APPLICATION_WORKERS)
+
+        if okta.warmer is not None:
+            okta.warmer.close()
+
+        return [
+            (graph.result(label), application_url, okta.user_name, okta.organization)
+            for label, application_url in applications.items()
+        ]
+
+    def create_new_okta(self, okta=None, user_pass=None):
+        """Replaces an Okta session with a new one, ignoring the cached session.
+
+        Args:
+            okta: The Okta instance whose user and organization to log in with.
+            user_pass: The Okta password.
+
+        Returns:
+            The new Okta instance.
+        """
+        with phase(name="okta_login"):
+            self.okta = Okta(
+                user_name=okta.user_name,
+                user_pass=user_pass,
+                organization=okta.organization,
+                factor=self._configuration["AWS_OKTA_FACTOR"],
+                silent=self._configuration["AWS_OKTA_SILENT"],
+                no_okta_cache=True,
+                session=self._session,
+                persist=self._persist,
+                warm_urls=self.get_warm_urls(),
+                factor_timeout=self._configuration.get("AWS_OKTA_FACTOR_TIMEOUT", None),
+                factor_poll_max=self._configuration.get(
+                    "AWS_OKTA_FACTOR_POLL_MAX", None
+                ),
+                remember_device=self._configuration.get(
+                    "AWS_OKTA_REMEMBER_DEVICE", False
+                ),
+                totp_provider=self._totp_provider,
+                rate_limiter=get_rate_limiter(persist=self._persist),
+                retry_policy=self._retry_policy,
+            )
+        return self.okta
+
     def get_app_roles(self):
         """Public method to get available AWS roles.
 
@@ -159,7 +563,8 @@ class SAMLFetcher(CachedCredentialFetcher):
                 - User name
                 - Organization name
         """
-        aws_roles, _, application_url, user, organization = self._get_app_roles()
+        with self.within_deadline():
+            aws_roles, _, application_url, user, organization = self._get_app_roles()
         return {
             "Application": application_url,
             "Accounts": aws_roles,
@@ -167,25 +572,85 @@ class SAMLFetcher(CachedCredentialFetcher):
             "Organization": organization,
         }
 
+    def get_all_app_roles(self):
+        """Public method to get the AWS roles of every AWS application.
+
+        Returns:
+            A list of dictionaries like those of get_app_roles(), one per
+            application.
+        """
+        with self.within_deadline():
+            all_app_roles = self._get_all_app_roles()
+
+        return [
+            {
+                "Application": application_url,
+                "Accounts": aws_roles,
+                "User": user,
+                "Organization": organization,
+            }
+            for aws_roles, application_url, user, organization in all_app_roles
+        ]
+
     def _get_credentials(self):
         """Retrieves AWS temporary credentials by assuming an AWS role via SAML.
 
+        Failures that would repeat on every run, like rejected Okta credentials
+        or a role missing from the assertion, are remembered for a short time
+        and reported again without calling Okta.
+
         Returns:
             A dictionary containing AWS credentials and expiration time.
         """
-        # Do NOT load credentials from ENV or ~/.aws/credentials
-        client = boto3.client(
-            "sts",
-            aws_access_key_id="",
-            aws_secret_access_key="",
-            aws_session_token="",
-            region_name=self._configuration["AWS_OKTA_REGION"],
-        )
+        if not self._configuration["AWS_OKTA_NO_AWS_CACHE"]:
+            failure = self._load_failure_from_cache()
+            if failure:
+                print_tty(failure)
+                print_tty(
+                    "Error: Failed recently, retry later or pass --no-aws-cache.",
+                    silent=self._configuration["AWS_OKTA_SILENT"],
+                )
+                sys.exit(1)
+
+        def create_client():
+            # Do NOT load credentials from ENV or ~/.aws/credentials
+            with CLIENT_LOCK:
+                return boto3.client(
+                    "sts",
+                    aws_access_key_id="",
+                    aws_secret_access_key="",
+                    aws_session_token="",
+                    region_name=self._configuration["AWS_OKTA_REGION"],
+                    config=get_client_config(),
+                )
+
+        # The STS client is built while Okta is called; that may prompt, and
+        # so runs in this thread
+        graph = StepGraph()
+        graph.add("sts_client", create_client)
+        graph.add("app_roles", self._get_app_roles, interactive=True)
+        self.run_steps(graph)
 
         # Get available AWS roles and SAML assertion
-        aws_roles, saml_assertion, _application_url, user, _organization = (
-            self._get_app_roles()
-        )
+        try:
+            aws_roles, saml_assertion, _application_url, user, _organization = (
+                graph.result("app_roles")
+            )
+        except OktaError as error:
+            # Only remember rejected credentials that weren't typed in
+            if error.error_code == OKTA_AUTHENTICATION_FAILED and (
+                self._initial_configuration.get("AWS_OKTA_PASS", None)
+            ):
+                self._write_failure_to_cache(error.message)
+            raise
+
+        client = graph.result("sts_client")
+
+        role = self._configuration["AWS_OKTA_ROLE"]
+        if not aws_roles:
+            self._write_failure_to_cache("ERROR: No AWS Roles were found!")
+        elif role and not prompt.get_deep_value(items=aws_roles, key=role):
+            self._write_failure_to_cache(f"ERROR: AWS Role {role} not found!")
 
         # Prompt user to select an AWS role
         aws_role = prompt.get_item(
@@ -196,13 +661,16 @@ class SAMLFetcher(CachedCredentialFetcher):
             f"Role: {aws_role.role_arn}", silent=self._configuration["AWS_OKTA_SILENT"]
         )
 
-        # Assume the selected role using the SAML assertion
-        response = client.assume_role_with_saml(
-            RoleArn=aws_role.role_arn,
-            PrincipalArn=aws_role.principal_arn,
-            SAMLAssertion=saml_assertion,
-            DurationSeconds=int(self._configuration["AWS_OKTA_DURATION"]),
-        )
+        # Assume the selected role using the SAML assertion; boto3 calls
+        # cannot be given the time left, so they are given up on instead
+        with phase(name="sts_assume_role"):
+            response = call_within_deadline(
+                client.assume_role_with_saml,
+                RoleArn=aws_role.role_arn,
+                PrincipalArn=aws_role.principal_arn,
+                SAMLAssertion=saml_assertion,
+                DurationSeconds=int(self._configuration["AWS_OKTA_DURATION"]),
+            )
 
         if self._configuration.get("AWS_OKTA_SECONDARY_ROLE", None) is not None:
             # If secondary role is specified, assume it
@@ -211,18 +679,22 @@ class SAMLFetcher(CachedCredentialFetcher):
 
             print_tty(f"Assuming secondary role {secondary_role_arn}")
             credentials = response["Credentials"]
-            client = boto3.client(
-                "sts",
-                aws_access_key_id=credentials["AccessKeyId"],
-                aws_secret_access_key=credentials["SecretAccessKey"],
-                aws_session_token=credentials["SessionToken"],
-                region_name=self._configuration["AWS_OKTA_REGION"],
-            )
-            response = client.assume_role(
-                RoleArn=secondary_role_arn,
-                DurationSeconds=int(self._configuration["AWS_OKTA_DURATION"]),
-                RoleSessionName=role_session_name,
-            )
+            with CLIENT_LOCK:
+                client = boto3.client(
+                    "sts",
+                    aws_access_key_id=credentials["AccessKeyId"],
+                    aws_secret_access_key=credentials["SecretAccessKey"],
+                    aws_session_token=credentials["SessionToken"],
+                    region_name=self._configuration["AWS_OKTA_REGION"],
+                    config=get_client_config(),
+                )
+            with phase(name="sts_assume_role"):
+                response = call_within_deadline(
+                    client.assume_role,
+                    RoleArn=secondary_role_arn,
+                    DurationSeconds=int(self._configuration["AWS_OKTA_DURATION"]),
+                    RoleSessionName=role_session_name,
+                )
 
         # Format expiration time
         expiration = (
@@ -230,4 +702,6 @@ class SAMLFetcher(CachedCredentialFetcher):
         )
         response["Credentials"]["Expiration"] = expiration
 
+        self.print_timings()
+
         return response
@@ -0,0 +1,115 @@
+"""
+Module for replacing terminal prompts and output from code.
+
+The library API installs hooks for the duration of a call. They are kept per
+thread, so that concurrent calls answer their own prompts and collect their
+own output. The deadline of an authentication is kept alongside them.
+"""
+
+import contextlib
+import threading
+
+# Hooks installed in the current thread
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def use_hooks(select=None, password=None, passcode=None, output=None, prompt=None):
+    """
+    Installs hooks in the current thread for the duration of a block.
+
+    Args:
+        select (callable): Called with a label and a list of keys instead of
+            prompting for a selection; returns the selected key.
+        password (callable): Called instead of prompting for the Okta password.
+        passcode (callable): Called with the factor type instead of prompting
+            for an MFA passcode.
+        output (callable): Called with each line instead of printing it.
+        prompt (callable): Called before any prompt on the terminal; raises to
+            fail the prompt instead.
+    """
+    previous = getattr(_local, "hooks", None)
+    _local.hooks = {
+        "select": select,
+        "password": password,
+        "passcode": passcode,
+        "output": output,
+        "prompt": prompt,
+    }
+
+    try:
+        yield
+    finally:
+        _local.hooks = previous
+
+
+def get_hook(name=None):
+    """
+    Returns a hook installed in the current thread.
+
+    Args:
+        name (str): The name of the hook.
+
+    Returns:
+        callable or None: The hook, or None if none is installed.
+    """
+    installed = getattr(_local, "hooks", None)
+    if installed is None:
+        return None
+    return installed.get(name, None)
+
+
+@contextlib.contextmanager
+def use_deadline(deadline=None):
+    """
+    Installs the deadline of an authentication in the current thread for the
+    duration of a block.
+
+    Args:
+        deadline (Deadline): The deadline, or None for no deadline.
+    """
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = deadline
+
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def get_deadline():
+    """
+    Returns the deadline installed in the current thread.
+
+    Returns:
+        Deadline or None: The deadline, or None if none is installed.
+    """
+    return getattr(_local, "deadline", None)
+
+
+def bind_hooks(function=None):
+    """
+    Binds the hooks and the deadline installed in the current thread to a
+    function, so that they still apply when it runs in another thread.
+
+    Args:
+        function (callable): The function.
+
+    Returns:
+        callable: A function calling 'function' with the current hooks installed.
+    """
+    installed = getattr(_local, "hooks", None)
+    deadline = getattr(_local, "deadline", None)
+
+    def bound(*args, **kwargs):
+        previous = getattr(_local, "hooks", None)
+        previous_deadline = getattr(_local, "deadline", None)
+        _local.hooks = installed
+        _local.deadline = deadline
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _local.hooks = previous
+            _local.deadline = previous_deadline
+
+    return bound
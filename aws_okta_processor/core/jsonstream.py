@@ -0,0 +1,75 @@
+"""
+This module parses a JSON array incrementally, as its chunks are received.
+
+Each element of the array is decoded once it has been received in full and
+handed to the caller, which may keep or drop it, so that no more than one
+element and one chunk are held in memory at a time, however long the array.
+"""
+
+import codecs
+import json
+
+from json.decoder import WHITESPACE  # type: ignore[attr-defined]
+
+_DECODER = json.JSONDecoder()
+
+
+def iter_json_array(chunks=None):
+    """
+    Yields the elements of a JSON array read in chunks.
+
+    Args:
+        chunks (iterable): The UTF-8 encoded array, in chunks of bytes, such as
+            those of Response.iter_content().
+
+    Yields:
+        The decoded elements, in order.
+
+    Raises:
+        ValueError: If the chunks are not a valid JSON array.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        position = 0
+
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            if buffer[position] == ",":
+                position += 1
+                continue
+
+            try:
+                element, end = _DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element has not been received in full yet
+                break
+
+            following = WHITESPACE.match(buffer, end).end()
+            if following == len(buffer) or buffer[following] not in ",]":
+                # A number may go on in the next chunk, as '1' of '1.5'; a
+                # comma or the end of the array follows a whole element
+                break
+
+            yield element
+            position = end
+
+        buffer = buffer[position:]
+
+    raise ValueError("Incomplete JSON array")
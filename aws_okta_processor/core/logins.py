@@ -0,0 +1,74 @@
+"""
+This module logs in to several Okta organizations, or as several users, at
+once.
+
+Each login runs in a thread of its own and keeps its own session cache, since
+those are per user and organization. Logins that need input take turns on the
+terminal through tty.prompting(), with their prompts labelled, while the other
+logins carry on with their requests.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.tty import use_prompt_label
+
+# Logins run at once by default
+DEFAULT_LOGIN_WORKERS = 4
+
+
+def get_login_label(user_name=None, organization=None):
+    """Returns the label of a login's prompts, like 'jdoe@mycompany.okta.com'."""
+    return f"{user_name}@{organization}"
+
+
+def parse_login(login=None):
+    """
+    Splits a login of the form '<user>@<organization>'.
+
+    The user name may be an email address itself; the organization is what
+    follows the last '@'.
+
+    Args:
+        login (str): The login, like 'jdoe@mycompany.okta.com'.
+
+    Returns:
+        tuple: The user name and the organization.
+
+    Raises:
+        ValueError: If either is missing.
+    """
+    user_name, _, organization = login.rpartition("@")
+    if not user_name or not organization:
+        raise ValueError(f"Invalid login {login!r}, expected <user>@<organization>")
+
+    return user_name, organization
+
+
+def login_all(logins=None, workers=DEFAULT_LOGIN_WORKERS):
+    """
+    Runs logins concurrently, one prompt at a time.
+
+    Args:
+        logins (OrderedDict): A mapping of labels, like those of
+            get_login_label(), to functions logging in and returning the Okta
+            session.
+        workers (int): The maximum number of logins running at once.
+
+    Returns:
+        OrderedDict: A mapping of the labels to the Okta sessions, or to None
+        for the logins that failed.
+    """
+
+    def login(label):
+        with use_prompt_label(label=label):
+            try:
+                return logins[label]()
+            except (SystemExit, Exception):  # pylint: disable=W0718
+                return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        sessions = executor.map(hooks.bind_hooks(login), logins)
+
+        return OrderedDict(zip(logins, sessions))
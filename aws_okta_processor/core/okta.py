@@ -6,6 +6,8 @@ import sys
 import time
 import json
 import datetime
+import threading
+import email.utils
 
 from collections import OrderedDict
 
@@ -17,7 +19,20 @@ import requests  # type: ignore[import-untyped]
 
 from six import add_metaclass  # type: ignore[import-untyped]
 from aws_okta_processor.core import prompt
-from aws_okta_processor.core.tty import print_tty, input_tty
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.deadline import check_deadline
+from aws_okta_processor.core.jsonstream import iter_json_array
+from aws_okta_processor.core.logins import get_login_label
+from aws_okta_processor.core.ratelimit import RateLimiter
+from aws_okta_processor.core.retry import RetryPolicy
+from aws_okta_processor.core.totp import get_next_window
+from aws_okta_processor.core.tty import (
+    check_prompt,
+    input_tty,
+    print_tty,
+    prompting,
+)
+from aws_okta_processor.core.warmup import ConnectionWarmer
 
 
 OKTA_AUTH_URL = "https://{}/api/v1/authn"
@@ -25,6 +40,49 @@ OKTA_SESSION_URL = "https://{}/api/v1/sessions"
 OKTA_REFRESH_URL = "https://{}/api/v1/sessions/me/lifecycle/refresh"
 OKTA_APPLICATIONS_URL = "https://{}/api/v1/users/me/appLinks"
 
+# Factor key racing an Okta Verify push against a TOTP passcode, optionally
+# followed by the key of the TOTP factor, like 'push+token:software:totp:google'
+FACTOR_RACE = "push+totp"
+FACTOR_RACE_PREFIX = "push+"
+
+# Seconds before the first poll of a pending factor, the growth of the delay
+# between polls and its default ceiling
+FACTOR_POLL_INTERVAL = 0.5
+FACTOR_POLL_BACKOFF = 1.5
+DEFAULT_FACTOR_POLL_MAX = 5
+
+# Seconds a factor may stay pending by default
+DEFAULT_FACTOR_TIMEOUT = 300
+
+# Passcodes submitted for a TOTP seed: one, then that of the next window
+TOTP_ATTEMPTS = 2
+
+# Passcodes a user may type while racing a push, before the login fails
+RACE_PASSCODE_ATTEMPTS = 3
+
+# Requests sent for a call answered with 429, and the longest wait for a rate
+# limit reset before the request is sent or its 429 returned anyway
+RATE_LIMIT_ATTEMPTS = 3
+RATE_LIMIT_MAX_WAIT = 60
+
+# Bytes of the application list read at a time
+APPLICATIONS_CHUNK_SIZE = 16384
+
+# Seconds a cached application list is used without asking Okta, when Okta
+# gave it no ETag to revalidate it with
+APPLICATIONS_TTL = 3600
+
+# Okta error code for rejected credentials
+# https://developer.okta.com/docs/reference/error-codes/#E0000004
+OKTA_AUTHENTICATION_FAILED = "E0000004"
+
+# Okta error code for a rejected MFA passcode
+# https://developer.okta.com/docs/reference/error-codes/#E0000068
+OKTA_INVALID_PASSCODE = "E0000068"
+
+# Suffix of the session cache files, named after their user and organization
+SESSION_FILE_SUFFIX = "-session.json"
+
 ZERO = datetime.timedelta(0)
 
 
@@ -52,6 +110,16 @@ class Okta:  # pylint: disable=R0902
         factor=None,
         silent=None,
         no_okta_cache=None,
+        session=None,
+        persist=True,
+        defer_refresh=False,
+        warm_urls=None,
+        factor_timeout=None,
+        factor_poll_max=None,
+        remember_device=False,
+        totp_provider=None,
+        rate_limiter=None,
+        retry_policy=None,
     ):
         """
         Initialize Okta authentication with optional parameters.
@@ -66,50 +134,106 @@ class Okta:  # pylint: disable=R0902
             factor (str): The preferred MFA factor.
             silent (bool): If True, suppresses output.
             no_okta_cache (bool): If True, does not use cached Okta session.
-        """
+            session (requests.Session): An HTTP session to reuse pooled connections from.
+            persist (bool): If False, neither reads nor writes the session cache file.
+            defer_refresh (bool): If True, a cached session that has not expired is used
+                as is, to be refreshed by refresh_deferred_okta_session().
+            warm_urls (list): If given, connections to Okta and to these URLs are opened
+                in the background while the user authenticates, see self.warmer.
+            factor_timeout (float): Seconds an MFA factor may stay pending (300).
+            factor_poll_max (float): Maximum seconds between polls of a pending factor (5).
+            remember_device (bool): If True, asks Okta to remember this device when an
+                MFA factor is verified, so that its device token skips MFA later on.
+            totp_provider (TOTPProvider): If given, TOTP factors are verified with its
+                passcodes instead of prompting.
+            rate_limiter (RateLimiter): Okta rate limits shared with other clients;
+                this client's own by default.
+            retry_policy (RetryPolicy): How failed requests are retried and slow ones
+                hedged; retried without hedging by default.
+        """  # noqa: E501
         # Initialize instance variables
         self.user_name = user_name
         self.silent = silent
         self.factor = factor
-        self.session = requests.Session()
+        self.session = session or requests.Session()
         self.organization = organization
         self.okta_session_id = None
-        self.cache_file_path = self.get_cache_file_path()
+        self.deferred_okta_session = None
+        self.warmer = None
+        self.factor_timeout = float(factor_timeout or DEFAULT_FACTOR_TIMEOUT)
+        self.factor_poll_max = float(factor_poll_max or DEFAULT_FACTOR_POLL_MAX)
+        self.factor_metrics = None
+        self.remember_device = remember_device
+        self.totp_provider = totp_provider
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.no_okta_cache = no_okta_cache
+
+        session_file_path = None
+        if persist and not no_okta_cache and not (self.user_name and self.organization):
+            # Pick up the last used session rather than prompting for a login
+            session_file_path = self.find_cached_session()
+
+        self.cache_file_path = self.get_cache_file_path() if persist else None
 
         okta_session = None
 
-        if not no_okta_cache:
+        if not no_okta_cache and self.cache_file_path:
             # Get session from cache
-            okta_session = self.get_okta_session_from_cache_file()
+            okta_session = self.get_okta_session_from_cache_file(
+                path=session_file_path
+            )
 
         if okta_session:
             # Refresh the session ID of the cached session
             self.read_aop_from_okta_session(okta_session)
-            self.refresh_okta_session_id(okta_session=okta_session)
+            if defer_refresh and not okta_session_expired(okta_session=okta_session):
+                self.deferred_okta_session = okta_session
+                self.okta_session_id = okta_session["id"]
+            else:
+                self.refresh_okta_session_id(okta_session=okta_session)
 
         if not self.organization:
             # Prompt for organization if not provided
-            print_tty(string="Organization: ", newline=False)
-            self.organization = input_tty()
+            with prompting():
+                print_tty(string="Organization: ", newline=False)
+                self.organization = input_tty()
 
         if not self.user_name:
             # Prompt for username if not provided
-            print_tty(string="UserName: ", newline=False)
-            self.user_name = input_tty()
+            with prompting():
+                print_tty(string="UserName: ", newline=False)
+                self.user_name = input_tty()
 
         if not self.okta_session_id:
             # No valid session ID, proceed to authenticate
+            if warm_urls is not None and self.organization:
+                # Connect while the user types a password or approves MFA
+                self.warmer = ConnectionWarmer(session=self.session)
+                self.warmer.warm(
+                    urls=[OKTA_AUTH_URL.format(self.organization)] + list(warm_urls)
+                )
+
             if not self.user_name:
-                print_tty(string="UserName: ", newline=False)
-                self.user_name = input_tty()
+                with prompting():
+                    print_tty(string="UserName: ", newline=False)
+                    self.user_name = input_tty()
 
             if not user_pass:
                 # Prompt for password if not provided
-                user_pass = getpass.getpass("Password: ")
+                user_pass = get_password()
 
             if not self.organization:
-                print_tty(string="Organization: ", newline=False)
-                self.organization = input_tty()
+                with prompting():
+                    print_tty(string="Organization: ", newline=False)
+                    self.organization = input_tty()
+
+            if persist:
+                # Cache the session under the user and organization prompted for
+                self.cache_file_path = self.get_cache_file_path()
+
+            # Send the device token of a remembered device, if any
+            self.load_cookies()
 
             # Obtain a single-use token
             self.okta_single_use_token = self.get_okta_single_use_token(
@@ -133,9 +257,10 @@ class Okta:  # pylint: disable=R0902
 
             del okta_session["aws-okta-processor"]
 
-    def get_cache_file_path(self):
-        """Returns the file path for the session cache file:
-        ~/.aws-okta-processor/cache/<username>-<organization>-session.json
+    @staticmethod
+    def get_cache_directory():
+        """Returns the directory of the cache files, creating it if need be:
+        ~/.aws-okta-processor/cache
         """
         home_directory = os.path.expanduser("~")
         cache_directory = os.path.join(home_directory, ".aws-okta-processor", "cache")
@@ -143,12 +268,44 @@ class Okta:  # pylint: disable=R0902
         if not os.path.isdir(cache_directory):
             os.makedirs(cache_directory)
 
-        cache_file_name = f"{self.user_name}-{self.organization}-session.json"
+        return cache_directory
 
-        cache_file_path = os.path.join(cache_directory, cache_file_name)
+    def get_cache_file_path(self):
+        """Returns the file path for the session cache file:
+        ~/.aws-okta-processor/cache/<username>-<organization>-session.json
+        """
+        cache_file_name = f"{self.user_name}-{self.organization}{SESSION_FILE_SUFFIX}"
+
+        cache_file_path = os.path.join(self.get_cache_directory(), cache_file_name)
 
         return cache_file_path
 
+    def find_cached_session(self):
+        """
+        Sets the user name and organization missing from the configuration to
+        those of the most recently used valid session cached for the others,
+        asking which one to use if several users or organizations have one.
+
+        Returns:
+            str: The path of the session cache file, or None if there is none.
+        """
+        sessions = get_cached_sessions(
+            cache_directory=self.get_cache_directory(),
+            user_name=self.user_name,
+            organization=self.organization,
+        )
+        if not sessions:
+            return None
+
+        items = OrderedDict(
+            (get_login_label(user_name=login[0], organization=login[1]), login)
+            for login in sessions
+        )
+        login = prompt.get_item(items=items, label="Okta session")
+        self.user_name, self.organization = login
+
+        return sessions[login]
+
     def set_okta_session(self, okta_session=None):
         """
         Saves the given Okta session in our cache file.
@@ -156,6 +313,9 @@ class Okta:  # pylint: disable=R0902
         Parameters:
             okta_session (dict): The Okta session data to be saved.
         """
+        if self.cache_file_path is None:
+            return
+
         session_data = dict(
             okta_session,
             **{
@@ -170,21 +330,159 @@ class Okta:  # pylint: disable=R0902
 
         os.chmod(self.cache_file_path, 0o600)
 
-    def get_okta_session_from_cache_file(self):
+    def get_okta_session_from_cache_file(self, path=None):
         """
         Retrieves the Okta session from the cache file.
 
+        Parameters:
+            path (str): The cache file to read instead of that of the user and
+                organization, like one found by find_cached_session().
+
         Returns:
             dict: The cached Okta session data, or an empty dict if not found.
         """
         session = {}
+        path = path or self.cache_file_path
 
-        if os.path.isfile(self.cache_file_path):
-            with open(self.cache_file_path, encoding="utf-8") as file:
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as file:
                 session = json.load(file)
 
         return session
 
+    def get_cookie_file_path(self):
+        """Returns the file path for the cookie jar file:
+        ~/.aws-okta-processor/cache/<username>-<organization>-cookies.json
+        """
+        cache_directory = os.path.dirname(self.cache_file_path)
+        cookie_file_name = f"{self.user_name}-{self.organization}-cookies.json"
+
+        return os.path.join(cache_directory, cookie_file_name)
+
+    def load_cookies(self):
+        """
+        Adds the persistent Okta cookies of the cookie jar file to the session,
+        such as the 'DT' device token Okta sets on a remembered device.
+        """
+        if self.cache_file_path is None:
+            return
+
+        cookie_file_path = self.get_cookie_file_path()
+        if not os.path.isfile(cookie_file_path):
+            return
+
+        try:
+            with open(cookie_file_path, encoding="utf-8") as file:
+                cookies = json.load(file)
+        except ValueError:
+            return
+
+        if not isinstance(cookies, list):
+            return
+
+        now = time.time()
+        for cookie in cookies:
+            if cookie.get("expires", None) and cookie["expires"] <= now:
+                continue
+
+            self.session.cookies.set_cookie(requests.cookies.create_cookie(**cookie))
+
+    def store_cookies(self):
+        """
+        Saves the persistent Okta cookies of the session in the cookie jar file,
+        readable by the current user only.
+
+        Session cookies, such as 'sid', are left out as a browser would.
+        """
+        if self.cache_file_path is None:
+            return
+
+        cookies = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure,
+                "expires": cookie.expires,
+            }
+            for cookie in self.session.cookies
+            if cookie.expires and cookie.domain.lstrip(".") == self.organization
+        ]
+
+        if not cookies:
+            return
+
+        cookie_file_path = self.get_cookie_file_path()
+        with open(
+            cookie_file_path, "w", encoding="utf-8", opener=open_private
+        ) as file:
+            json.dump(cookies, file)
+
+        os.chmod(cookie_file_path, 0o600)
+
+    def get_applications_file_path(self):
+        """Returns the file path for the application list cache file:
+        ~/.aws-okta-processor/cache/<username>-<organization>-applications.json
+        """
+        cache_directory = os.path.dirname(self.cache_file_path)
+        return os.path.join(
+            cache_directory, f"{self.user_name}-{self.organization}-applications.json"
+        )
+
+    def load_applications(self):
+        """
+        Reads the AWS applications cached by store_applications().
+
+        Returns:
+            dict: The 'applications' as a list of label and URL pairs, the
+            'etag' of the response they were read from and the 'time' it was
+            received at, or None if nothing usable is cached.
+        """
+        if self.cache_file_path is None or self.no_okta_cache:
+            return None
+
+        applications_file_path = self.get_applications_file_path()
+        if not os.path.isfile(applications_file_path):
+            return None
+
+        try:
+            with open(applications_file_path, encoding="utf-8") as file:
+                cached = json.load(file)
+        except ValueError:
+            return None
+
+        if not isinstance(cached, dict) or "applications" not in cached:
+            return None
+
+        return cached
+
+    def store_applications(self, applications=None, etag=None):
+        """
+        Caches the AWS applications of the user, readable by the current user only.
+
+        Parameters:
+            applications (OrderedDict): A mapping of application labels to their URLs.
+            etag (str): The ETag of the appLinks response, if any.
+        """
+        if self.cache_file_path is None:
+            return
+
+        applications_file_path = self.get_applications_file_path()
+        with open(
+            applications_file_path, "w", encoding="utf-8", opener=open_private
+        ) as file:
+            json.dump(
+                {
+                    "etag": etag,
+                    "time": time.time(),
+                    "applications": list(applications.items()),
+                },
+                file,
+            )
+
+        os.chmod(applications_file_path, 0o600)
+
     def get_okta_single_use_token(self, user_name=None, user_pass=None):
         """
         Authenticates the user and obtains a single-use Okta session token.
@@ -245,7 +543,29 @@ class Okta:  # pylint: disable=R0902
         state_token = response_json["stateToken"]
         factors = get_supported_factors(factors=response_json["_embedded"]["factors"])
 
+        if self.totp_provider is not None:
+            factor = get_seed_factor(factors=factors, key=self.factor)
+            if factor is not None:
+                if self.remember_device:
+                    factor.link = get_remember_device_link(link=factor.link)
+                return self.verify_seed_factor(factor=factor, state_token=state_token)
+
+            print_tty("No TOTP factor is enrolled for the TOTP seed.")
+
+        if self.factor and self.factor.startswith(FACTOR_RACE_PREFIX):
+            push, totp = get_race_factors(factors=factors, key=self.factor)
+            if push is not None and totp is not None:
+                if self.remember_device:
+                    push.link = get_remember_device_link(link=push.link)
+                    totp.link = get_remember_device_link(link=totp.link)
+                return self.race_factors(push=push, totp=totp, state_token=state_token)
+
+            print_tty("Push and TOTP factors are not both enrolled.")
+            self.factor = None
+
         factor = prompt.get_item(items=factors, label="Factor", key=self.factor)
+        if self.remember_device:
+            factor.link = get_remember_device_link(link=factor.link)
 
         return self.verify_factor(factor=factor, state_token=state_token)
 
@@ -260,6 +580,36 @@ class Okta:  # pylint: disable=R0902
         Returns:
             str: The Okta session token after successful MFA verification.
 
+        Raises:
+            SystemExit: If MFA verification fails.
+        """
+        json_payload = factor.payload()
+        json_payload.update({"stateToken": state_token})
+
+        response, response_json = self.poll_factor(
+            factor=factor, json_payload=json_payload
+        )
+
+        if "sessionToken" in response_json:
+            return response_json["sessionToken"]
+
+        return send_error(response=response)
+
+    def verify_seed_factor(self, factor=None, state_token=None):
+        """
+        Verifies a TOTP factor with passcodes of the TOTP provider.
+
+        A rejected passcode may have expired in flight, have been used by a
+        previous login or be ahead of Okta's clock, so it is retried once with
+        the passcode of the next window, waiting for it to start if needed.
+
+        Parameters:
+            factor (FactorTOTP): The TOTP factor.
+            state_token (str): The state token from Okta.
+
+        Returns:
+            str: The Okta session token after successful MFA verification.
+
         Raises:
             SystemExit: If MFA verification fails.
         """
@@ -269,29 +619,235 @@ class Okta:  # pylint: disable=R0902
             "Cache-Control": "no-cache",
         }
 
-        json_payload = factor.payload()
-        json_payload.update({"stateToken": state_token})
+        started = time.monotonic()
+        timestamp = time.time()
 
-        response = self.call(
-            endpoint=factor.link, headers=headers, json_payload=json_payload
+        for attempt in range(1, TOTP_ATTEMPTS + 1):
+            response = self.call(
+                endpoint=factor.link,
+                headers=headers,
+                json_payload={
+                    "stateToken": state_token,
+                    "passCode": self.totp_provider.get_passcode(timestamp=timestamp),
+                },
+            )
+
+            try:
+                response_json = response.json()
+            except ValueError:
+                return send_error(response=response, _json=False)
+
+            if "sessionToken" in response_json:
+                self.set_factor_metrics(
+                    factor=factor,
+                    result="SUCCESS",
+                    polls=attempt,
+                    latency=time.monotonic() - started,
+                )
+                return response_json["sessionToken"]
+
+            if response.status_code != 403:
+                break
+
+            timestamp = get_next_window(timestamp=timestamp)
+            if attempt < TOTP_ATTEMPTS:
+                wait = max(0, timestamp - time.time())
+                check_deadline(wait=wait)
+                time.sleep(wait)
+
+        return send_error(response=response)
+
+    def poll_factor(self, factor=None, json_payload=None, cancel=None):
+        """
+        Sends a factor verification and polls it while it is pending.
+
+        The delay between polls starts short and grows up to factor_poll_max,
+        unless Okta asks for a longer one with a Retry-After or rate limit
+        header. Polling gives up once the factor has been pending for
+        factor_timeout seconds.
+
+        Parameters:
+            factor (FactorBase): The MFA factor object.
+            json_payload (dict): The verification payload, with the state token.
+            cancel (threading.Event): If given, polling stops once the event is set.
+
+        Returns:
+            tuple: The last response and its JSON, or (None, None) if cancelled.
+
+        Raises:
+            SystemExit: If the response is invalid or the factor stays pending
+                for too long.
+        """
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Cache-Control": "no-cache",
+        }
+
+        link = factor.link
+        started = time.monotonic()
+        delay = FACTOR_POLL_INTERVAL
+        polls = 0
+
+        while True:
+            response = self.call(
+                endpoint=link, headers=headers, json_payload=json_payload
+            )
+            polls += 1
+
+            try:
+                response_json = response.json()
+            except ValueError:
+                return send_error(response=response, _json=False)
+
+            if response.status_code != 429:
+                if "sessionToken" in response_json or not factor.retry(response_json):
+                    self.set_factor_metrics(
+                        factor=factor,
+                        result=get_factor_result(response_json=response_json),
+                        polls=polls,
+                        latency=time.monotonic() - started,
+                    )
+                    return response, response_json
+
+                link = response_json["_links"]["next"]["href"]
+
+            wait = get_retry_delay(response=response, delay=delay)
+            if time.monotonic() - started + wait > self.factor_timeout:
+                self.set_factor_metrics(
+                    factor=factor,
+                    result="DEADLINE",
+                    polls=polls,
+                    latency=time.monotonic() - started,
+                )
+                message = (
+                    "Error: MFA was not verified within "
+                    f"{self.factor_timeout:g} seconds"
+                )
+                print_tty(message)
+                raise OktaError(message=message, status_code=response.status_code)
+
+            check_deadline(wait=wait)
+            if cancel is None:
+                time.sleep(wait)
+            elif cancel.wait(wait):
+                return None, None
+
+            delay = min(delay * FACTOR_POLL_BACKOFF, self.factor_poll_max)
+
+    def set_factor_metrics(self, factor=None, result=None, polls=None, latency=None):
+        """
+        Records and prints how long a factor took to verify.
+
+        Parameters:
+            factor (FactorBase): The MFA factor object.
+            result (str): The factor result, such as 'SUCCESS' or 'REJECTED'.
+            polls (int): The number of verification requests sent.
+            latency (float): Seconds from the first request to the result.
+        """
+        self.factor_metrics = {
+            "factor": factor.factor.value,
+            "result": result,
+            "polls": polls,
+            "latency": latency,
+        }
+        print_tty(
+            f"Info: MFA {result} after {latency:.1f}s and {polls} requests",
+            silent=self.silent,
         )
 
-        response_json = {}
+    def race_factors(self, push=None, totp=None, state_token=None):
+        """
+        Sends a push notification and reads a TOTP passcode at the same time,
+        using whichever verifies first.
+
+        The push is polled in a background thread; the passcode prompt stops
+        as soon as the push is approved, and polling stops as soon as a
+        passcode is accepted. A rejected push leaves the passcode prompt open.
+        A rejected passcode may be typed again, up to RACE_PASSCODE_ATTEMPTS
+        times; any other error ends the login.
+
+        Parameters:
+            push (FactorPush): The push factor.
+            totp (FactorTOTP): The TOTP factor.
+            state_token (str): The state token from Okta.
+
+        Returns:
+            str: The Okta session token.
+
+        Raises:
+            SystemExit: If the passcodes are rejected and the push is not
+                approved.
+        """
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Cache-Control": "no-cache",
+        }
+        done = threading.Event()
+        push_token = []
+
+        def poll_push():
+            try:
+                _, response_json = self.poll_factor(
+                    factor=push,
+                    json_payload={"stateToken": state_token},
+                    cancel=done,
+                )
+            except (SystemExit, Exception):  # pylint: disable=W0718
+                response_json = None
+
+            if response_json is not None and "sessionToken" in response_json:
+                push_token.append(response_json["sessionToken"])
+                done.set()
+            elif not done.is_set():
+                print_tty("Push was not approved, enter the token.")
+
+        poller = threading.Thread(target=hooks.bind_hooks(poll_push), daemon=True)
+        poller.start()
 
         try:
-            response_json = response.json()
-        except ValueError:
-            return send_error(response=response, _json=False)
+            for attempt in range(1, RACE_PASSCODE_ATTEMPTS + 1):
+                passcode = get_passcode(
+                    factor=FactorType.TOTP,
+                    prompt="Token (or approve the push): ",
+                    cancel=done,
+                )
 
-        if "sessionToken" in response_json:
-            return response_json["sessionToken"]
+                if passcode is None:
+                    # The push was approved while waiting for the passcode
+                    print_tty()
+                    return push_token[0]
 
-        if factor.retry(response_json):
-            factor.link = response_json["_links"]["next"]["href"]
-            time.sleep(1)
-            return self.verify_factor(factor=factor, state_token=state_token)
+                response = self.call(
+                    endpoint=totp.link,
+                    headers=headers,
+                    json_payload={"stateToken": state_token, "passCode": passcode},
+                )
 
-        return send_error(response=response)
+                try:
+                    response_json = response.json()
+                except ValueError:
+                    return send_error(response=response, _json=False)
+
+                if "sessionToken" in response_json:
+                    return response_json["sessionToken"]
+
+                if push_token:
+                    return push_token[0]
+
+                if (
+                    response_json.get("errorCode", None) != OKTA_INVALID_PASSCODE
+                    or attempt == RACE_PASSCODE_ATTEMPTS
+                ):
+                    # Other errors, like an expired state token or a locked
+                    # out user, would repeat for any passcode
+                    return send_error(response=response)
+
+                send_error(response=response, _exit=False)
+        finally:
+            # Stops polling; a request in flight is left to finish on its own
+            done.set()
 
     def create_and_store_okta_session(self):
         """
@@ -316,6 +872,7 @@ class Okta:  # pylint: disable=R0902
             response_json = response.json()
             self.okta_session_id = response_json["id"]
             self.set_okta_session(okta_session=response_json)
+            self.store_cookies()
         except KeyError:
             send_error(response=response)
         except ValueError:
@@ -331,11 +888,7 @@ class Okta:  # pylint: disable=R0902
         Raises:
             SystemExit: If session refresh fails.
         """
-        session_expires = dateutil.parser.parse(okta_session["expiresAt"])
-
-        if datetime.datetime.now(UTC()) < (
-            session_expires - datetime.timedelta(seconds=30)
-        ):
+        if not okta_session_expired(okta_session=okta_session):
             headers = {
                 "Cookie": f"sid={okta_session['id']}",
                 "Accept": "application/json",
@@ -358,13 +911,37 @@ class Okta:  # pylint: disable=R0902
             except ValueError:
                 send_error(response=response, _json=False, _exit=False)
 
+    def refresh_deferred_okta_session(self):
+        """
+        Refreshes the cached session whose refresh was deferred, if any.
+
+        Like a refresh at creation, a failed refresh keeps the cached session ID;
+        the session gets replaced once Okta no longer accepts it.
+        """
+        okta_session = self.deferred_okta_session
+        self.deferred_okta_session = None
+
+        if okta_session is not None:
+            self.refresh_okta_session_id(okta_session=okta_session)
+
     def get_applications(self):
         """
         Retrieves the list of Okta applications for the user.
 
+        Only the AWS applications are kept, and cached per user and
+        organization. The cached list is revalidated with its ETag, so that an
+        unchanged list is not downloaded again, or used for APPLICATIONS_TTL
+        seconds if Okta sent no ETag.
+
         Returns:
             OrderedDict: A mapping of application labels to their URLs.
         """
+        cached = self.load_applications()
+        etag = cached.get("etag", None) if cached else None
+
+        if cached and not etag and time.time() - cached["time"] < APPLICATIONS_TTL:
+            return OrderedDict(cached["applications"])
+
         applications = OrderedDict()
 
         headers = {
@@ -372,16 +949,38 @@ class Okta:  # pylint: disable=R0902
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
+        if etag:
+            headers["If-None-Match"] = etag
 
         response = self.call(
-            endpoint=OKTA_APPLICATIONS_URL.format(self.organization), headers=headers
+            endpoint=OKTA_APPLICATIONS_URL.format(self.organization),
+            headers=headers,
+            stream=True,
         )
 
-        for application in response.json():
-            if application["appName"] == "amazon_aws":
-                label = application["label"].rstrip()
-                link_url = application["linkUrl"]
-                applications[label] = link_url
+        if etag and response.status_code == 304:
+            return OrderedDict(cached["applications"])
+
+        if response.status_code != 200:
+            send_error(response=response)
+
+        # Users may be assigned hundreds of applications; they are read one
+        # at a time and only the AWS ones are kept
+        chunks = response.iter_content(chunk_size=APPLICATIONS_CHUNK_SIZE)
+        try:
+            for application in iter_json_array(chunks=chunks):
+                if application["appName"] == "amazon_aws":
+                    label = application["label"].rstrip()
+                    link_url = application["linkUrl"]
+                    applications[label] = link_url
+        except (KeyError, TypeError, ValueError):
+            send_error(response=response, _json=False)
+        finally:
+            response.close()
+
+        self.store_applications(
+            applications=applications, etag=response.headers.get("ETag", None)
+        )
 
         return applications
 
@@ -401,7 +1000,7 @@ class Okta:  # pylint: disable=R0902
 
         return response.content.decode()
 
-    def call(self, endpoint=None, headers=None, json_payload=None):
+    def call(self, endpoint=None, headers=None, json_payload=None, stream=False):
         """
         Makes an HTTP GET or POST request to the specified endpoint.
 
@@ -409,30 +1008,153 @@ class Okta:  # pylint: disable=R0902
             endpoint (str): The URL to send the request to.
             headers (dict): The HTTP headers to include in the request.
             json_payload (dict): The JSON payload for POST requests.
+            stream (bool): If True, the body of a GET response is left to be
+                read with Response.iter_content().
+
+        Requests wait for the Okta rate limit of their endpoint, if it has been
+        used up, and a 429 response is retried once the limit is reset, as long
+        as that is within RATE_LIMIT_MAX_WAIT seconds. Transient failures are
+        retried as self.retry_policy allows.
 
         Returns:
             Response: The HTTP response object.
 
         Raises:
+            DeadlineError: If the request timed out at the deadline.
             SystemExit: If a connection error or timeout occurs.
         """
         print_tty(f"Info: Calling {endpoint}", silent=self.silent)
 
-        try:
-            if json_payload is not None:
-                return self.session.post(
-                    endpoint, json=json_payload, headers=headers, timeout=10
+        for attempt in range(RATE_LIMIT_ATTEMPTS):
+            wait = self.rate_limiter.acquire(url=endpoint)
+            while 0 < wait <= RATE_LIMIT_MAX_WAIT:
+                print_tty(
+                    f"Info: Waiting {wait:.1f}s for the Okta rate limit",
+                    silent=self.silent,
                 )
+                check_deadline(wait=wait)
+                time.sleep(wait)
+                wait = self.rate_limiter.acquire(url=endpoint)
+
+            try:
+                if json_payload is not None:
+                    response = self.retry_policy.request(
+                        self.session,
+                        "POST",
+                        endpoint,
+                        json=json_payload,
+                        headers=headers,
+                        timeout=10,
+                    )
+                else:
+                    response = self.retry_policy.request(
+                        self.session,
+                        "GET",
+                        endpoint,
+                        headers=headers,
+                        timeout=10,
+                        stream=stream,
+                    )
+
+            except requests.Timeout:
+                # A request given the time left reports the phase that used
+                # it up
+                check_deadline()
+                print_tty("Error: Timed Out")
+                sys.exit(1)
+
+            except requests.ConnectionError:
+                print_tty("Error: Connection Error")
+                sys.exit(1)
+
+            self.rate_limiter.update(url=endpoint, response=response)
+
+            if response.status_code != 429 or attempt == RATE_LIMIT_ATTEMPTS - 1:
+                break
+
+            wait = get_retry_delay(response=response, delay=FACTOR_POLL_INTERVAL)
+            if wait > RATE_LIMIT_MAX_WAIT:
+                break
+
+            print_tty(
+                f"Info: Rate limited by Okta, retrying in {wait:.1f}s",
+                silent=self.silent,
+            )
+            check_deadline(wait=wait)
+            time.sleep(wait)
+
+        return response
+
+
+def okta_session_expired(okta_session=None):
+    """
+    Checks whether an Okta session expires within the next 30 seconds.
+
+    Parameters:
+        okta_session (dict): The Okta session data.
 
-            return self.session.get(endpoint, headers=headers, timeout=10)
+    Returns:
+        bool: True if the session cannot be refreshed anymore.
+    """
+    session_expires = dateutil.parser.parse(okta_session["expiresAt"])
+
+    return datetime.datetime.now(UTC()) >= (
+        session_expires - datetime.timedelta(seconds=30)
+    )
 
-        except requests.ConnectTimeout:
-            print_tty("Error: Timed Out")
-            sys.exit(1)
 
-        except requests.ConnectionError:
-            print_tty("Error: Connection Error")
-            sys.exit(1)
+def get_cached_sessions(cache_directory=None, user_name=None, organization=None):
+    """
+    Indexes the valid Okta sessions cached in a directory by user name and
+    organization, the most recently used first.
+
+    Sessions are written to their cache file whenever they are created or
+    refreshed, so the file's modification time tells when one was last used.
+
+    Parameters:
+        cache_directory (str): The directory of the session cache files.
+        user_name (str): If given, only sessions of this user are indexed.
+        organization (str): If given, only sessions of this organization are
+            indexed.
+
+    Returns:
+        OrderedDict: A mapping of (user name, organization) tuples to the
+        paths of their cache files.
+    """
+    sessions = []
+
+    for file_name in os.listdir(cache_directory):
+        if not file_name.endswith(SESSION_FILE_SUFFIX):
+            continue
+
+        path = os.path.join(cache_directory, file_name)
+        try:
+            with open(path, encoding="utf-8") as file:
+                okta_session = json.load(file)
+            aop_options = okta_session["aws-okta-processor"]
+            login = (aop_options["user_name"], aop_options["organization"])
+            expired = okta_session_expired(okta_session=okta_session)
+            used = os.path.getmtime(path)
+        except (OSError, ValueError, KeyError, TypeError, OverflowError):
+            # Unreadable, or written by another version
+            continue
+
+        if expired or not all(login):
+            continue
+        if user_name and login[0] != user_name:
+            continue
+        if organization and login[1] != organization:
+            continue
+
+        sessions.append((used, login, path))
+
+    index = OrderedDict()
+    for _, login, path in sorted(sessions, reverse=True):
+        # A session cached before its user and organization were known may
+        # linger in 'None-None-session.json'; the latest file wins
+        index.setdefault(login, path)
+
+    return index
 
 
 def get_supported_factors(factors=None):
@@ -461,6 +1183,185 @@ def get_supported_factors(factors=None):
     return matching_factors
 
 
+def get_retry_delay(response=None, delay=None):
+    """
+    Returns the delay before the next poll, honouring Okta's rate limit headers.
+
+    Parameters:
+        response (Response): The last HTTP response.
+        delay (float): The delay of the polling backoff in seconds.
+
+    Returns:
+        float: The number of seconds to wait; the backoff delay if the headers
+        cannot be parsed.
+    """
+    retry_after = response.headers.get("Retry-After", None)
+    if retry_after:
+        try:
+            return max(delay, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return delay
+
+        if retry_at.tzinfo is None:
+            # A '-0000' zone gives a naive date; HTTP dates are in UTC
+            retry_at = retry_at.replace(tzinfo=UTC())
+        return max(delay, (retry_at - datetime.datetime.now(UTC())).total_seconds())
+
+    reset = response.headers.get("X-Rate-Limit-Reset", None)
+    remaining = response.headers.get("X-Rate-Limit-Remaining", None)
+    if reset and (remaining == "0" or response.status_code == 429):
+        try:
+            return max(delay, float(reset) - time.time())
+        except ValueError:
+            return delay
+
+    return delay
+
+
+def get_factor_result(response_json=None):
+    """
+    Returns the result of a finished factor verification.
+
+    A rejected passcode gets an error response without a 'factorResult'.
+
+    Parameters:
+        response_json (dict): The JSON of the last verification response.
+
+    Returns:
+        str: 'SUCCESS' with a session token, else the factor result, the Okta
+        error code or 'REJECTED'.
+    """
+    if "sessionToken" in response_json:
+        return "SUCCESS"
+
+    return (
+        response_json.get("factorResult", None)
+        or response_json.get("errorCode", None)
+        or "REJECTED"
+    )
+
+
+def get_race_factors(factors=None, key=None):
+    """
+    Finds the push and TOTP factors to race for a 'push+' factor key.
+
+    Parameters:
+        factors (OrderedDict): The supported factors by key.
+        key (str): 'push+totp' for the first TOTP factor, or 'push+' followed
+            by the key of a TOTP factor.
+
+    Returns:
+        tuple: The push and TOTP factors, None for those not enrolled.
+    """
+    push = None
+    totp = None
+    totp_key = key[len(FACTOR_RACE_PREFIX) :]
+
+    for factor_key, factor in factors.items():
+        if factor.factor == FactorType.PUSH and push is None:
+            push = factor
+        elif factor.factor == FactorType.TOTP and totp is None:
+            if key == FACTOR_RACE or factor_key == totp_key:
+                totp = factor
+
+    return push, totp
+
+
+def get_seed_factor(factors=None, key=None):
+    """
+    Finds the TOTP factor to verify with a TOTP seed.
+
+    Parameters:
+        factors (OrderedDict): The supported factors by key.
+        key (str): The configured factor key, if any.
+
+    Returns:
+        FactorTOTP: The TOTP factor of the key, or the first TOTP factor if the
+        key is not one; None if no TOTP factor is enrolled.
+    """
+    totp_factors = [
+        (factor_key, factor)
+        for factor_key, factor in factors.items()
+        if factor.factor == FactorType.TOTP
+    ]
+
+    for factor_key, factor in totp_factors:
+        if factor_key == key:
+            return factor
+
+    if totp_factors:
+        return totp_factors[0][1]
+
+    return None
+
+
+def get_remember_device_link(link=None):
+    """
+    Adds the option to remember the device to a factor verification link.
+
+    Parameters:
+        link (str): The verification link of a factor.
+
+    Returns:
+        str: The link with the 'rememberDevice' query parameter.
+    """
+    separator = "&" if "?" in link else "?"
+    return f"{link}{separator}rememberDevice=true"
+
+
+def open_private(path=None, flags=None):
+    """Opens a file for open(opener=...), creating it readable by its owner only."""
+    return os.open(path, flags, 0o600)
+
+
+def get_password():
+    """
+    Prompts for the Okta password, unless a 'password' hook answers instead.
+
+    Returns:
+        str: The password.
+    """
+    password = hooks.get_hook("password")
+    if password is not None:
+        return password()
+
+    check_prompt()
+    with prompting():
+        return getpass.getpass("Password: ")
+
+
+def get_passcode(factor=None, prompt=None, cancel=None):
+    """
+    Prompts for an MFA passcode, unless a 'passcode' hook answers instead.
+
+    Parameters:
+        factor (FactorType): The type of the factor being verified.
+        prompt (str): The terminal prompt.
+        cancel (threading.Event): If given, the prompt echoes the passcode and
+            stops waiting once the event is set.
+
+    Returns:
+        str: The passcode, or None if the prompt was cancelled.
+    """
+    passcode = hooks.get_hook("passcode")
+    if passcode is not None:
+        return passcode(factor)
+
+    if cancel is None:
+        check_prompt()
+        with prompting():
+            return getpass.getpass(prompt)
+
+    with prompting():
+        print_tty(string=prompt, newline=False)
+        return input_tty(cancel=cancel)
+
+
 def send_error(response=None, _json=True, _exit=True):
     """
     Handles and prints error messages from HTTP responses.
@@ -472,22 +1373,56 @@ def send_error(response=None, _json=True, _exit=True):
 
     Returns:
         None
+
+    Raises:
+        OktaError: If _exit is True.
     """
-    print_tty(f"Error: Status Code: {response.status_code}")
+    messages = [f"Error: Status Code: {response.status_code}"]
+    error_code = None
+
+    if response.status_code == 429:
+        wait = get_retry_delay(response=response, delay=0)
+        messages.append(f"Error: Okta rate limit exceeded, retry in {wait:.0f}s")
 
     if _json:
         response_json = response.json()
 
         if "status" in response_json:
-            print_tty(f"Error: Status: {response_json['status']}")
+            messages.append(f"Error: Status: {response_json['status']}")
 
         if "errorSummary" in response_json:
-            print_tty(f"Error: Summary: {response_json['errorSummary']}")
+            messages.append(f"Error: Summary: {response_json['errorSummary']}")
+
+        error_code = response_json.get("errorCode", None)
     else:
-        print_tty("Error: Invalid JSON")
+        messages.append("Error: Invalid JSON")
+
+    for message in messages:
+        print_tty(message)
 
     if _exit:
-        sys.exit(1)
+        raise OktaError(
+            message="\n".join(messages),
+            status_code=response.status_code,
+            error_code=error_code,
+        )
+
+
+class OktaError(SystemExit):
+    """
+    Exits with status 1 after an Okta error response has been printed.
+
+    Attributes:
+        message (str): The error message that was printed.
+        status_code (int): The HTTP status code of the response.
+        error_code (str): The Okta error code of the response, if any.
+    """
+
+    def __init__(self, message=None, status_code=None, error_code=None):
+        super().__init__(1)
+        self.message = message
+        self.status_code = status_code
+        self.error_code = error_code
 
 
 class FactorType(str, Enum):  # pylint: disable=R0903
@@ -607,7 +1542,7 @@ class FactorTOTP(FactorBase):
         Returns:
             dict: The payload containing the passcode.
         """
-        return {"passCode": getpass.getpass("Token: ")}
+        return {"passCode": get_passcode(factor=FactorType.TOTP, prompt="Token: ")}
 
     def retry(self, response):
         """
@@ -640,7 +1575,11 @@ class FactorHardwareToken(FactorBase):
         Returns:
             dict: The payload containing the passcode.
         """
-        return {"passCode": getpass.getpass("Hardware Token: ")}
+        return {
+            "passCode": get_passcode(
+                factor=FactorType.HARDWARE, prompt="Hardware Token: "
+            )
+        }
 
     def retry(self, response):
         """
@@ -0,0 +1,260 @@
+"""
+This module keeps Okta sessions, pooled HTTP connections and decoded AWS
+credentials in memory, so that long-lived processes answer repeated requests
+without re-reading caches or re-opening connections.
+"""
+
+import json
+import threading
+import time
+
+from collections import OrderedDict
+
+import requests  # type: ignore[import-untyped]
+
+from aws_okta_processor.core.fetcher import SAMLFetcher
+from aws_okta_processor.core.saml import AccountRoleCache
+
+
+class MemoryCache:
+    """
+    A dict-like cache keeping decoded entries in memory, optionally in front
+    of another cache such as botocore's JSONFileCache.
+
+    Entries read from the backing cache are kept in memory; writes go to both.
+    """
+
+    def __init__(self, cache=None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache: An optional dict-like cache to read from and write through to.
+        """
+        self._cache = cache
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, cache_key):
+        with self._lock:
+            if cache_key in self._entries:
+                return True
+
+        return self._cache is not None and cache_key in self._cache
+
+    def __getitem__(self, cache_key):
+        with self._lock:
+            if cache_key in self._entries:
+                return self._entries[cache_key]
+
+        if self._cache is None:
+            raise KeyError(cache_key)
+
+        value = self._cache[cache_key]
+        with self._lock:
+            self._entries[cache_key] = value
+
+        return value
+
+    def __setitem__(self, cache_key, value):
+        if self._cache is not None:
+            self._cache[cache_key] = value
+
+        with self._lock:
+            self._entries[cache_key] = value
+
+    def __delitem__(self, cache_key):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+        if self._cache is not None and cache_key in self._cache:
+            del self._cache[cache_key]
+
+
+class CredentialPool:
+    """
+    Serves AWS credentials for many commands from shared in-memory state.
+
+    Okta sessions are kept per organization and user, all of them share one
+    HTTP session and its connection pool, and concurrent requests for the same
+    credentials wait on a single refresh.
+    """
+
+    def __init__(self, cache=None, session=None, persist=True, account_role_cache=None):
+        """
+        Initialize the pool.
+
+        Args:
+            cache: An optional dict-like cache backing the in-memory credentials.
+            session (requests.Session): An optional HTTP session to share.
+            persist (bool): If False, Okta sessions are kept in memory only.
+            account_role_cache (AccountRoleCache): An optional cache of the AWS sign-in page.
+        """  # noqa: E501
+        self.cache = MemoryCache(cache=cache)
+        self.session = session or requests.Session()
+        self.persist = persist
+        self.account_role_cache = account_role_cache
+        self.oktas = {}
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def get_lock(self, key=None):
+        """
+        Returns the lock serializing refreshes of the given key.
+
+        Args:
+            key: A hashable key identifying credentials or an Okta session.
+
+        Returns:
+            threading.Lock: The lock for the key.
+        """
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def get_fetcher(self, authenticate=None):
+        """
+        Creates a fetcher sharing this pool's cache, HTTP session and Okta session.
+
+        Args:
+            authenticate: An authentication object such as an 'Authenticate' command.
+
+        Returns:
+            SAMLFetcher: The fetcher.
+        """  # noqa: E501
+        okta_key = get_okta_key(authenticate.configuration)
+
+        return SAMLFetcher(
+            authenticate,
+            cache=self.cache,
+            okta=self.oktas.get(okta_key, None),
+            session=self.session,
+            persist=self.persist,
+            account_role_cache=self.account_role_cache,
+        )
+
+    def fetch_credentials(self, authenticate=None, refresh_within=None):
+        """
+        Fetches AWS credentials, from memory when they are still fresh.
+
+        Args:
+            authenticate: An authentication object such as an 'Authenticate' command.
+            refresh_within (int): Optionally refresh credentials expiring within this
+                many seconds, even if they are not due for refresh yet.
+
+        Returns:
+            dict: A dictionary containing AWS credentials and expiration time.
+        """  # noqa: E501
+        okta_key = get_okta_key(authenticate.configuration)
+        key_string = json.dumps(authenticate.get_key_dict(), sort_keys=True)
+
+        def fetch():
+            fetcher = self.get_fetcher(authenticate=authenticate)
+            if refresh_within is not None and fetcher.expires_within(refresh_within):
+                fetcher.refresh()
+            credentials = fetcher.fetch_credentials()
+
+            if fetcher.okta is not None:
+                self.oktas[okta_key] = fetcher.okta
+
+            return credentials
+
+        with self.get_lock(key_string):
+            if okta_key in self.oktas:
+                return fetch()
+
+            # Log in to Okta only once when several roles refresh at once
+            with self.get_lock(okta_key):
+                return fetch()
+
+
+class UserPools:
+    """
+    Keeps an isolated, memory-only credential pool per local user.
+
+    Every pool has its own HTTP session, and so its own cookies, but all of
+    them send requests through one shared connection pool and share the
+    account names of the AWS sign-in page. The least recently used pools are
+    dropped beyond 'max_users', and idle ones after 'idle_timeout' seconds.
+    """
+
+    def __init__(self, max_users=256, idle_timeout=3600):
+        """
+        Initialize the pools.
+
+        Args:
+            max_users (int): The maximum number of users kept in memory.
+            idle_timeout (int): Seconds after which an unused pool is dropped.
+        """
+        self.max_users = max_users
+        self.idle_timeout = idle_timeout
+        self.adapter = requests.adapters.HTTPAdapter()
+        self.account_role_cache = AccountRoleCache()
+        self._pools = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pools)
+
+    def get_pool(self, uid=None):
+        """
+        Returns the credential pool of a user, creating it if needed.
+
+        Args:
+            uid (int): The user ID of the caller.
+
+        Returns:
+            CredentialPool: The pool of the user.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if uid in self._pools:
+                pool, _ = self._pools.pop(uid)
+            else:
+                session = requests.Session()
+                session.mount("https://", self.adapter)
+                session.mount("http://", self.adapter)
+                pool = CredentialPool(
+                    session=session,
+                    persist=False,
+                    account_role_cache=self.account_role_cache,
+                )
+
+            self._pools[uid] = (pool, now)
+            self._evict(now=now)
+
+        return pool
+
+    def evict(self):
+        """Drops the pools that have been idle for too long."""
+        with self._lock:
+            self._evict(now=time.monotonic())
+
+    def _evict(self, now=None):
+        while len(self._pools) > self.max_users:
+            self._pools.popitem(last=False)
+
+        while self._pools:
+            _, (_, last_used) = next(iter(self._pools.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            self._pools.popitem(last=False)
+
+
+def get_okta_key(configuration=None):
+    """
+    Returns the key under which the Okta session of a configuration is kept.
+
+    Args:
+        configuration (dict): A command configuration.
+
+    Returns:
+        tuple: The organization and user of the configuration.
+    """
+    return (
+        configuration.get("AWS_OKTA_ORGANIZATION", None),
+        configuration.get("AWS_OKTA_USER", None),
+    )
@@ -4,7 +4,8 @@ import sys
 from collections.abc import Mapping
 
 import six  # type: ignore[import-untyped]
-from aws_okta_processor.core.tty import print_tty, input_tty
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.tty import print_tty, input_tty, prompting
 
 
 def get_item(items=None, label=None, key=None):
@@ -39,9 +40,14 @@ def get_item(items=None, label=None, key=None):
 
     # If there are multiple items, prompt user to select one
     if get_deep_length(items=items) > 1:
-        print_tty(f"Select {label}:")
-        options = get_options(items=items)
-        return get_selection(options=options)
+        select = hooks.get_hook("select")
+        if select is not None:
+            return get_hooked_selection(items=items, label=label, select=select)
+
+        with prompting():
+            print_tty(f"Select {label}:")
+            options = get_options(items=items)
+            return get_selection(options=options)
 
     # Return single item value if only one exists
     return get_deep_value(items=items)
@@ -107,6 +113,54 @@ def get_deep_value(items=None, key=None, results=None):
     return None
 
 
+def get_hooked_selection(items=None, label=None, select=None):
+    """
+    Asks a 'select' hook to pick one of the items.
+
+    Args:
+        items (dict): Dictionary with nested dictionaries.
+        label (str): Descriptive label of the items.
+        select (callable): Called with the label and the keys of the items.
+
+    Returns:
+        object: The item of the selected key.
+
+    Exits:
+        If the hook returns a key that is not among the items.
+    """
+    keys = get_deep_keys(items=items)
+    key = select(label, keys)
+
+    if key not in keys:
+        print_tty(f"ERROR: {label} {key} not found!")
+        sys.exit(1)
+
+    return get_deep_value(items=items, key=key)
+
+
+def get_deep_keys(items=None, keys=None):
+    """
+    Recursively collects the keys of the non-dictionary items of a nested dictionary.
+
+    Args:
+        items (dict): Dictionary with nested dictionaries.
+        keys (list, optional): Accumulated keys from recursive calls.
+
+    Returns:
+        list: The keys, in order.
+    """
+    if keys is None:
+        keys = []
+
+    for item_key, item_value in six.iteritems(items):
+        if isinstance(item_value, Mapping):
+            get_deep_keys(items=item_value, keys=keys)
+        else:
+            keys.append(item_key)
+
+    return keys
+
+
 def get_selection(options=None):
     """
     Prompts the user to select an option from a list.
@@ -0,0 +1,242 @@
+"""
+This module paces requests to Okta by the rate limits it reports.
+
+Okta limits the requests of an organization per endpoint and reports the quota
+left in the 'X-Rate-Limit-Limit', 'X-Rate-Limit-Remaining' and
+'X-Rate-Limit-Reset' headers of every response. The quota is kept as a token
+bucket per endpoint: each request takes a token, and once none is left requests
+wait for the bucket to be refilled at the reset time. A bucket kept in a file
+is shared by every process of the user, which take turns through a file lock.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Windows: processes do not share a lock and may overdraw the quota
+    fcntl = None  # type: ignore[assignment]
+
+# Okta endpoints with a rate limit of their own, most specific first
+# https://developer.okta.com/docs/reference/rl-global-enduser/
+RATE_LIMITED_PATHS = (
+    "/api/v1/authn/factors",
+    "/api/v1/authn",
+    "/api/v1/sessions",
+    "/api/v1/users/me",
+    "/api/v1/apps",
+    "/app",
+)
+
+
+def get_rate_limit_key(url=None):
+    """
+    Returns the rate limit bucket of a URL.
+
+    Args:
+        url (str): The URL of a request to Okta.
+
+    Returns:
+        str: The host and the rate-limited path prefix of the URL, like
+        'organization.okta.com/api/v1/authn'.
+    """
+    parts = urlsplit(url)
+
+    for path in RATE_LIMITED_PATHS:
+        if parts.path == path or parts.path.startswith(path + "/"):
+            return parts.netloc + path
+
+    return parts.netloc + parts.path
+
+
+def get_rate_limit(response=None):
+    """
+    Reads the rate limit headers of a response.
+
+    Args:
+        response (Response): The HTTP response.
+
+    Returns:
+        dict or None: The 'limit', 'remaining' and 'reset' time, or None if the
+        response has no valid rate limit headers.
+    """
+    try:
+        return {
+            "limit": int(response.headers.get("X-Rate-Limit-Limit", 0)),
+            "remaining": int(response.headers["X-Rate-Limit-Remaining"]),
+            "reset": float(response.headers["X-Rate-Limit-Reset"]),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token buckets of the Okta rate limits, in memory or in a file.
+
+    Attributes:
+        path (str): The file the buckets are kept in, or None for memory only.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            path (str): The file to keep the buckets in, shared with other
+                processes. The buckets are kept in memory if None.
+        """
+        self.path = path
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Holds the buckets for the current thread and process."""
+        with self._lock:
+            if self.path is None:
+                yield
+                return
+
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            with open(self.path + ".lock", "a", encoding="utf-8") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read(self):
+        """
+        Reads the buckets whose quota has not been reset yet.
+
+        Returns:
+            dict: The buckets by rate limit key.
+        """
+        buckets = self._buckets
+
+        if self.path is not None:
+            try:
+                with open(self.path, encoding="utf-8") as file:
+                    buckets = json.load(file)
+            except (OSError, ValueError):
+                buckets = {}
+
+        now = time.time()
+        return {
+            key: bucket for key, bucket in buckets.items() if bucket["reset"] > now
+        }
+
+    def write(self, buckets=None):
+        """
+        Saves the buckets, in a file readable by the current user only.
+
+        Args:
+            buckets (dict): The buckets by rate limit key.
+        """
+        if self.path is None:
+            self._buckets = buckets
+            return
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        with open(os.open(self.path, flags, 0o600), "w", encoding="utf-8") as file:
+            json.dump(buckets, file)
+
+    def acquire(self, url=None):
+        """
+        Takes a token from the bucket of a URL, if one is left.
+
+        Args:
+            url (str): The URL about to be requested.
+
+        Returns:
+            float: 0 if a token was taken or the quota is unknown, otherwise
+            the seconds until the bucket is refilled.
+        """
+        if self.path is not None and not os.path.isfile(self.path):
+            # No limit was reported yet
+            return 0
+
+        key = get_rate_limit_key(url=url)
+
+        with self.locked():
+            buckets = self.read()
+            bucket = buckets.get(key, None)
+
+            if bucket is None:
+                return 0
+
+            if bucket["remaining"] <= 0:
+                return max(0, bucket["reset"] - time.time())
+
+            bucket["remaining"] -= 1
+            self.write(buckets=buckets)
+
+        return 0
+
+    def update(self, url=None, response=None):
+        """
+        Refills the bucket of a URL with the quota reported by a response.
+
+        Args:
+            url (str): The URL that was requested.
+            response (Response): Its response.
+        """
+        rate_limit = get_rate_limit(response=response)
+        if rate_limit is None:
+            return
+
+        if response.status_code == 429:
+            rate_limit["remaining"] = 0
+
+        key = get_rate_limit_key(url=url)
+
+        with self.locked():
+            buckets = self.read()
+            buckets[key] = rate_limit
+            self.write(buckets=buckets)
+
+
+def get_rate_limit_path():
+    """Returns the file path of the shared rate limits:
+    ~/.aws-okta-processor/cache/rate-limits.json
+    """
+    home_directory = os.path.expanduser("~")
+    return os.path.join(
+        home_directory, ".aws-okta-processor", "cache", "rate-limits.json"
+    )
+
+
+_RATE_LIMITERS = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(persist=True):
+    """
+    Returns the rate limiter shared by the Okta clients of the process.
+
+    Args:
+        persist (bool): If True, the rate limits are also shared with other
+            processes through the cache directory.
+
+    Returns:
+        RateLimiter: The rate limiter.
+    """
+    path = get_rate_limit_path() if persist else None
+
+    with _RATE_LIMITERS_LOCK:
+        if path not in _RATE_LIMITERS:
+            _RATE_LIMITERS[path] = RateLimiter(path=path)
+
+        return _RATE_LIMITERS[path]
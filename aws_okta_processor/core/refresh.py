@@ -0,0 +1,124 @@
+"""
+This module provides the policies deciding how long before expiry cached AWS
+credentials get refreshed.
+"""
+
+import hashlib
+import socket
+
+# Defaults for the adaptive refresh policy
+DEFAULT_REFRESH_FRACTION = 0.1
+DEFAULT_REFRESH_JITTER = 0.5
+DEFAULT_MINIMUM_WINDOW = 60
+DEFAULT_MAXIMUM_WINDOW = 900
+
+
+class FixedRefreshPolicy:  # pylint: disable=R0903
+    """
+    Refreshes credentials a fixed number of seconds before they expire.
+
+    Attributes:
+        window (int): The refresh window in seconds.
+    """
+
+    def __init__(self, window=600):
+        self.window = window
+
+    def get_window(self, duration=None, key=None):  # pylint: disable=W0613
+        """
+        Returns the refresh window.
+
+        Args:
+            duration (int): The issued duration of the credentials in seconds.
+            key (str): The cache key of the credentials.
+
+        Returns:
+            float: The number of seconds before expiry to refresh.
+        """
+        return self.window
+
+
+class RefreshPolicy:  # pylint: disable=R0903
+    """
+    Refreshes credentials a fraction of their issued duration before they
+    expire, spread out per host so that hosts sharing a role don't refresh
+    at the same instant.
+
+    Attributes:
+        fraction (float): The fraction of the issued duration used as window.
+        jitter (float): The maximum extension of the window, as a fraction of it.
+        minimum (int): The lower bound of the window in seconds.
+        maximum (int): The upper bound of the window in seconds, before jitter.
+        seed (str): The per-host seed of the jitter, the host name by default.
+    """
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        fraction=DEFAULT_REFRESH_FRACTION,
+        jitter=DEFAULT_REFRESH_JITTER,
+        minimum=DEFAULT_MINIMUM_WINDOW,
+        maximum=DEFAULT_MAXIMUM_WINDOW,
+        seed=None,
+    ):
+        self.fraction = fraction
+        self.jitter = jitter
+        self.minimum = minimum
+        self.maximum = maximum
+        self.seed = seed if seed is not None else socket.gethostname()
+
+    def get_window(self, duration=None, key=None):
+        """
+        Returns the refresh window for credentials of the given duration.
+
+        The window never exceeds half of the issued duration.
+
+        Args:
+            duration (int): The issued duration of the credentials in seconds.
+            key (str): The cache key of the credentials.
+
+        Returns:
+            float: The number of seconds before expiry to refresh.
+        """
+        window = min(max(duration * self.fraction, self.minimum), self.maximum)
+        window += window * self.jitter * self.get_offset(key=key)
+
+        return min(window, duration / 2)
+
+    def get_offset(self, key=None):
+        """
+        Returns a stable pseudo-random offset for this host and cache key.
+
+        Args:
+            key (str): The cache key of the credentials.
+
+        Returns:
+            float: A value in the range [0, 1).
+        """
+        digest = hashlib.sha1(f"{self.seed}:{key}".encode()).hexdigest()
+        return int(digest[:8], 16) / float(0x100000000)
+
+
+def get_refresh_policy(configuration=None):
+    """
+    Builds the refresh policy described by a command configuration.
+
+    A configured refresh window selects a fixed policy; otherwise the adaptive
+    policy is used with the configured fraction and jitter.
+
+    Args:
+        configuration (dict): The command configuration.
+
+    Returns:
+        FixedRefreshPolicy or RefreshPolicy: The refresh policy.
+    """
+    window = configuration.get("AWS_OKTA_REFRESH_WINDOW", None)
+    if window:
+        return FixedRefreshPolicy(window=int(window))
+
+    fraction = configuration.get("AWS_OKTA_REFRESH_FRACTION", None)
+    jitter = configuration.get("AWS_OKTA_REFRESH_JITTER", None)
+
+    return RefreshPolicy(
+        fraction=float(fraction) if fraction else DEFAULT_REFRESH_FRACTION,
+        jitter=float(jitter) if jitter else DEFAULT_REFRESH_JITTER,
+    )
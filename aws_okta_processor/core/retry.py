@@ -0,0 +1,266 @@
+"""
+This module retries HTTP requests that fail transiently, and hedges slow ones.
+
+Failed requests are retried a bounded number of times, after an exponential
+backoff with full jitter. Whether a request may be sent again depends on the
+endpoint: reads and the idempotent POSTs below are retried on any connection
+error, timeout or 502, 503 and 504 response, while other POSTs, such as a
+factor verification that would send another push or reuse a passcode, are
+only retried when the connection could not be opened, so that they were
+certainly not received.
+
+Hedging sends a second, identical GET when the first has taken longer than
+the 95th percentile of the latencies seen for its endpoint, and uses whichever
+response arrives first.
+"""
+
+import collections
+import concurrent.futures
+import random
+import threading
+import time
+
+from urllib.parse import urlsplit
+
+import requests  # type: ignore[import-untyped]
+
+from urllib3.exceptions import NewConnectionError  # type: ignore[import-untyped]
+
+from aws_okta_processor.core.deadline import check_deadline, get_timeout
+
+# Requests sent again after a failure, by default
+DEFAULT_RETRIES = 2
+
+# Seconds of the first backoff, doubled after every retry up to the maximum
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 8
+
+# Response status codes of transient failures
+RETRYABLE_STATUS_CODES = (502, 503, 504)
+
+# Paths of POSTs that can be sent twice with the same outcome
+IDEMPOTENT_POST_PATHS = (
+    # Okta session refresh
+    "/api/v1/sessions/me/lifecycle/refresh",
+    # AWS sign-in page, which only lists the roles of the SAML assertion
+    "/saml",
+)
+
+# Seconds before hedging a GET whose endpoint has too few latencies recorded,
+# the latencies kept per endpoint and the number needed for a percentile
+HEDGE_DELAY = 2
+LATENCY_SAMPLES = 100
+LATENCY_MIN_SAMPLES = 20
+
+
+def is_idempotent(method=None, url=None):
+    """
+    Tells whether a request can be sent again after it may have been received.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The URL.
+
+    Returns:
+        bool: True for GET and HEAD requests, and POSTs to IDEMPOTENT_POST_PATHS.
+    """
+    if method in ("GET", "HEAD"):
+        return True
+
+    return urlsplit(url).path in IDEMPOTENT_POST_PATHS
+
+
+def is_connect_error(error=None):
+    """
+    Tells whether a request failed before it could be sent.
+
+    Args:
+        error (requests.RequestException): The error of the request.
+
+    Returns:
+        bool: True if the connection could not be opened.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def get_backoff(retry=None):
+    """
+    Returns a random delay before a retry, with full jitter.
+
+    Args:
+        retry (int): The number of the retry, from 1.
+
+    Returns:
+        float: Seconds between 0 and the exponential backoff of the retry.
+    """
+    backoff = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** (retry - 1))
+    return random.uniform(0, backoff)
+
+
+def get_latency_key(url=None):
+    """Returns the endpoint of a URL latencies are recorded for."""
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+class LatencyTracker:
+    """
+    Records the latencies of recent requests per endpoint.
+    """
+
+    def __init__(self):
+        self._latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=LATENCY_SAMPLES)
+        )
+        self._lock = threading.Lock()
+
+    def add(self, url=None, latency=None):
+        """
+        Records the latency of a request.
+
+        Args:
+            url (str): The URL of the request.
+            latency (float): Seconds until its response.
+        """
+        with self._lock:
+            self._latencies[get_latency_key(url=url)].append(latency)
+
+    def get_percentile(self, url=None, percentile=95):
+        """
+        Returns a percentile of the recorded latencies of an endpoint.
+
+        Args:
+            url (str): A URL of the endpoint.
+            percentile (int): The percentile.
+
+        Returns:
+            float or None: The latency, or None if too few were recorded.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(get_latency_key(url=url), ()))
+
+        if len(latencies) < LATENCY_MIN_SAMPLES:
+            return None
+
+        return latencies[min(len(latencies) - 1, len(latencies) * percentile // 100)]
+
+
+# Latencies are shared by the clients of the process
+LATENCIES = LatencyTracker()
+
+
+class RetryPolicy:
+    """
+    Sends requests with retries and, optionally, hedging.
+
+    Attributes:
+        retries (int): Requests sent again after a failure.
+        hedge (bool): If True, slow GETs are hedged.
+    """
+
+    def __init__(self, retries=None, hedge=False, latencies=None):
+        """
+        Initialize the policy.
+
+        Args:
+            retries (int): Requests sent again after a failure (2).
+            hedge (bool): If True, slow GETs are hedged.
+            latencies (LatencyTracker): The latencies to hedge by, the
+                process' by default.
+        """
+        self.retries = DEFAULT_RETRIES if retries is None else int(retries)
+        self.hedge = hedge
+        self.latencies = latencies or LATENCIES
+
+    def request(self, session=None, method=None, url=None, **kwargs):
+        """
+        Sends a request, retrying it as its idempotency allows.
+
+        Args:
+            session (requests.Session): The session to send the request with, or
+                the requests module.
+            method (str): The HTTP method.
+            url (str): The URL.
+            **kwargs: The arguments of session.get() or session.post().
+
+        Under a deadline, each attempt gets the time left as its timeout, and
+        no retry is made that could not finish in time.
+
+        Returns:
+            Response: The response, possibly a transient error once the
+            retries are exhausted.
+
+        Raises:
+            requests.RequestException: If the last attempt failed.
+        """
+        idempotent = is_idempotent(method=method, url=url)
+        timeout = kwargs.pop("timeout", None)
+
+        for retry in range(self.retries + 1):
+            if retry:
+                backoff = get_backoff(retry=retry)
+                check_deadline(wait=backoff)
+                time.sleep(backoff)
+
+            try:
+                response = self.send(
+                    session, method, url, timeout=get_timeout(timeout=timeout), **kwargs
+                )
+            except requests.RequestException as error:
+                if retry == self.retries:
+                    raise
+                if not (idempotent or is_connect_error(error=error)):
+                    raise
+                continue
+
+            if not idempotent or response.status_code not in RETRYABLE_STATUS_CODES:
+                break
+
+        return response
+
+    def send(self, session=None, method=None, url=None, **kwargs):
+        """
+        Sends a request once, hedged if it is a GET and hedging is enabled.
+
+        Returns:
+            Response: The first response received.
+        """
+        if not (self.hedge and method == "GET"):
+            return self.timed(session, method, url, **kwargs)
+
+        delay = self.latencies.get_percentile(url=url)
+        if delay is None:
+            delay = HEDGE_DELAY
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = [executor.submit(self.timed, session, method, url, **kwargs)]
+            done, _ = concurrent.futures.wait(futures, timeout=delay)
+
+            if not done:
+                futures.append(
+                    executor.submit(self.timed, session, method, url, **kwargs)
+                )
+
+            for future in concurrent.futures.as_completed(futures):
+                if future.exception() is None:
+                    return future.result()
+
+            # Both failed, the last error is raised
+            return future.result()
+        finally:
+            # The slower request is left to finish on its own
+            executor.shutdown(wait=False)
+
+    def timed(self, session=None, method=None, url=None, **kwargs):
+        """Sends a request and records its latency."""
+        started = time.monotonic()
+        # Also works with the requests module for a session
+        response = getattr(session, method.lower())(url, **kwargs)
+        self.latencies.add(url=url, latency=time.monotonic() - started)
+
+        return response
@@ -7,12 +7,14 @@ import base64
 from collections import OrderedDict
 from fnmatch import fnmatch
 import sys
+import threading
 
 from defusedxml import ElementTree  # type: ignore[import-untyped]
 from bs4 import BeautifulSoup  # type: ignore[import-untyped]
 import requests  # type: ignore[import-untyped]
 import six  # type: ignore[import-untyped]
 
+from aws_okta_processor.core.retry import RetryPolicy
 from aws_okta_processor.core.tty import print_tty
 
 # Constants for SAML namespaces and AWS sign-in URL
@@ -21,6 +23,10 @@ SAML_ATTRIBUTE_ROLE = "https://aws.amazon.com/SAML/Attributes/Role"
 SAML_ATTRIBUTE_VALUE = "{urn:oasis:names:tc:SAML:2.0:assertion}AttributeValue"
 AWS_SIGN_IN_URL = "https://signin.aws.amazon.com/saml"
 
+# Seconds to connect to and to read the AWS sign-in page; a stuck request is
+# retried rather than waited for
+SIGN_IN_TIMEOUT = (10, 30)
+
 
 def get_saml_assertion(saml_response=None):
     """
@@ -60,8 +66,13 @@ def get_saml_assertion(saml_response=None):
     sys.exit(1)
 
 
-def get_aws_roles(  # pylint: disable=R0914
-    saml_assertion=None, accounts_filter=None, sign_in_url=None
+def get_aws_roles(
+    saml_assertion=None,
+    accounts_filter=None,
+    sign_in_url=None,
+    account_role_cache=None,
+    session=None,
+    retry_policy=None,
 ):
     """
     Parses the SAML assertion and extracts AWS roles.
@@ -70,11 +81,52 @@ def get_aws_roles(  # pylint: disable=R0914
         saml_assertion (str): Base64-encoded SAML assertion.
         accounts_filter (str): Filter pattern to apply to account names.
         sign_in_url (str): AWS sign-in URL, defaults to AWS_SIGN_IN_URL.
+        account_role_cache (AccountRoleCache): Optional cache of the AWS sign-in page.
+        session (requests.Session): Optional HTTP session to post the assertion with.
+        retry_policy (RetryPolicy): Optional policy to retry the post with.
 
     Returns:
         OrderedDict: Mapping of account names to dictionaries of role ARNs and AWSRole instances.
     """  # noqa: E501
-    aws_roles = OrderedDict()
+    role_principals = get_role_principals(saml_assertion=saml_assertion)
+    account_roles = None
+
+    # Skip get_account_roles if only one role returned
+    if len(role_principals) > 1:
+        if account_role_cache is not None:
+            account_roles = account_role_cache.get_account_roles(
+                role_arns=role_principals.keys()
+            )
+
+        if account_roles is None:
+            # Retrieve account roles from AWS sign-in page
+            account_roles = get_account_roles(
+                saml_assertion=saml_assertion,
+                sign_in_url=sign_in_url,
+                session=session,
+                retry_policy=retry_policy,
+            )
+
+            if account_role_cache is not None:
+                account_role_cache.set_account_roles(account_roles=account_roles)
+
+    return build_aws_roles(
+        role_principals=role_principals,
+        account_roles=account_roles,
+        accounts_filter=accounts_filter,
+    )
+
+
+def get_role_principals(saml_assertion=None):
+    """
+    Extracts the role and principal ARNs of a SAML assertion.
+
+    Args:
+        saml_assertion (str): Base64-encoded SAML assertion.
+
+    Returns:
+        dict: Mapping of role ARNs to principal ARNs.
+    """
     role_principals = {}
     decoded_saml = base64.b64decode(saml_assertion)
     xml_saml = ElementTree.fromstring(decoded_saml)
@@ -95,13 +147,25 @@ def get_aws_roles(  # pylint: disable=R0914
 
                 role_principals[role_arn] = principal_arn
 
-    # Skip get_account_roles if only one role returned
-    if len(role_principals) > 1:
-        # Retrieve account roles from AWS sign-in page
-        account_roles = get_account_roles(
-            saml_assertion=saml_assertion, sign_in_url=sign_in_url
-        )
+    return role_principals
+
+
+def build_aws_roles(role_principals=None, account_roles=None, accounts_filter=None):
+    """
+    Groups the roles of a SAML assertion by the accounts of the AWS sign-in page.
+
+    Args:
+        role_principals (dict): Mapping of role ARNs to principal ARNs.
+        account_roles (list): AWSRole instances of the sign-in page, or None
+            if the assertion names a single role.
+        accounts_filter (str): Filter pattern to apply to account names.
+
+    Returns:
+        OrderedDict: Mapping of account names to dictionaries of role ARNs and AWSRole instances.
+    """  # noqa: E501
+    aws_roles = OrderedDict()
 
+    if account_roles is not None:
         for account_role in account_roles:
             account_name = account_role.account_name
             # Apply accounts filter if provided
@@ -129,24 +193,50 @@ def get_aws_roles(  # pylint: disable=R0914
     return aws_roles
 
 
-def get_account_roles(saml_assertion=None, sign_in_url=None):
+def get_account_roles(
+    saml_assertion=None, sign_in_url=None, session=None, retry_policy=None
+):
     """
     Retrieves AWS account roles from the AWS SAML sign-in page.
 
     Args:
         saml_assertion (str): Base64-encoded SAML assertion.
         sign_in_url (str): AWS sign-in URL, defaults to AWS_SIGN_IN_URL.
+        session (requests.Session): Optional HTTP session to reuse a pooled connection
+            from, a new connection is opened otherwise.
+        retry_policy (RetryPolicy): Optional policy to retry the post with, which
+            is idempotent.
 
     Returns:
         list: List of AWSRole instances representing available roles.
     """
-    role_accounts = []
-
     data = {"SAMLResponse": saml_assertion, "RelayState": ""}
 
     # Post the SAML assertion to AWS sign-in URL
-    response = requests.post(sign_in_url or AWS_SIGN_IN_URL, data=data, timeout=60)
-    soup = BeautifulSoup(response.text, "html.parser")
+    response = (retry_policy or RetryPolicy()).request(
+        session or requests,
+        "POST",
+        sign_in_url or AWS_SIGN_IN_URL,
+        data=data,
+        timeout=SIGN_IN_TIMEOUT,
+    )
+
+    return parse_account_roles(sign_in_page=response.text)
+
+
+def parse_account_roles(sign_in_page=None):
+    """
+    Parses the accounts and roles listed by the AWS SAML sign-in page.
+
+    Args:
+        sign_in_page (str): HTML content of the sign-in page.
+
+    Returns:
+        list: List of AWSRole instances representing available roles.
+    """
+    role_accounts = []
+
+    soup = BeautifulSoup(sign_in_page, "html.parser")
     accounts = soup.find("fieldset").find_all(
         "div", attrs={"class": "saml-account"}, recursive=False
     )
@@ -196,3 +286,71 @@ class AWSRole:  # pylint: disable=R0903
         self.role_description = role_description
         self.role_arn = role_arn
         self.principal_arn = principal_arn
+
+
+class AccountRoleCache:
+    """
+    Remembers the account names and role descriptions listed by the AWS
+    sign-in page, so that SAML assertions naming only known roles skip it.
+
+    The cache holds no credentials and may be shared between users; the
+    roles of each user still come from their own SAML assertion.
+    """
+
+    def __init__(self, max_size=10000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): The maximum number of roles remembered.
+        """
+        self.max_size = max_size
+        self._roles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_account_roles(self, role_arns=None):
+        """
+        Returns the sign-in page entries of the given roles.
+
+        Args:
+            role_arns (iterable): The role ARNs of a SAML assertion.
+
+        Returns:
+            list or None: New AWSRole instances, or None unless every role is known.
+        """
+        account_roles = []
+
+        with self._lock:
+            for role_arn in role_arns:
+                if role_arn not in self._roles:
+                    return None
+
+                self._roles.move_to_end(role_arn)
+                account_name, role_description = self._roles[role_arn]
+                account_roles.append(
+                    AWSRole(
+                        account_name=account_name,
+                        role_description=role_description,
+                        role_arn=role_arn,
+                    )
+                )
+
+        return account_roles
+
+    def set_account_roles(self, account_roles=None):
+        """
+        Remembers the entries of the AWS sign-in page.
+
+        Args:
+            account_roles (list): AWSRole instances returned by get_account_roles().
+        """
+        with self._lock:
+            for account_role in account_roles:
+                self._roles[account_role.role_arn] = (
+                    account_role.account_name,
+                    account_role.role_description,
+                )
+                self._roles.move_to_end(account_role.role_arn)
+
+            while len(self._roles) > self.max_size:
+                self._roles.popitem(last=False)
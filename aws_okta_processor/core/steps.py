@@ -0,0 +1,197 @@
+"""
+This module runs the network steps of an authentication as a small dependency
+graph, so that independent steps overlap instead of running in sequence.
+"""
+
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.deadline import phase
+
+
+class StepGraph:
+    """
+    Runs named steps on threads as soon as the steps they depend on are done.
+
+    Each step is called with the results of its dependencies as keyword
+    arguments. A failed step is not retried; the steps depending on it are
+    skipped and its error is raised by 'result' for either of them.
+
+    Interactive steps, which may prompt, run in the calling thread instead,
+    where Ctrl+C interrupts them, while the other steps run on threads.
+
+    Attributes:
+        timings (dict): Mapping of step names to (start, end) monotonic times.
+    """
+
+    def __init__(self):
+        self.steps = {}
+        self.timings = {}
+        self._results = {}
+        self._errors = {}
+        self._interactive = set()
+
+    def add(self, name=None, function=None, requires=(), interactive=False):
+        """
+        Adds a step to the graph.
+
+        Args:
+            name (str): The name of the step.
+            function (callable): Called with the dependency results by name.
+            requires (tuple): The names of the steps this step depends on.
+            interactive (bool): Whether the step may prompt, and so runs in the
+                calling thread.
+        """
+        self.steps[name] = (function, tuple(requires))
+        if interactive:
+            self._interactive.add(name)
+
+    def run(self, workers=4):
+        """
+        Runs every step, independent steps concurrently.
+
+        Hooks installed in the calling thread apply to the steps as well.
+
+        Args:
+            workers (int): The maximum number of steps running at once.
+
+        Returns:
+            StepGraph: The graph, to read results and timings from.
+        """
+        pending = dict(self.steps)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                interactive = []
+                for name, (function, requires) in list(pending.items()):
+                    failed = [
+                        requirement
+                        for requirement in requires
+                        if requirement in self._errors
+                    ]
+                    if failed:
+                        self._errors[name] = self._errors[failed[0]]
+                        del pending[name]
+                    elif all(requirement in self._results for requirement in requires):
+                        kwargs = {
+                            requirement: self._results[requirement]
+                            for requirement in requires
+                        }
+                        if name in self._interactive:
+                            interactive.append((name, function, kwargs))
+                        else:
+                            running[
+                                executor.submit(
+                                    hooks.bind_hooks(self._run_step),
+                                    name,
+                                    function,
+                                    kwargs,
+                                )
+                            ] = name
+                        del pending[name]
+
+                if interactive:
+                    # The submitted steps go on meanwhile
+                    for name, function, kwargs in interactive:
+                        self._run_step(name, function, kwargs)
+                    continue
+
+                if not running:
+                    # Left over steps depend on steps that were never added
+                    for name in pending:
+                        self._errors[name] = KeyError(name)
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+
+        return self
+
+    def _run_step(self, name, function, kwargs):
+        """Runs one step as a phase of the deadline, recording its result or
+        error and its timing."""
+        start = time.monotonic()
+        try:
+            with phase(name=name):
+                self._results[name] = function(**kwargs)
+        except (SystemExit, Exception) as error:  # pylint: disable=W0718
+            self._errors[name] = error
+        finally:
+            self.timings[name] = (start, time.monotonic())
+
+    def result(self, name=None):
+        """
+        Returns the result of a step, raising its error if it failed.
+
+        Args:
+            name (str): The name of the step.
+
+        Returns:
+            object: The return value of the step.
+        """
+        if name in self._errors:
+            raise self._errors[name]
+        return self._results[name]
+
+    def get_duration(self, name=None):
+        """Returns the number of seconds a step ran, 0 if it did not."""
+        if name not in self.timings:
+            return 0.0
+        start, end = self.timings[name]
+        return end - start
+
+    def get_critical_path(self):
+        """
+        Returns the longest chain of dependent steps.
+
+        Returns:
+            tuple: The step names of the chain and its total duration in seconds.
+        """
+        paths = {}
+
+        def get_path(name):
+            if name not in paths:
+                _, requires = self.steps[name]
+                longest = max(
+                    (
+                        get_path(requirement)
+                        for requirement in requires
+                        if requirement in self.steps
+                    ),
+                    key=lambda path: path[1],
+                    default=((), 0.0),
+                )
+                paths[name] = (
+                    longest[0] + (name,),
+                    longest[1] + self.get_duration(name),
+                )
+            return paths[name]
+
+        return max(
+            (get_path(name) for name in self.steps),
+            key=lambda path: path[1],
+            default=((), 0.0),
+        )
+
+    def get_report(self):
+        """
+        Describes how long each step ran against the critical path.
+
+        Returns:
+            list: The lines of the report.
+        """
+        lines = [
+            f"Timing: {name}: {self.get_duration(name):.3f}s"
+            for name in sorted(self.timings, key=lambda name: self.timings[name][0])
+        ]
+        path, critical = self.get_critical_path()
+        total = sum(self.get_duration(name) for name in self.steps)
+        lines.append(
+            f"Timing: critical path {' > '.join(path)}: {critical:.3f}s,"
+            f" sum of steps: {total:.3f}s"
+        )
+        return lines
@@ -0,0 +1,205 @@
+"""
+This module generates RFC 6238 TOTP passcodes from a locally stored seed, so
+that unattended service accounts can verify a TOTP factor without a prompt.
+
+The seed is the base32 secret of the authenticator enrollment, or the
+'otpauth://' URI it was shown as, and is read from the first configured source:
+a file, the AWS_OKTA_TOTP_SEED variable, or the output of a command such as a
+password manager.
+"""
+
+import base64
+import hashlib
+import hmac
+import shlex
+import struct
+import subprocess
+import sys
+import time
+
+from urllib.parse import parse_qs, urlsplit
+
+from aws_okta_processor.core.tty import print_tty
+
+# Seconds each passcode is valid for, and number of digits, per RFC 6238
+TOTP_STEP = 30
+TOTP_DIGITS = 6
+
+# Seconds a seed command may run
+SEED_COMMAND_TIMEOUT = 30
+
+
+def get_totp(secret=None, timestamp=None, step=TOTP_STEP, digits=TOTP_DIGITS):
+    """
+    Returns the TOTP passcode of a secret at a point in time.
+
+    Args:
+        secret (bytes): The decoded secret.
+        timestamp (float): The UNIX time to generate the passcode for.
+        step (int): Seconds each passcode is valid for.
+        digits (int): The number of digits of the passcode.
+
+    Returns:
+        str: The passcode, padded with zeros.
+    """
+    counter = int(timestamp // step)
+    digest = hmac.new(secret, struct.pack(">Q", counter), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    code = struct.unpack(">I", digest[offset : offset + 4])[0] & 0x7FFFFFFF
+
+    return str(code % 10**digits).zfill(digits)
+
+
+def get_next_window(timestamp=None, step=TOTP_STEP):
+    """
+    Returns when the passcode window after the one of a point in time starts.
+
+    Args:
+        timestamp (float): The UNIX time.
+        step (int): Seconds each passcode is valid for.
+
+    Returns:
+        float: The UNIX time the next window starts at.
+    """
+    return (timestamp // step + 1) * step
+
+
+def decode_seed(seed=None):
+    """
+    Decodes a base32 seed, as shown by authenticator enrollments.
+
+    Args:
+        seed (str): The base32 secret or an 'otpauth://' URI with a secret.
+
+    Returns:
+        bytes: The decoded secret.
+
+    Raises:
+        ValueError: If the seed is not valid base32.
+    """
+    seed = seed.strip()
+    if seed.startswith("otpauth://"):
+        seed = parse_qs(urlsplit(seed).query).get("secret", [""])[0]
+
+    seed = seed.replace(" ", "").replace("-", "").upper()
+    seed += "=" * (-len(seed) % 8)
+
+    secret = base64.b32decode(seed)
+    if not secret:
+        raise ValueError("Empty TOTP seed")
+
+    return secret
+
+
+class TOTPProvider:
+    """
+    Generates TOTP passcodes from a seed read when first needed.
+
+    Attributes:
+        seed (str): The seed itself, such as the value of AWS_OKTA_TOTP_SEED.
+        seed_file (str): A file containing the seed.
+        seed_command (str): A command printing the seed.
+    """
+
+    def __init__(self, seed=None, seed_file=None, seed_command=None):
+        """
+        Initialize the provider with the sources of its seed; none is read yet.
+
+        Args:
+            seed (str): The seed itself.
+            seed_file (str): A file containing the seed.
+            seed_command (str): A command printing the seed, run without a shell.
+        """
+        self.seed = seed
+        self.seed_file = seed_file
+        self.seed_command = seed_command
+        self._secret = None
+
+    def get_secret(self):
+        """
+        Reads and decodes the seed, the first time only.
+
+        Returns:
+            bytes: The decoded secret.
+
+        Raises:
+            SystemExit: If the seed cannot be read or is invalid.
+        """
+        if self._secret is None:
+            try:
+                self._secret = decode_seed(seed=self.read_seed())
+            except ValueError:
+                print_tty("Error: Invalid TOTP seed")
+                sys.exit(1)
+
+        return self._secret
+
+    def read_seed(self):
+        """
+        Reads the seed from its file, its value or its command, in that order.
+
+        Returns:
+            str: The seed.
+
+        Raises:
+            SystemExit: If the seed file or command fails.
+        """
+        if self.seed_file:
+            try:
+                with open(self.seed_file, encoding="utf-8") as file:
+                    return file.read()
+            except OSError as error:
+                print_tty(f"Error: Cannot read TOTP seed file: {error.strerror}")
+                sys.exit(1)
+
+        if self.seed:
+            return self.seed
+
+        try:
+            result = subprocess.run(
+                shlex.split(self.seed_command),
+                capture_output=True,
+                check=True,
+                text=True,
+                timeout=SEED_COMMAND_TIMEOUT,
+            )
+        except (OSError, subprocess.SubprocessError):
+            print_tty("Error: TOTP seed command failed")
+            sys.exit(1)
+
+        return result.stdout
+
+    def get_passcode(self, timestamp=None):
+        """
+        Returns the passcode of a point in time.
+
+        Args:
+            timestamp (float): The UNIX time, now by default.
+
+        Returns:
+            str: The passcode.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        return get_totp(secret=self.get_secret(), timestamp=timestamp)
+
+
+def get_totp_provider(configuration=None):
+    """
+    Creates a provider for the TOTP seed of an 'authenticate' configuration.
+
+    Args:
+        configuration (dict): The configuration of the command.
+
+    Returns:
+        TOTPProvider or None: The provider, or None if no seed is configured.
+    """
+    seed = configuration.get("AWS_OKTA_TOTP_SEED", None)
+    seed_file = configuration.get("AWS_OKTA_TOTP_SEED_FILE", None)
+    seed_command = configuration.get("AWS_OKTA_TOTP_SEED_COMMAND", None)
+
+    if not (seed or seed_file or seed_command):
+        return None
+
+    return TOTPProvider(seed=seed, seed_file=seed_file, seed_command=seed_command)
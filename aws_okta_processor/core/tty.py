@@ -2,14 +2,20 @@
 
 from __future__ import unicode_literals
 
+import contextlib
 import io
 import os
+import select
 import sys
+import threading
+import time
 
 from six.moves import range  # type: ignore[import-untyped]
 
 import contextlib2
 
+from aws_okta_processor.core import hooks
+
 
 def import_msvcrt():
     """
@@ -23,29 +29,138 @@ def import_msvcrt():
     return msvcrt
 
 
-def input_tty():
+# Seconds between checks of a cancellable prompt
+CANCEL_POLL_INTERVAL = 0.1
+
+# Held by the thread whose prompt is on the terminal; concurrent logins wait
+# for it to prompt in turn, while the rest of their work goes on
+PROMPT_LOCK = threading.RLock()
+
+# Label of the prompts of the current thread
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def use_prompt_label(label=None):
+    """
+    Labels the prompts of the current thread for the duration of a block, so
+    that the user knows which of several logins a prompt is for.
+
+    Args:
+        label (str): The label, like 'jdoe@mycompany.okta.com'.
+    """
+    previous = getattr(_local, "label", None)
+    _local.label = label
+
+    try:
+        yield
+    finally:
+        _local.label = previous
+
+
+@contextlib.contextmanager
+def prompting():
+    """
+    Holds the terminal for a prompt, waiting for the prompt of another thread
+    to be answered first, and prints the label of the current thread's
+    prompts, if any.
+    """
+    with PROMPT_LOCK:
+        label = getattr(_local, "label", None)
+        if label is not None:
+            print_tty(f"{label}:")
+
+        yield
+
+
+def input_tty(cancel=None):
     """
     Handles user input from the terminal, adapting for Windows or Unix systems.
 
+    Args:
+        cancel (threading.Event): If given, input stops being waited for once
+            the event is set.
+
     Returns:
-        str: The input string entered by the user.
+        str: The input string entered by the user, or None if cancelled.
     """
+    check_prompt()
+
     try:
         msvcrt = import_msvcrt()
     except ImportError:
         # If msvcrt is not available (non-Windows), use Unix-based input method
-        return unix_input_tty()
+        return unix_input_tty(cancel=cancel)
 
     # Use Windows-specific input method if msvcrt is available
-    return win_input_tty(msvcrt)
+    return win_input_tty(msvcrt, cancel=cancel)
+
+
+def has_terminal():
+    """
+    Tells whether a user can answer prompts.
+
+    Returns:
+        bool: True if the process has a controlling terminal or its standard
+        input is one.
+    """
+    try:
+        import_msvcrt()
+    except ImportError:
+        try:
+            fd = os.open("/dev/tty", os.O_RDWR | os.O_NOCTTY)  # pylint: disable=E1101
+        except OSError:
+            return sys.stdin is not None and sys.stdin.isatty()
+
+        os.close(fd)
+        return True
+
+    return sys.stdin is not None and sys.stdin.isatty()
+
+
+def check_prompt():
+    """
+    Fails instead of prompting when a deadline is set and no terminal can
+    answer the prompt, as when running as a credential_process, or when a
+    'prompt' hook refuses it.
+    """
+    prompt = hooks.get_hook("prompt")
+    if prompt is not None:
+        prompt()
+
+    deadline = hooks.get_deadline()
+    if deadline is not None and not has_terminal():
+        deadline.fail_prompt()
 
 
-def unix_input_tty():
+def wait_readable(stream=None, cancel=None):
+    """
+    Waits until a stream has input to read or an event is set.
+
+    Args:
+        stream: A file object with a file descriptor.
+        cancel (threading.Event): The event cancelling the wait.
+
+    Returns:
+        bool: True if the stream is readable, False if cancelled.
+    """
+    while not cancel.is_set():
+        readable, _, _ = select.select([stream], [], [], CANCEL_POLL_INTERVAL)
+        if readable:
+            return True
+    return False
+
+
+def unix_input_tty(cancel=None):
     """
     Handles user input in Unix systems, using the tty for input if available.
 
+    Args:
+        cancel (threading.Event): If given, input stops being waited for once
+            the event is set.
+
     Returns:
-        str: The line of input entered by the user.
+        str: The line of input entered by the user, or None if cancelled.
     """
     with contextlib2.ExitStack() as stack:
         try:
@@ -60,6 +175,9 @@ def unix_input_tty():
             stack.close()
             input = sys.stdin  # pylint: disable=W0622
 
+        if cancel is not None and not wait_readable(stream=input, cancel=cancel):
+            return None
+
         line = input.readline()
         # Remove trailing newline if present
         if line[-1] == "\n":
@@ -67,18 +185,26 @@ def unix_input_tty():
         return line
 
 
-def win_input_tty(msvcrt):
+def win_input_tty(msvcrt, cancel=None):
     """
     Handles user input in Windows systems using msvcrt.
 
     Args:
         msvcrt (module): The Windows msvcrt module.
+        cancel (threading.Event): If given, input stops being waited for once
+            the event is set.
 
     Returns:
-        str: The input string entered by the user.
+        str: The input string entered by the user, or None if cancelled.
     """
     pw = ""
     while 1:
+        if cancel is not None:
+            while not msvcrt.kbhit():
+                if cancel.is_set():
+                    return None
+                time.sleep(CANCEL_POLL_INTERVAL)
+
         c = msvcrt.getwch()  # Get a character from the console
         if c in ["\r", "\n"]:
             # Break on Enter key
@@ -191,6 +317,12 @@ def print_tty(string="", indents=0, newline=True, silent=False):
         newline (bool): Whether to add a newline after printing.
         silent (bool): If True, suppresses printing.
     """
+    output = hooks.get_hook("output")
+    if output is not None:
+        # Hand the line over to the library API instead
+        output(indent(indents) + string)
+        return
+
     try:
         msvcrt = import_msvcrt()
     except ImportError:
@@ -0,0 +1,137 @@
+"""
+This module opens connections speculatively, so that the DNS lookup and the
+TCP and TLS handshakes with Okta and AWS happen while the user is still typing
+a password or approving an MFA challenge.
+"""
+
+import threading
+import time
+
+from urllib.parse import urlsplit
+
+import requests  # type: ignore[import-untyped]
+
+# Seconds a speculative connection may take before it is given up
+WARMUP_TIMEOUT = 10
+
+
+def get_origin(url=None):
+    """
+    Returns the scheme, host and port of a URL.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        str: The origin, like 'https://organization.okta.com'.
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class ConnectionWarmer:
+    """
+    Warms the connection pool of a requests session in background threads.
+
+    Warm-up requests go through a separate session mounted on the same
+    connection adapters, so that their connections are pooled for the session
+    while their cookies are not. The session's own requests are recorded to
+    tell which warmed connections were used.
+
+    Attributes:
+        session (requests.Session): The session whose connections are warmed.
+        timings (dict): Mapping of warmed origins to the seconds they took.
+        used (set): The origins the session sent requests to.
+    """
+
+    def __init__(self, session=None):
+        """
+        Initialize the warmer and start recording the requests of the session.
+
+        Args:
+            session (requests.Session): The session whose connections to warm.
+        """
+        self.session = session
+        self.timings = {}
+        self.used = set()
+        self._started = set()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._warm_session = requests.Session()
+        self._warm_session.adapters = session.adapters
+        session.hooks["response"].append(self._record_response)
+
+    def _record_response(self, response, *args, **kwargs):  # pylint: disable=W0613
+        """Records the origin of a response of the session."""
+        with self._lock:
+            self.used.add(get_origin(response.url))
+
+    def warm(self, urls=None):
+        """
+        Starts opening a connection to each URL's origin, unless one was already
+        started.
+
+        Args:
+            urls (list): The URLs to connect to.
+        """
+        for url in urls:
+            origin = get_origin(url)
+            with self._lock:
+                if origin in self._started:
+                    continue
+                self._started.add(origin)
+
+            thread = threading.Thread(
+                target=self._warm_origin, args=(origin,), daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _warm_origin(self, origin=None):
+        """Opens and pools a connection with a request that reads no body."""
+        start = time.monotonic()
+        try:
+            self._warm_session.head(
+                origin + "/", timeout=WARMUP_TIMEOUT, allow_redirects=False
+            )
+        except requests.RequestException:
+            return
+
+        with self._lock:
+            self.timings[origin] = time.monotonic() - start
+
+    def close(self):
+        """Stops recording the requests of the session."""
+        if self._record_response in self.session.hooks["response"]:
+            self.session.hooks["response"].remove(self._record_response)
+
+    def join(self, timeout=None):
+        """
+        Waits for the warm-up requests to finish.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait for each request.
+        """
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def get_report(self):
+        """
+        Describes the warmed connections and whether they were used.
+
+        Returns:
+            list: The lines of the report.
+        """
+        lines = []
+
+        with self._lock:
+            for origin in sorted(self._started):
+                duration = self.timings.get(origin, None)
+                if duration is None:
+                    lines.append(f"Timing: warm-up {origin}: not connected")
+                elif origin in self.used:
+                    lines.append(f"Timing: warm-up {origin}: {duration:.3f}s, used")
+                else:
+                    lines.append(f"Timing: warm-up {origin}: {duration:.3f}s, unused")
+
+        return lines
@@ -0,0 +1,200 @@
+"""
+In-process botocore credential provider for aws-okta-processor.
+
+Applications embedding boto3 can fetch and refresh credentials in their own
+process instead of forking 'aws-okta-processor authenticate' through
+credential_process:
+
+    import boto3
+    from aws_okta_processor.provider import get_session
+
+    # Use the aws-okta-processor credential_process of the named profile
+    session = boto3.Session(botocore_session=get_session(profile_name="pro-dev"))
+
+    # Or pass the 'authenticate' arguments directly
+    session = boto3.Session(
+        botocore_session=get_session(argv=["--user", "jdoe", "--role", "arn:aws:..."])
+    )
+"""
+
+import botocore.session  # type: ignore[import-untyped]
+
+from botocore.credentials import (  # type: ignore[import-untyped]
+    CredentialProvider,
+    JSONFileCache,
+    RefreshableCredentials,
+)
+from botocore.exceptions import CredentialRetrievalError  # type: ignore[import-untyped]
+from docopt import docopt, DocoptExit  # type: ignore[import-untyped]
+
+from aws_okta_processor.commands import authenticate
+from aws_okta_processor.commands.warm import AUTHENTICATE_COMMAND, get_authenticate_args
+from aws_okta_processor.core.pool import CredentialPool
+
+# botocore refreshes credentials this many seconds before they expire
+ADVISORY_REFRESH_WINDOW = 15 * 60
+
+# Name of the botocore provider the in-process provider takes precedence over
+PROCESS_PROVIDER = "custom-process"
+
+
+class OktaProvider(CredentialProvider):
+    """
+    A botocore credential provider fetching credentials with 'SAMLFetcher'.
+
+    The Okta session and the credentials are kept in memory between refreshes.
+
+    Given 'authenticate' arguments, it always provides credentials. Otherwise it
+    provides credentials only for profiles whose credential_process runs
+    'aws-okta-processor authenticate', using that command's arguments.
+    """
+
+    METHOD = "aws-okta-processor"
+    CANONICAL_NAME = "custom-aws-okta-processor"
+
+    def __init__(self, argv=None, load_config=None, cache=None):
+        """
+        Initialize the provider.
+
+        Args:
+            argv (list): Optional arguments of 'aws-okta-processor authenticate'.
+            load_config (callable): Returns the configuration of the current
+                profile, such as botocore's Session.get_scoped_config.
+            cache: An optional dict-like cache, botocore's JSONFileCache by default.
+        """
+        super().__init__()
+        self._argv = argv
+        self._load_config = load_config
+        self._pool = CredentialPool(
+            cache=cache if cache is not None else JSONFileCache()
+        )
+
+    def get_argv(self):
+        """
+        Returns the 'authenticate' arguments to fetch credentials with.
+
+        Returns:
+            list or None: The arguments, or None if the profile does not use aws-okta-processor.
+        """  # noqa: E501
+        if self._argv is not None:
+            return self._argv
+
+        if self._load_config is None:
+            return None
+
+        credential_process = self._load_config().get("credential_process", None)
+        if not credential_process:
+            return None
+
+        return get_authenticate_args(credential_process=credential_process)
+
+    def load(self):
+        """
+        Loads the credentials of the configured profile or arguments.
+
+        Returns:
+            RefreshableCredentials or None: The credentials, or None to let the
+            next provider of the chain try.
+
+        Raises:
+            CredentialRetrievalError: If the credentials cannot be fetched.
+        """
+        argv = self.get_argv()
+        if argv is None:
+            return None
+
+        try:
+            options = docopt(authenticate.__doc__, argv=[AUTHENTICATE_COMMAND] + argv)
+        except DocoptExit as exception:
+            raise CredentialRetrievalError(
+                provider=self.METHOD, error_msg="Invalid authenticate options."
+            ) from exception
+
+        def refresh():
+            return self.fetch_metadata(options=options)
+
+        return RefreshableCredentials.create_from_metadata(
+            metadata=refresh(), refresh_using=refresh, method=self.METHOD
+        )
+
+    def fetch_metadata(self, options=None):
+        """
+        Fetches credentials in the format of botocore's credential metadata.
+
+        Credentials botocore would consider due for refresh are refreshed,
+        others are read from the cache.
+
+        Args:
+            options (dict): The 'authenticate' options parsed by docopt.
+
+        Returns:
+            dict: The 'access_key', 'secret_key', 'token' and 'expiry_time'.
+
+        Raises:
+            CredentialRetrievalError: If the credentials cannot be fetched.
+        """
+        try:
+            credentials = self._pool.fetch_credentials(
+                authenticate=authenticate.Authenticate(options),
+                refresh_within=ADVISORY_REFRESH_WINDOW,
+            )
+        except SystemExit as exception:
+            raise CredentialRetrievalError(
+                provider=self.METHOD,
+                error_msg=getattr(exception, "message", "Authentication failed."),
+            ) from exception
+
+        return {
+            "access_key": credentials["AccessKeyId"],
+            "secret_key": credentials["SecretAccessKey"],
+            "token": credentials["SessionToken"],
+            "expiry_time": credentials["Expiration"],
+        }
+
+
+def register_provider(botocore_session=None, argv=None, cache=None):
+    """
+    Adds an 'OktaProvider' to the credential resolver of a botocore session.
+
+    With arguments, the provider comes first in the chain. Without, it reads
+    the session's current profile and comes just before credential_process,
+    which it replaces for aws-okta-processor profiles.
+
+    Args:
+        botocore_session (botocore.session.Session): The session to register with.
+        argv (list): Optional arguments of 'aws-okta-processor authenticate'.
+        cache: An optional dict-like cache, botocore's JSONFileCache by default.
+
+    Returns:
+        OktaProvider: The registered provider.
+    """
+    resolver = botocore_session.get_component("credential_provider")
+
+    if argv is not None:
+        provider = OktaProvider(argv=argv, cache=cache)
+        resolver.insert_before(resolver.providers[0].METHOD, provider)
+    else:
+        provider = OktaProvider(
+            load_config=botocore_session.get_scoped_config, cache=cache
+        )
+        resolver.insert_before(PROCESS_PROVIDER, provider)
+
+    return provider
+
+
+def get_session(argv=None, profile_name=None, cache=None):
+    """
+    Creates a botocore session using the in-process provider.
+
+    Args:
+        argv (list): Optional arguments of 'aws-okta-processor authenticate'.
+        profile_name (str): An optional profile of the AWS config file.
+        cache: An optional dict-like cache, botocore's JSONFileCache by default.
+
+    Returns:
+        botocore.session.Session: The session, to pass to boto3.Session(botocore_session=...).
+    """  # noqa: E501
+    botocore_session = botocore.session.Session(profile=profile_name)
+    register_provider(botocore_session=botocore_session, argv=argv, cache=cache)
+
+    return botocore_session
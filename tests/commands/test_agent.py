@@ -0,0 +1,223 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from unittest.mock import patch, MagicMock
+
+from tests.test_base import TestBase
+
+from aws_okta_processor import client
+from aws_okta_processor.core import tty
+from aws_okta_processor.commands.agent import Agent
+
+
+CREDENTIALS = {
+    "AccessKeyId": "access_key_id",
+    "SecretAccessKey": "secret_access_key",
+    "SessionToken": "session_token",
+    "Expiration": "expiration"
+}
+
+
+class TestAgent(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, "agent", "agent.sock")
+        self.AGENT_OPTIONS = {
+            "--socket": self.socket_path,
+            "--silent": True,
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_handle_request_should_authenticate_from_pool(self):
+        agent = Agent(self.AGENT_OPTIONS)
+        agent.pool = MagicMock()
+        agent.pool.fetch_credentials.side_effect = lambda authenticate: dict(
+            CREDENTIALS
+        )
+
+        reply = agent.handle_request(request={
+            "argv": ["authenticate", "--role", "role-arn"],
+            "environ": {"AWS_OKTA_USER": "jdoe"},
+            "cwd": self.directory,
+        })
+
+        self.assertEqual(0, reply["status"])
+        self.assertEqual(
+            '{"AccessKeyId": "access_key_id", '
+            '"SecretAccessKey": "secret_access_key", '
+            '"SessionToken": "session_token", '
+            '"Expiration": "expiration", '
+            '"Version": 1}\n',
+            reply["stdout"]
+        )
+
+        authenticate = agent.pool.fetch_credentials.call_args.kwargs["authenticate"]
+        self.assertEqual("jdoe", authenticate.configuration["AWS_OKTA_USER"])
+        self.assertEqual("role-arn", authenticate.configuration["AWS_OKTA_ROLE"])
+
+    def test_handle_request_should_fail_unknown_commands(self):
+        agent = Agent(self.AGENT_OPTIONS)
+
+        reply = agent.handle_request(request={"argv": ["get-roles"]})
+
+        self.assertEqual({"status": 1, "stdout": ""}, reply)
+
+    def test_handle_request_should_fail_on_exit(self):
+        agent = Agent(self.AGENT_OPTIONS)
+        agent.pool = MagicMock()
+        agent.pool.fetch_credentials.side_effect = SystemExit(1)
+
+        reply = agent.handle_request(request={"argv": ["authenticate"]})
+
+        self.assertEqual({"status": 1, "stdout": ""}, reply)
+
+    def test_handle_request_should_use_pool_of_broker_user(self):
+        agent = Agent(dict(self.AGENT_OPTIONS, **{"--broker": True}))
+        pools = {1000: MagicMock(), 1001: MagicMock()}
+        agent.pools = MagicMock()
+        agent.pools.get_pool.side_effect = lambda uid: pools[uid]
+        for pool in pools.values():
+            pool.fetch_credentials.side_effect = lambda authenticate: dict(
+                CREDENTIALS
+            )
+
+        reply = agent.handle_request(
+            request={"argv": ["authenticate"], "cwd": self.directory}, uid=1001
+        )
+
+        self.assertEqual(0, reply["status"])
+        pools[1000].fetch_credentials.assert_not_called()
+        authenticate = pools[1001].fetch_credentials.call_args.kwargs["authenticate"]
+        self.assertEqual({"dotfiles": False, "pool": pools[1001], "environ": {}},
+                         authenticate.kwargs)
+
+    @patch("aws_okta_processor.core.tty.unix_input_tty")
+    @patch("aws_okta_processor.core.tty.has_terminal", return_value=True)
+    def test_handle_request_should_ask_client_to_login(
+        self, mock_has_terminal, mock_input_tty
+    ):
+        pool = MagicMock()
+        pool.fetch_credentials.side_effect = lambda authenticate: tty.input_tty()
+        agent = Agent(self.AGENT_OPTIONS)
+        agent.pool = pool
+        broker = Agent(dict(self.AGENT_OPTIONS, **{"--broker": True}))
+        broker.pools = MagicMock()
+        broker.pools.get_pool.return_value = pool
+
+        for server in [agent, broker]:
+            reply = server.handle_request(request={"argv": ["authenticate"]}, uid=1000)
+
+            self.assertEqual({"status": 1, "stdout": "", "login": True}, reply)
+        mock_input_tty.assert_not_called()
+
+    @patch("aws_okta_processor.commands.agent.print_tty")
+    def test_handle_request_should_not_log_arguments(self, mock_print_tty):
+        agent = Agent(self.AGENT_OPTIONS)
+        agent.pool = MagicMock()
+        agent.pool.fetch_credentials.side_effect = ValueError()
+
+        reply = agent.handle_request(request={
+            "argv": ["authenticate", "--role", "role-arn", "--pass", "secret"],
+        })
+
+        self.assertEqual({"status": 1, "stdout": ""}, reply)
+        mock_print_tty.assert_called_once_with(
+            "ERROR: Failed to authenticate role-arn!"
+        )
+
+    @patch("aws_okta_processor.core.totp.subprocess.run")
+    def test_handle_request_of_broker_should_refuse_seed_commands(self, mock_run):
+        agent = Agent(dict(self.AGENT_OPTIONS, **{"--broker": True}))
+        agent.pools = MagicMock()
+        pool = agent.pools.get_pool.return_value
+        pool.fetch_credentials.side_effect = lambda authenticate: dict(CREDENTIALS)
+
+        for request in [
+            {"argv": ["authenticate", "--totp-seed-command", "id"]},
+            {"argv": ["authenticate", "--totp-seed-file", "/etc/shadow"]},
+            {
+                "argv": ["authenticate"],
+                "environ": {"AWS_OKTA_TOTP_SEED_COMMAND": "id"},
+            },
+            {
+                "argv": ["authenticate"],
+                "environ": {"AWS_OKTA_TOTP_SEED_FILE": "/root/seed"},
+            },
+        ]:
+            reply = agent.handle_request(request=request, uid=1000)
+
+            self.assertEqual({"status": 1, "stdout": ""}, reply)
+
+        pool.fetch_credentials.assert_not_called()
+        mock_run.assert_not_called()
+
+    def test_handle_request_should_drop_unknown_environment(self):
+        agent = Agent(self.AGENT_OPTIONS)
+        agent.pool = MagicMock()
+        agent.pool.fetch_credentials.side_effect = lambda authenticate: dict(
+            CREDENTIALS
+        )
+
+        agent.handle_request(request={
+            "argv": ["authenticate"],
+            "environ": {"AWS_OKTA_USER": "jdoe", "AWS_OKTA_AGENT_SOCKET": "/tmp/x"},
+        })
+
+        authenticate = agent.pool.fetch_credentials.call_args.kwargs["authenticate"]
+        self.assertEqual({"AWS_OKTA_USER": "jdoe"}, authenticate.get_environ())
+
+    def test_broker_should_keep_users_in_memory(self):
+        agent = Agent(dict(self.AGENT_OPTIONS, **{
+            "--broker": True, "--max-users": "2", "--idle-timeout": "60"
+        }))
+
+        self.assertIsNone(agent.pool)
+        self.assertEqual(2, agent.pools.max_users)
+        self.assertEqual(60, agent.pools.idle_timeout)
+
+    def test_broker_server_should_identify_client(self):
+        agent = Agent(dict(self.AGENT_OPTIONS, **{"--broker": True}))
+        agent.handle_request = MagicMock(return_value={"status": 0, "stdout": ""})
+        server = agent.create_server(socket_path=self.socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        try:
+            self.assertEqual(
+                0o666, os.stat(self.socket_path).st_mode & 0o777
+            )
+            client.send_request(argv=["authenticate"], socket_path=self.socket_path)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(os.getuid(), agent.handle_request.call_args.kwargs["uid"])
+
+    def test_server_should_answer_client(self):
+        agent = Agent(self.AGENT_OPTIONS)
+        agent.pool = MagicMock()
+        agent.pool.fetch_credentials.side_effect = lambda authenticate: dict(
+            CREDENTIALS
+        )
+        server = agent.create_server(socket_path=self.socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        try:
+            self.assertEqual(
+                0o600, os.stat(self.socket_path).st_mode & 0o777
+            )
+            reply = client.send_request(
+                argv=["authenticate"], socket_path=self.socket_path
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(0, reply["status"])
+        self.assertIn('"AccessKeyId": "access_key_id"', reply["stdout"])
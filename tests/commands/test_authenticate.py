@@ -1,9 +1,12 @@
 from unittest.mock import patch
 
 import tests
+import json
 import os
+import tempfile
 
-from aws_okta_processor.commands.authenticate import Authenticate
+from aws_okta_processor.commands.authenticate import Authenticate, get_batch_error
+from aws_okta_processor.core.okta import OktaError
 from tests.test_base import TestBase
 
 
@@ -161,3 +164,71 @@ class TestAuthenticate(TestBase):
         self.assertEqual('okta-user1', config['AWS_OKTA_USER'])
         self.assertEqual('okta-pass1', config['AWS_OKTA_PASS'])
         self.assertEqual('org1-from-home', config['AWS_OKTA_ORGANIZATION'])
+
+    @patch("aws_okta_processor.commands.authenticate.JSONFileCache")
+    @patch("aws_okta_processor.commands.authenticate.print")
+    @patch("aws_okta_processor.commands.authenticate.SAMLFetcher.fetch_credentials")
+    @patch("aws_okta_processor.commands.authenticate.SAMLFetcher.create_okta")
+    @patch("aws_okta_processor.commands.authenticate.SAMLFetcher.needs_refresh")
+    def test_run_batch(
+            self,
+            mock_needs_refresh,
+            mock_create_okta,
+            mock_fetch_credentials,
+            mock_print,
+            mock_json_file_cache
+    ):
+        jobs_file = tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False)
+        jobs_file.write(
+            '{"id": "one", "role": "arn:aws:iam::1:role/One", "key": "one"}\n'
+            '{"id": "two", "role": "arn:aws:iam::1:role/Two", "key": "two"}\n'
+            '\n'
+            '{"id": "bad", "user": "locked", "key": "bad"}\n'
+            '{"id": "worse", "user": "locked", "key": "worse"}\n'
+            '{"id": "unknown", "colour": "blue"}\n'
+            '[]\n'
+        )
+        jobs_file.close()
+        self.addCleanup(os.remove, jobs_file.name)
+
+        mock_needs_refresh.return_value = True
+
+        def create_okta(no_okta_cache=None):
+            if mock_create_okta.call_count > 1:
+                raise OktaError(
+                    message="Error: Summary: Authentication failed",
+                    status_code=401,
+                    error_code="E0000004",
+                )
+            return "okta"
+
+        mock_create_okta.side_effect = create_okta
+        mock_fetch_credentials.side_effect = lambda: dict(CREDENTIALS)
+
+        self.OPTIONS["--batch"] = jobs_file.name
+        self.OPTIONS["--batch-workers"] = "1"
+        auth = Authenticate(self.OPTIONS, dotfiles=False, environ={})
+
+        with self.assertRaises(SystemExit):
+            auth.run()
+
+        results = [json.loads(args[0]) for args, _ in mock_print.call_args_list]
+        self.assertEqual(results, [
+            {"id": "unknown", "error": "Unknown job option 'colour'"},
+            {"id": 7, "error": "A job must be a JSON object"},
+            {"id": "one", "credentials": dict(CREDENTIALS, Version=1)},
+            {"id": "two", "credentials": dict(CREDENTIALS, Version=1)},
+            {"id": "bad", "error": "Error: Summary: Authentication failed"},
+            {"id": "worse", "error": "Error: Summary: Authentication failed"},
+        ])
+
+        # One Okta login per user and organization, none repeated once failed
+        self.assertEqual(mock_create_okta.call_count, 2)
+
+    def test_get_batch_error(self):
+        self.assertEqual(
+            "Error: Summary: Authentication failed",
+            get_batch_error(OktaError(message="Error: Summary: Authentication failed"))
+        )
+        self.assertEqual("Failed to authenticate", get_batch_error(SystemExit(1)))
+        self.assertEqual("Bad role", get_batch_error(ValueError("Bad role")))
@@ -37,4 +37,19 @@ class TestBase(TestBase):
         })
 
         self.assertEqual('okta-env1', config['AWS_OKTA_ENVIRONMENT'])
-        self.assertEqual('org1', config['AWS_OKTA_ORGANIZATION'])
\ No newline at end of file
+        self.assertEqual('org1', config['AWS_OKTA_ORGANIZATION'])
+    @patch('aws_okta_processor.commands.base.Base.get_userfile',
+           return_value=tests.get_fixture('userhome/.awsoktaprocessor'))
+    @patch('aws_okta_processor.commands.base.Base.get_cwdfile',
+           return_value=tests.get_fixture('.awsoktaprocessor'))
+    def test_extends_configuration_should_skip_disabled_dotfiles(self, mock_userfile, mock_cwdfile):
+        authenticate = tests.TestCommand(self.OPTIONS)
+        authenticate.kwargs['dotfiles'] = False
+
+        config = authenticate.extend_configuration({
+            'AWS_OKTA_ENVIRONMENT': None,
+        }, 'authenticate', {
+            'AWS_OKTA_ENVIRONMENT': 'environment',
+        })
+
+        self.assertIsNone(config['AWS_OKTA_ENVIRONMENT'])
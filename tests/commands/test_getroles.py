@@ -1,6 +1,7 @@
+import json
 import os
 
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 from tests.test_base import TestBase
 
@@ -148,3 +149,41 @@ class TestGetRolesCommand(TestBase):
                 "Key": self.OPTIONS["--key"],
             }
         )
+
+    @patch("aws_okta_processor.commands.getroles.SAMLFetcher.get_all_app_roles")
+    @patch("aws_okta_processor.commands.getroles.sys.stdout.write")
+    def test_run_should_return_all_applications(
+        self, mock_sys_stdout_write, mock_get_all_app_roles
+    ):
+        self.OPTIONS["--output"] = "text"
+        self.OPTIONS["--all-applications"] = True
+        os.environ["AWS_OKTA_OUTPUT_FORMAT"] = "{application_url},{account},{role}"
+        mock_get_all_app_roles.return_value = [
+            {
+                "Application": f"app-url-{index}",
+                "User": "jdoe",
+                "Organization": "test-org",
+                "Accounts": {
+                    f"Account: test-account-{index} (123{index})": ["role1-deploy"]
+                }
+            }
+            for index in (1, 2)
+        ]
+
+        command = GetRoles(self.OPTIONS)
+        command.run()
+
+        mock_sys_stdout_write.assert_has_calls([
+            call('app-url-1,test-account-1,role1-deploy\n'),
+            call('app-url-2,test-account-2,role1-deploy\n'),
+        ])
+
+        self.OPTIONS["--output"] = "json"
+        mock_sys_stdout_write.reset_mock()
+        GetRoles(self.OPTIONS).run()
+
+        actual = json.loads(mock_sys_stdout_write.call_args[0][0])
+        self.assertEqual(
+            ["app-url-1", "app-url-2"],
+            [accounts_and_roles["application_url"] for accounts_and_roles in actual]
+        )
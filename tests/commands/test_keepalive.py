@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from unittest.mock import patch
+
+import responses
+
+from docopt import docopt
+
+from aws_okta_processor.commands import keepalive
+from aws_okta_processor.commands.keepalive import KeepAlive, is_session_due
+
+from tests.test_base import SESSION_RESPONSE
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def get_time(**kwargs):
+    return (datetime.now(timezone.utc) + timedelta(**kwargs)).isoformat()
+
+
+class TestKeepAlive(TestCase):
+    def setUp(self):
+        home_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home_directory)
+        patcher = patch(
+            "aws_okta_processor.core.okta.os.path.expanduser",
+            return_value=home_directory,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cache_directory = os.path.join(
+            home_directory, ".aws-okta-processor", "cache"
+        )
+        os.makedirs(self.cache_directory)
+
+    def write_session(self, organization=None, created_at=None, expires_at=None):
+        session = dict(
+            json.loads(SESSION_RESPONSE),
+            createdAt=created_at,
+            expiresAt=expires_at,
+            **{
+                "aws-okta-processor": {
+                    "user_name": "jdoe",
+                    "organization": organization,
+                }
+            }
+        )
+        path = os.path.join(self.cache_directory, f"jdoe-{organization}-session.json")
+        with open(path, "w") as file:
+            json.dump(session, file)
+
+    def test_is_session_due(self):
+        def is_due(created_at=None, expires_at=None):
+            return is_session_due(
+                okta_session={"createdAt": created_at, "expiresAt": expires_at},
+                threshold=600,
+                max_span=36000,
+                now=NOW,
+            )
+
+        self.assertTrue(is_due("2026-10-19T08:00:00Z", "2026-10-19T12:05:00Z"))
+        # Not expiring soon enough
+        self.assertFalse(is_due("2026-10-19T08:00:00Z", "2026-10-19T13:00:00Z"))
+        # Past the working day
+        self.assertFalse(is_due("2026-10-19T01:00:00Z", "2026-10-19T12:05:00Z"))
+        self.assertFalse(is_due(None, "2026-10-19T12:05:00Z"))
+
+    @patch("aws_okta_processor.commands.keepalive.print_tty")
+    @patch("aws_okta_processor.core.okta.print_tty")
+    @responses.activate
+    def test_run(self, mock_okta_print_tty, mock_print_tty):
+        self.write_session(
+            organization="due.okta.com",
+            created_at=get_time(hours=-2),
+            expires_at=get_time(minutes=5),
+        )
+        self.write_session(
+            organization="fresh.okta.com",
+            created_at=get_time(hours=-2),
+            expires_at=get_time(hours=1),
+        )
+        self.write_session(
+            organization="late.okta.com",
+            created_at=get_time(hours=-11),
+            expires_at=get_time(minutes=5),
+        )
+        expires_at = get_time(hours=2)
+        responses.add(
+            responses.POST,
+            "https://due.okta.com/api/v1/sessions/me/lifecycle/refresh",
+            json=dict(json.loads(SESSION_RESPONSE), expiresAt=expires_at),
+        )
+
+        options = docopt(keepalive.__doc__, argv=["keepalive"])
+        KeepAlive(options, dotfiles=False, environ={}).run()
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(
+            responses.calls[0].request.headers["Cookie"], "sid=session_token"
+        )
+        mock_print_tty.assert_any_call(
+            f"Refreshed Okta session of jdoe@due.okta.com until {expires_at}.",
+            silent=None,
+        )
+        mock_print_tty.assert_any_call(
+            "Okta session of jdoe@late.okta.com is not due.", silent=None
+        )
+
+    @patch("aws_okta_processor.commands.keepalive.print_tty")
+    @patch("aws_okta_processor.commands.keepalive.Okta.refresh_deferred_okta_session")
+    def test_run_should_exit_on_failure(self, mock_refresh, mock_print_tty):
+        self.write_session(
+            organization="due.okta.com",
+            created_at=get_time(hours=-2),
+            expires_at=get_time(minutes=5),
+        )
+        mock_refresh.side_effect = SystemExit(1)
+
+        options = docopt(keepalive.__doc__, argv=["keepalive"])
+        with self.assertRaises(SystemExit):
+            KeepAlive(options, dotfiles=False, environ={}).run()
+
+        mock_print_tty.assert_called_once_with(
+            "ERROR: Failed to refresh the Okta session of jdoe@due.okta.com!"
+        )
+
+    @patch("aws_okta_processor.commands.keepalive.print_tty")
+    @patch("aws_okta_processor.core.okta.print_tty")
+    @responses.activate
+    def test_run_should_exit_when_session_is_revoked(
+        self, mock_okta_print_tty, mock_print_tty
+    ):
+        self.write_session(
+            organization="due.okta.com",
+            created_at=get_time(hours=-2),
+            expires_at=get_time(minutes=5),
+        )
+        responses.add(
+            responses.POST,
+            "https://due.okta.com/api/v1/sessions/me/lifecycle/refresh",
+            status=404,
+            json={
+                "errorCode": "E0000007",
+                "errorSummary": "Not found: Resource not found: me (Session)",
+            },
+        )
+
+        options = docopt(keepalive.__doc__, argv=["keepalive"])
+        with self.assertRaises(SystemExit):
+            KeepAlive(options, dotfiles=False, environ={}).run()
+
+        mock_print_tty.assert_called_once_with(
+            "ERROR: Failed to refresh the Okta session of jdoe@due.okta.com!"
+        )
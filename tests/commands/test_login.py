@@ -0,0 +1,113 @@
+import threading
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from docopt import docopt
+
+from aws_okta_processor.commands import login
+from aws_okta_processor.commands.login import Login
+from aws_okta_processor.core import tty
+from aws_okta_processor.core.logins import login_all, parse_login
+
+
+def get_login(argv=None, environ=None):
+    options = docopt(login.__doc__, argv=["login"] + (argv or []))
+    return Login(options, dotfiles=False, environ=environ or {})
+
+
+class TestLogin(TestCase):
+    def test_parse_login(self):
+        self.assertEqual(
+            parse_login(login="jdoe@mycompany.okta.com"),
+            ("jdoe", "mycompany.okta.com"),
+        )
+        self.assertEqual(
+            parse_login(login="jdoe@mycompany.com@mycompany.okta.com"),
+            ("jdoe@mycompany.com", "mycompany.okta.com"),
+        )
+        for invalid in ("jdoe", "@mycompany.okta.com", "jdoe@"):
+            with self.assertRaises(ValueError):
+                parse_login(login=invalid)
+
+    def test_get_configuration_from_environment(self):
+        command = get_login(
+            environ={"AWS_OKTA_LOGINS": "jdoe@one.okta.com\n jdoe@two.okta.com"}
+        )
+
+        self.assertEqual(
+            list(command.get_fetchers()), ["jdoe@one.okta.com", "jdoe@two.okta.com"]
+        )
+
+    def test_get_fetchers(self):
+        command = get_login(
+            argv=["-f", "push:okta", "jdoe@one.okta.com", "ssmith@two.okta.com"]
+        )
+        fetchers = command.get_fetchers()
+        configuration = fetchers["ssmith@two.okta.com"]._configuration
+
+        self.assertEqual(configuration["AWS_OKTA_USER"], "ssmith")
+        self.assertEqual(configuration["AWS_OKTA_ORGANIZATION"], "two.okta.com")
+        self.assertEqual(configuration["AWS_OKTA_FACTOR"], "push:okta")
+
+    @patch("aws_okta_processor.commands.login.print_tty")
+    @patch("aws_okta_processor.commands.login.SAMLFetcher.create_okta")
+    def test_run(self, mock_create_okta, mock_print_tty):
+        get_login(argv=["--no-okta-cache", "jdoe@one.okta.com"]).run()
+
+        mock_create_okta.assert_called_once_with(no_okta_cache=True)
+        mock_print_tty.assert_called_once_with(
+            "Logged in to jdoe@one.okta.com.", silent=None
+        )
+
+    @patch("aws_okta_processor.commands.login.print_tty")
+    @patch("aws_okta_processor.commands.login.SAMLFetcher.create_okta")
+    def test_run_should_exit_on_failure(self, mock_create_okta, mock_print_tty):
+        mock_create_okta.side_effect = [object(), SystemExit(1)]
+
+        with self.assertRaises(SystemExit):
+            get_login(argv=["-w", "1", "jdoe@one.okta.com", "jdoe@two.okta.com"]).run()
+
+        mock_print_tty.assert_any_call("ERROR: Failed to log in to jdoe@two.okta.com!")
+
+    @patch("aws_okta_processor.commands.login.print_tty")
+    def test_run_without_logins(self, mock_print_tty):
+        with self.assertRaises(SystemExit):
+            get_login().run()
+
+        mock_print_tty.assert_called_once_with("ERROR: No logins were given!")
+
+    @patch("aws_okta_processor.core.tty.print_tty")
+    def test_login_all_should_prompt_one_at_a_time(self, mock_print_tty):
+        prompting = threading.Event()
+        both_started = threading.Barrier(2)
+        overlaps = []
+
+        def log_in(label):
+            both_started.wait(timeout=5)
+            with tty.prompting():
+                overlaps.append(prompting.is_set())
+                prompting.set()
+                threading.Event().wait(0.05)
+                prompting.clear()
+            if label == "jdoe@two.okta.com":
+                raise SystemExit(1)
+            return label
+
+        sessions = login_all(
+            logins={
+                label: lambda label=label: log_in(label)
+                for label in ("jdoe@one.okta.com", "jdoe@two.okta.com")
+            },
+            workers=2,
+        )
+
+        self.assertEqual(
+            list(sessions.items()),
+            [("jdoe@one.okta.com", "jdoe@one.okta.com"), ("jdoe@two.okta.com", None)],
+        )
+        self.assertEqual(overlaps, [False, False])
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_print_tty.call_args_list),
+            ["jdoe@one.okta.com:", "jdoe@two.okta.com:"],
+        )
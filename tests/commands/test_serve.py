@@ -0,0 +1,186 @@
+import os
+import tempfile
+import threading
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from botocore.credentials import ContainerProvider
+
+from tests.test_base import SAML_RESPONSE, TestBase
+
+from aws_okta_processor.commands.serve import Serve
+from aws_okta_processor.core.pool import CredentialPool
+from aws_okta_processor.core.saml import AWSRole
+
+AWS_CONFIG = """
+[profile one]
+credential_process=aws-okta-processor authenticate -o org.okta.com -u jdoe -a app-one -r arn:aws:iam::1:role/Role-One -k one
+
+[profile two]
+credential_process=aws-okta-processor authenticate -o org.okta.com -u jdoe -a app-one -r arn:aws:iam::1:role/Role-Two -k two
+"""  # noqa: E501
+
+CREDENTIALS = {
+    "AccessKeyId": "access_key_id",
+    "SecretAccessKey": "secret_access_key",
+    "SessionToken": "session_token",
+    "Expiration": "2030-01-01T00:00:00Z",
+}
+
+
+class TestServe(TestBase):
+    def setUp(self):
+        super().setUp()
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".ini", delete=False)
+        config_file.write(AWS_CONFIG)
+        config_file.close()
+        self.config_file = config_file.name
+        self.SERVE_OPTIONS = {
+            "--config": self.config_file,
+            "--host": "127.0.0.1",
+            "--port": "0",
+            "--token": "token",
+            "--profile": "one",
+            "--interval": "60",
+            "--silent": True,
+        }
+
+    def tearDown(self):
+        os.remove(self.config_file)
+
+    def get_serve(self):
+        serve = Serve(self.SERVE_OPTIONS)
+        serve.pool = MagicMock()
+        serve.pool.fetch_credentials.return_value = dict(CREDENTIALS)
+        return serve
+
+    def test_get_profile(self):
+        serve = self.get_serve()
+
+        self.assertEqual("one", serve.get_profile(path="/"))
+        self.assertEqual("two", serve.get_profile(path="/profiles/two"))
+        self.assertEqual("a b", serve.get_profile(path="/profiles/a%20b?x=1"))
+        self.assertIsNone(serve.get_profile(path="/other"))
+
+    def test_handle_request_should_require_token(self):
+        serve = self.get_serve()
+
+        status, _ = serve.handle_request(path="/", authorization=None)
+        self.assertEqual(401, status)
+
+        status, _ = serve.handle_request(path="/", authorization="wrong")
+        self.assertEqual(401, status)
+
+        serve.pool.fetch_credentials.assert_not_called()
+
+    def test_handle_request_should_reject_unknown_profiles(self):
+        serve = self.get_serve()
+
+        status, _ = serve.handle_request(
+            path="/profiles/three", authorization="token"
+        )
+
+        self.assertEqual(404, status)
+
+    def test_handle_request_should_return_credentials(self):
+        serve = self.get_serve()
+
+        status, body = serve.handle_request(
+            path="/profiles/two", authorization="token"
+        )
+
+        self.assertEqual(200, status)
+        self.assertEqual(
+            {
+                "AccessKeyId": "access_key_id",
+                "SecretAccessKey": "secret_access_key",
+                "Token": "session_token",
+                "Expiration": "2030-01-01T00:00:00Z",
+            },
+            body,
+        )
+        authenticate = serve.pool.fetch_credentials.call_args.kwargs["authenticate"]
+        self.assertEqual(
+            "arn:aws:iam::1:role/Role-Two", authenticate.configuration["AWS_OKTA_ROLE"]
+        )
+        self.assertEqual({"two"}, serve.served)
+
+    def test_handle_request_should_report_failures(self):
+        serve = self.get_serve()
+        serve.pool.fetch_credentials.side_effect = SystemExit(1)
+
+        status, body = serve.handle_request(path="/", authorization="token")
+
+        self.assertEqual(500, status)
+        self.assertEqual("CredentialsError", body["Code"])
+        self.assertEqual(set(), serve.served)
+
+    def test_refresh_should_only_refresh_served_profiles(self):
+        serve = self.get_serve()
+        serve.served.add("two")
+
+        serve.refresh()
+
+        serve.pool.fetch_credentials.assert_called_once()
+        authenticate = serve.pool.fetch_credentials.call_args.kwargs["authenticate"]
+        self.assertEqual(
+            "arn:aws:iam::1:role/Role-Two", authenticate.configuration["AWS_OKTA_ROLE"]
+        )
+
+    @patch("aws_okta_processor.core.fetcher.boto3.client")
+    @patch("aws_okta_processor.core.fetcher.SAMLFetcher._get_aws_roles")
+    @patch("aws_okta_processor.core.fetcher.SAMLFetcher.create_okta")
+    @patch("aws_okta_processor.core.fetcher.print_tty")
+    def test_handle_request_should_use_cached_credentials(
+        self, mock_print_tty, mock_create_okta, mock_get_aws_roles, mock_client
+    ):
+        serve = Serve(self.SERVE_OPTIONS)
+        serve.pool = CredentialPool()
+
+        okta = MagicMock(warmer=None, user_name="jdoe", organization="org.okta.com")
+        okta.get_saml_response.return_value = SAML_RESPONSE
+        mock_create_okta.return_value = okta
+        mock_get_aws_roles.return_value = {
+            "Account: 1": {
+                "arn:aws:iam::1:role/Role-One": AWSRole(
+                    role_arn="arn:aws:iam::1:role/Role-One",
+                    principal_arn="arn:aws:iam::1:saml-provider/Okta",
+                )
+            }
+        }
+        mock_client().assume_role_with_saml.return_value = {
+            "Credentials": dict(
+                CREDENTIALS,
+                Expiration=datetime.now(timezone.utc) + timedelta(hours=1),
+            )
+        }
+
+        for _ in range(2):
+            status, _ = serve.handle_request(path="/", authorization="token")
+            self.assertEqual(200, status)
+
+        # The second request is answered from the cache, without logging in
+        mock_client().assume_role_with_saml.assert_called_once()
+        mock_create_okta.assert_called_once()
+
+    def test_server_should_answer_botocore(self):
+        serve = self.get_serve()
+        server = serve.create_server()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host, port = server.server_address[:2]
+
+        try:
+            provider = ContainerProvider(environ={
+                "AWS_CONTAINER_CREDENTIALS_FULL_URI": f"http://{host}:{port}/profiles/one",  # noqa: E501
+                "AWS_CONTAINER_AUTHORIZATION_TOKEN": "token",
+            })
+            credentials = provider.load().get_frozen_credentials()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual("access_key_id", credentials.access_key)
+        self.assertEqual("secret_access_key", credentials.secret_key)
+        self.assertEqual("session_token", credentials.token)
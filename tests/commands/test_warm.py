@@ -0,0 +1,204 @@
+import os
+import tempfile
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+from tests.test_base import SAML_RESPONSE, TestBase
+
+from aws_okta_processor.commands import warm
+from aws_okta_processor.commands.warm import Warm
+from aws_okta_processor.core.saml import AWSRole
+
+AWS_CONFIG = """
+[profile one]
+credential_process=aws-okta-processor authenticate --organization="org.okta.com" --user="jdoe" --application="app-one" --role="arn:aws:iam::1:role/Role-One" --key="one"
+
+[profile two]
+credential_process=/usr/local/bin/aws-okta-processor authenticate -o org.okta.com -u jdoe -a app-one -r arn:aws:iam::1:role/Role-Two -k two
+
+[profile three]
+credential_process=aws-okta-processor authenticate -o org.okta.com -u jdoe -a app-two -r arn:aws:iam::2:role/Role-One -k three
+
+[profile static]
+aws_access_key_id=foo
+
+[profile other]
+credential_process=other-tool authenticate
+"""  # noqa: E501
+
+
+def get_credentials(expiration):
+    return {
+        "Credentials": {
+            "AccessKeyId": "access_key_id",
+            "SecretAccessKey": "secret_access_key",
+            "SessionToken": "session_token",
+            "Expiration": expiration.isoformat().replace("+00:00", "Z"),
+        }
+    }
+
+
+class TestWarm(TestBase):
+    def setUp(self):
+        super().setUp()
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".ini", delete=False)
+        config_file.write(AWS_CONFIG)
+        config_file.close()
+        self.config_file = config_file.name
+        self.WARM_OPTIONS = {
+            "--config": self.config_file,
+            "--threshold": "1800",
+            "--workers": "4",
+            "--profile": None,
+            "--silent": True,
+        }
+
+    def tearDown(self):
+        os.remove(self.config_file)
+
+    def test_get_authenticate_args(self):
+        self.assertEqual(
+            ["-r", "role"],
+            warm.get_authenticate_args(
+                credential_process="/opt/bin/aws-okta-processor authenticate -r role"
+            ),
+        )
+        self.assertIsNone(
+            warm.get_authenticate_args(credential_process="other-tool authenticate")
+        )
+        self.assertIsNone(
+            warm.get_authenticate_args(credential_process="aws-okta-processor get-roles")
+        )
+
+    def test_get_profiles_should_find_processor_profiles(self):
+        command = Warm(self.WARM_OPTIONS)
+        profiles = command.get_profiles()
+
+        self.assertEqual(["one", "two", "three"], list(profiles))
+        self.assertEqual(
+            "arn:aws:iam::1:role/Role-Two",
+            profiles["two"].configuration["AWS_OKTA_ROLE"],
+        )
+        self.assertEqual("one", profiles["one"].configuration["AWS_OKTA_KEY"])
+
+    def test_get_profiles_should_filter_profiles(self):
+        self.WARM_OPTIONS["--profile"] = "t*"
+        command = Warm(self.WARM_OPTIONS)
+
+        self.assertEqual(["two", "three"], list(command.get_profiles()))
+
+    @patch("aws_okta_processor.commands.warm.print_tty")
+    @patch("aws_okta_processor.commands.warm.JSONFileCache")
+    def test_get_stale_fetchers_should_skip_fresh_profiles(
+        self, mock_json_file_cache, mock_print_tty
+    ):
+        cache = {}
+        mock_json_file_cache.return_value = cache
+        command = Warm(self.WARM_OPTIONS)
+        profiles = command.get_profiles()
+
+        now = datetime.now(timezone.utc)
+        fresh = warm.SAMLFetcher(profiles["one"], cache=cache)
+        stale = warm.SAMLFetcher(profiles["two"], cache=cache)
+        cache[fresh._cache_key] = get_credentials(now + timedelta(hours=1))
+        cache[stale._cache_key] = get_credentials(now + timedelta(minutes=10))
+
+        fetchers = command.get_stale_fetchers(profiles=profiles)
+
+        self.assertEqual(["two", "three"], list(fetchers))
+
+    @patch("aws_okta_processor.commands.warm.print_tty")
+    @patch("aws_okta_processor.commands.warm.JSONFileCache")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher.refresh")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher._get_app_roles")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher.create_okta")
+    def test_run_should_share_okta_session_and_assertions(
+        self,
+        mock_create_okta,
+        mock_get_app_roles,
+        mock_refresh,
+        mock_json_file_cache,
+        mock_print_tty,
+    ):
+        mock_json_file_cache.return_value = {}
+        mock_get_app_roles.return_value = ({}, "assertion", "app", "jdoe", "org")
+
+        command = Warm(self.WARM_OPTIONS)
+        command.run()
+
+        mock_create_okta.assert_called_once()
+        self.assertEqual(2, mock_get_app_roles.call_count)
+        self.assertEqual(3, mock_refresh.call_count)
+
+    @patch("aws_okta_processor.commands.warm.print_tty")
+    @patch("aws_okta_processor.commands.warm.JSONFileCache")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher.refresh")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher._get_app_roles")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher.create_okta")
+    def test_run_should_exit_when_a_profile_fails(
+        self,
+        mock_create_okta,
+        mock_get_app_roles,
+        mock_refresh,
+        mock_json_file_cache,
+        mock_print_tty,
+    ):
+        mock_json_file_cache.return_value = {}
+        mock_get_app_roles.return_value = ({}, "assertion", "app", "jdoe", "org")
+        mock_refresh.side_effect = [None, SystemExit(1), None]
+        self.WARM_OPTIONS["--workers"] = "1"
+
+        command = Warm(self.WARM_OPTIONS)
+
+        with self.assertRaises(SystemExit):
+            command.run()
+
+        self.assertEqual(3, mock_refresh.call_count)
+
+    @patch("aws_okta_processor.commands.warm.print_tty")
+    @patch("aws_okta_processor.core.fetcher.print_tty")
+    @patch("aws_okta_processor.commands.warm.JSONFileCache")
+    @patch("aws_okta_processor.core.fetcher.boto3.client")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher._get_aws_roles")
+    @patch("aws_okta_processor.commands.warm.SAMLFetcher.create_okta")
+    def test_run_should_cache_credentials_under_profile_keys(
+        self,
+        mock_create_okta,
+        mock_get_aws_roles,
+        mock_client,
+        mock_json_file_cache,
+        mock_fetcher_print_tty,
+        mock_print_tty,
+    ):
+        cache = {}
+        mock_json_file_cache.return_value = cache
+        okta = MagicMock(warmer=None, user_name="jdoe", organization="org.okta.com")
+        okta.get_saml_response.return_value = SAML_RESPONSE
+        mock_create_okta.return_value = okta
+        mock_get_aws_roles.return_value = {
+            f"Account: {account}": {
+                f"arn:aws:iam::{account}:role/{role}": AWSRole(
+                    role_arn=f"arn:aws:iam::{account}:role/{role}",
+                    principal_arn=f"arn:aws:iam::{account}:saml-provider/Okta",
+                )
+                for role in ("Role-One", "Role-Two")
+            }
+            for account in (1, 2)
+        }
+        expiration = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        def assume_role_with_saml(**kwargs):
+            response = get_credentials(expiration)
+            response["Credentials"]["Expiration"] = expiration
+            return response
+
+        mock_client().assume_role_with_saml.side_effect = assume_role_with_saml
+
+        command = Warm(self.WARM_OPTIONS)
+        command.run()
+
+        # credential_process reads them under the keys of unused commands
+        for profile, authenticate in command.get_profiles().items():
+            fetcher = warm.SAMLFetcher(authenticate, cache=cache)
+            self.assertIn(fetcher._cache_key, cache, profile)
@@ -0,0 +1,142 @@
+import threading
+import time
+
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.deadline import (
+    Deadline,
+    DeadlineError,
+    call_within_deadline,
+    check_deadline,
+    get_timeout,
+    phase,
+)
+from aws_okta_processor.core.retry import RetryPolicy
+from aws_okta_processor.core.steps import StepGraph
+
+URL = "https://organization.okta.com/api/v1/users/me/appLinks"
+
+
+class TestDeadline(TestCase):
+    def test_get_timeout_without_deadline(self):
+        self.assertEqual(get_timeout(timeout=10), 10)
+        self.assertEqual(get_timeout(timeout=(10, 30)), (10, 30))
+        check_deadline(wait=3600)
+
+        with phase(name="okta_login"):
+            pass
+
+    def test_get_timeout_should_be_limited_to_time_left(self):
+        with hooks.use_deadline(Deadline(seconds=5)):
+            self.assertEqual(get_timeout(timeout=1), 1)
+            self.assertLessEqual(get_timeout(timeout=10), 5)
+            connect_timeout, read_timeout = get_timeout(timeout=(1, 30))
+            self.assertEqual(connect_timeout, 1)
+            self.assertLessEqual(read_timeout, 5)
+            self.assertLessEqual(get_timeout(), 5)
+
+    def test_phase_should_get_its_share(self):
+        deadline = Deadline(seconds=10)
+
+        with hooks.use_deadline(deadline):
+            with phase(name="okta_login"):
+                self.assertLessEqual(deadline.get_remaining(), 7)
+                with phase(name="okta_saml"):
+                    self.assertLessEqual(deadline.get_remaining(), 7)
+            self.assertGreater(deadline.get_remaining(), 7)
+
+        self.assertEqual(list(deadline.durations), ["okta_saml", "okta_login"])
+
+    @patch("aws_okta_processor.core.deadline.print_tty")
+    def test_check_should_name_the_phase(self, mock_print_tty):
+        deadline = Deadline(seconds=10)
+
+        with hooks.use_deadline(deadline):
+            with phase(name="okta_refresh"):
+                pass
+            with phase(name="okta_login"):
+                check_deadline(wait=1)
+                with self.assertRaises(DeadlineError) as context:
+                    check_deadline(wait=8)
+
+        self.assertEqual(context.exception.phase, "okta_login")
+        self.assertEqual(context.exception.code, 1)
+        message = mock_print_tty.call_args[0][0]
+        self.assertTrue(
+            message.startswith("Error: Deadline of 10s exceeded in okta_login")
+        )
+        self.assertIn("(done: okta_refresh 0.0s)", message)
+
+    @patch("aws_okta_processor.core.deadline.print_tty")
+    def test_get_timeout_should_expire(self, mock_print_tty):
+        with hooks.use_deadline(Deadline(seconds=0)):
+            with self.assertRaises(DeadlineError):
+                get_timeout(timeout=10)
+
+    @patch("aws_okta_processor.core.deadline.print_tty")
+    def test_steps_should_run_as_phases(self, mock_print_tty):
+        deadline = Deadline(seconds=5)
+
+        graph = StepGraph()
+        graph.add("okta_applications", lambda: get_timeout(timeout=10))
+        graph.add("sts_client", lambda: check_deadline(wait=60))
+
+        with hooks.use_deadline(deadline):
+            graph.run()
+
+        self.assertLessEqual(graph.result("okta_applications"), 5)
+        with self.assertRaises(DeadlineError) as context:
+            graph.result("sts_client")
+        self.assertEqual(context.exception.phase, "sts_client")
+        self.assertIn("okta_applications", deadline.durations)
+
+    @patch("aws_okta_processor.core.deadline.print_tty")
+    def test_call_within_deadline(self, mock_print_tty):
+        self.assertEqual(call_within_deadline(max, 1, 2), 2)
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        with hooks.use_deadline(Deadline(seconds=0.2)):
+            self.assertEqual(call_within_deadline(max, 1, 2), 2)
+
+            with self.assertRaises(ValueError):
+                call_within_deadline(int, "x")
+
+            started = time.monotonic()
+            with self.assertRaises(DeadlineError):
+                call_within_deadline(release.wait)
+
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_retry_policy_should_send_time_left(self):
+        session = MagicMock()
+        session.get.return_value.status_code = 200
+
+        with hooks.use_deadline(Deadline(seconds=5)):
+            RetryPolicy().request(session, "GET", URL, timeout=10)
+
+        self.assertLessEqual(session.get.call_args[1]["timeout"], 5)
+
+        RetryPolicy().request(session, "GET", URL, timeout=10)
+
+        self.assertEqual(session.get.call_args[1]["timeout"], 10)
+
+    @patch("aws_okta_processor.core.deadline.print_tty")
+    @patch("aws_okta_processor.core.retry.time.sleep")
+    @patch("aws_okta_processor.core.retry.get_backoff", return_value=2)
+    def test_retry_policy_should_not_retry_past_deadline(
+        self, mock_get_backoff, mock_sleep, mock_print_tty
+    ):
+        session = MagicMock()
+        session.get.return_value.status_code = 503
+
+        with hooks.use_deadline(Deadline(seconds=1)):
+            with self.assertRaises(DeadlineError):
+                RetryPolicy().request(session, "GET", URL, timeout=10)
+
+        session.get.assert_called_once()
+        mock_sleep.assert_not_called()
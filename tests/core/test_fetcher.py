@@ -1,4 +1,5 @@
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from unittest import mock
 
 from tests.test_base import TestBase
@@ -10,6 +11,7 @@ from mock import MagicMock
 
 from aws_okta_processor.commands.authenticate import Authenticate
 from aws_okta_processor.core.fetcher import SAMLFetcher
+from aws_okta_processor.core.okta import OktaError
 
 
 # Need to add actual tests
@@ -227,3 +229,204 @@ class TestFetcher(TestBase):
             call('[ 3 ] Role-One', indents=1),
             call('Selection: ', newline=False)
         ])
+
+    def test_expires_within(self):
+        authenticate = Authenticate(self.OPTIONS)
+        cache = {}
+        fetcher = SAMLFetcher(authenticate, cache=cache)
+
+        self.assertTrue(fetcher.expires_within(60))
+
+        cache[fetcher._cache_key] = {
+            'Credentials': {
+                'AccessKeyId': 'test-key1',
+                'SecretAccessKey': 'test-secret1',
+                'SessionToken': 'test-token1',
+                'Expiration': (
+                    datetime.utcnow() + timedelta(minutes=30)
+                ).isoformat() + 'Z'
+            }
+        }
+
+        self.assertFalse(fetcher.expires_within(60))
+        self.assertTrue(fetcher.expires_within(3600))
+
+    def test_expiry_window_should_follow_refresh_policy(self):
+        self.OPTIONS["--duration"] = "900"
+        self.OPTIONS["--refresh-jitter"] = "0"
+        fetcher = SAMLFetcher(Authenticate(self.OPTIONS), cache={})
+        self.assertEqual(90, fetcher._expiry_window_seconds)
+
+        self.OPTIONS["--refresh-window"] = "600"
+        fetcher = SAMLFetcher(Authenticate(self.OPTIONS), cache={})
+        self.assertEqual(600, fetcher._expiry_window_seconds)
+
+        fetcher = SAMLFetcher(
+            Authenticate(self.OPTIONS), cache={}, expiry_window_seconds=30
+        )
+        self.assertEqual(30, fetcher._expiry_window_seconds)
+
+    @patch("boto3.client")
+    @patch('aws_okta_processor.core.fetcher.print_tty')
+    @patch('aws_okta_processor.core.fetcher.prompt.print_tty')
+    @patch('aws_okta_processor.core.fetcher.Okta')
+    def test_fetcher_should_remember_missing_role(
+            self,
+            mock_okta,
+            mock_prompt_print_tty,
+            mock_print_tty,
+            mock_client
+    ):
+        self.OPTIONS["--role"] = "arn:aws:iam::1:role/Role-Missing"
+        self.OPTIONS["--application"] = "app-url"
+        cache = {}
+        mock_okta().get_saml_response.return_value = SAML_RESPONSE
+        mock_okta.reset_mock()
+
+        aws_roles = {"default": {"arn:aws:iam::1:role/Role-One": MagicMock()}}
+        with patch('aws_okta_processor.core.fetcher.saml.get_aws_roles',
+                   return_value=aws_roles):
+            with self.assertRaises(SystemExit):
+                SAMLFetcher(Authenticate(self.OPTIONS), cache=cache).fetch_credentials()
+
+            mock_okta.assert_called_once()
+            mock_prompt_print_tty.assert_called_once_with(
+                "ERROR: AWS Role arn:aws:iam::1:role/Role-Missing not found!"
+            )
+
+            with self.assertRaises(SystemExit):
+                SAMLFetcher(Authenticate(self.OPTIONS), cache=cache).fetch_credentials()
+
+            # The second run fails without calling Okta
+            mock_okta.assert_called_once()
+            mock_print_tty.assert_any_call(
+                "ERROR: AWS Role arn:aws:iam::1:role/Role-Missing not found!"
+            )
+
+            # A configuration change invalidates the failure
+            self.OPTIONS["--role"] = "arn:aws:iam::1:role/Role-One"
+            SAMLFetcher(Authenticate(self.OPTIONS), cache=cache).fetch_credentials()
+            self.assertEqual(2, mock_okta.call_count)
+
+    @patch('aws_okta_processor.core.fetcher.print_tty')
+    @patch('aws_okta_processor.core.fetcher.Okta')
+    def test_fetcher_should_remember_rejected_credentials(
+            self,
+            mock_okta,
+            mock_print_tty
+    ):
+        self.OPTIONS["--pass"] = "wrong-pass"
+        cache = {}
+        mock_okta.side_effect = OktaError(
+            message="Error: Status Code: 401",
+            status_code=401,
+            error_code="E0000004"
+        )
+
+        with self.assertRaises(SystemExit):
+            SAMLFetcher(Authenticate(self.OPTIONS), cache=cache).fetch_credentials()
+
+        with self.assertRaises(SystemExit):
+            SAMLFetcher(Authenticate(self.OPTIONS), cache=cache).fetch_credentials()
+
+        mock_okta.assert_called_once()
+        mock_print_tty.assert_any_call("Error: Status Code: 401")
+
+        # An expired failure is ignored
+        failure_key = [key for key in cache if key.endswith("-failure")][0]
+        cache[failure_key]["Expiration"] = "2020-01-01T00:00:00+00:00"
+
+        with self.assertRaises(SystemExit):
+            SAMLFetcher(Authenticate(self.OPTIONS), cache=cache).fetch_credentials()
+
+        self.assertEqual(2, mock_okta.call_count)
+
+    @patch('aws_okta_processor.core.fetcher.print_tty')
+    @patch('aws_okta_processor.core.fetcher.Okta')
+    def test_fetcher_should_not_remember_connection_errors(
+            self,
+            mock_okta,
+            mock_print_tty
+    ):
+        self.OPTIONS["--pass"] = "pass"
+        cache = {}
+        mock_okta.side_effect = OktaError(
+            message="Error: Status Code: 500", status_code=500
+        )
+
+        with self.assertRaises(SystemExit):
+            SAMLFetcher(Authenticate(self.OPTIONS), cache=cache).fetch_credentials()
+
+        self.assertEqual({}, cache)
+
+    @patch("boto3.client")
+    @patch('aws_okta_processor.core.fetcher.print_tty')
+    @patch('aws_okta_processor.core.fetcher.prompt.print_tty')
+    @patch('aws_okta_processor.core.fetcher.Okta')
+    def test_fetcher_should_report_timing(
+            self,
+            mock_okta,
+            mock_prompt_print_tty,
+            mock_print_tty,
+            mock_client
+    ):
+        self.OPTIONS["--role"] = "arn:aws:iam::1:role/Role-One"
+        self.OPTIONS["--timing"] = True
+        mock_okta().get_saml_response.return_value = SAML_RESPONSE
+        mock_okta().factor_metrics = {
+            "factor": "push", "result": "SUCCESS", "polls": 3, "latency": 2.5
+        }
+        mock_client().assume_role_with_saml.return_value = {
+            "Credentials": {
+                "AccessKeyId": "test-key",
+                "SecretAccessKey": "test-secret",
+                "SessionToken": "test-token",
+                "Expiration": datetime(2020, 4, 17, 12, 0, 0, 0)
+            }
+        }
+
+        aws_roles = {"default": {"arn:aws:iam::1:role/Role-One": MagicMock()}}
+        with patch('aws_okta_processor.core.fetcher.saml.get_aws_roles',
+                   return_value=aws_roles):
+            fetcher = SAMLFetcher(Authenticate(self.OPTIONS), cache={})
+            fetcher.fetch_credentials()
+
+        mock_okta().refresh_deferred_okta_session.assert_called_once()
+        mock_okta().get_applications.assert_called_once()
+        lines = [args[0] for args, _ in mock_print_tty.call_args_list]
+        self.assertEqual(2, len([
+            line for line in lines if line.startswith("Timing: critical path ")
+        ]))
+        self.assertTrue(any(line.startswith("Timing: sts_client: ") for line in lines))
+        self.assertIn("Timing: MFA push SUCCESS: 2.500s, 3 requests", lines)
+
+    @patch('aws_okta_processor.core.fetcher.print_tty')
+    @patch('aws_okta_processor.core.fetcher.Okta')
+    def test_fetcher_should_get_all_app_roles(self, mock_okta, mock_print_tty):
+        okta = mock_okta.return_value
+        okta.user_name = "jdoe"
+        okta.organization = "test-org"
+        okta.get_applications.return_value = OrderedDict(
+            [("AWS", "https://app/1"), ("AWS GOV", "https://app/2")]
+        )
+        okta.get_saml_response.return_value = SAML_RESPONSE
+
+        with patch('aws_okta_processor.core.fetcher.saml.get_aws_roles',
+                   return_value={"Account: test-account (1234)": ["role"]}) \
+                as mock_get_aws_roles:
+            fetcher = SAMLFetcher(Authenticate(self.OPTIONS), cache={})
+            actual = fetcher.get_all_app_roles()
+
+        mock_okta.assert_called_once()
+        okta.refresh_deferred_okta_session.assert_called_once()
+        self.assertEqual(
+            [call(application_url="https://app/1"), call(application_url="https://app/2")],
+            sorted(okta.get_saml_response.call_args_list, key=str)
+        )
+        self.assertEqual(2, mock_get_aws_roles.call_count)
+        self.assertEqual(
+            ["https://app/1", "https://app/2"],
+            [app_roles["Application"] for app_roles in actual]
+        )
+        self.assertEqual({"jdoe"}, {app_roles["User"] for app_roles in actual})
+        self.assertEqual({"test-org"}, {app_roles["Organization"] for app_roles in actual})
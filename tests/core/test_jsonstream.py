@@ -0,0 +1,91 @@
+import copy
+import json
+import time
+import tracemalloc
+
+from unittest import TestCase
+
+from aws_okta_processor.core.jsonstream import iter_json_array
+
+from tests.test_base import APPLICATIONS_RESPONSE
+
+
+def get_chunks(data=None, size=None):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def get_applications_response(entries=None):
+    """Returns an appLinks response with one AWS application in 50 entries."""
+    aws_application, _, other_application = json.loads(APPLICATIONS_RESPONSE)
+    applications = []
+
+    for index in range(entries):
+        if index % 50:
+            application = copy.deepcopy(other_application)
+        else:
+            application = copy.deepcopy(aws_application)
+        application["label"] = f"{application['label']} {index}"
+        application["linkUrl"] = f"{application['linkUrl']}/{index}"
+        applications.append(application)
+
+    return json.dumps(applications, indent=2).encode()
+
+
+class TestJSONStream(TestCase):
+    def test_iter_json_array(self):
+        data = APPLICATIONS_RESPONSE.encode()
+
+        for size in (1, 7, len(data)):
+            self.assertEqual(
+                list(iter_json_array(chunks=get_chunks(data=data, size=size))),
+                json.loads(APPLICATIONS_RESPONSE),
+            )
+
+    def test_iter_json_array_values(self):
+        data = ' [1, 23.5 ,"a]", [2, {"b": null}], true, "é"] '.encode()
+
+        self.assertEqual(
+            list(iter_json_array(chunks=get_chunks(data=data, size=1))),
+            [1, 23.5, "a]", [2, {"b": None}], True, "é"],
+        )
+        self.assertEqual(list(iter_json_array(chunks=[b"[", b"]"])), [])
+
+    def test_iter_json_array_invalid(self):
+        for chunks in ([b'{"errorCode": "E0000011"}'], [b'[{"a": 1}'], [b"[x]"], []):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(chunks=chunks))
+
+    def test_iter_json_array_benchmark(self):
+        data = get_applications_response(entries=5000)
+
+        def parse_all():
+            return [
+                application["linkUrl"]
+                for application in json.loads(data)
+                if application["appName"] == "amazon_aws"
+            ]
+
+        def parse_stream():
+            return [
+                application["linkUrl"]
+                for application in iter_json_array(
+                    chunks=get_chunks(data=data, size=16384)
+                )
+                if application["appName"] == "amazon_aws"
+            ]
+
+        peaks = {}
+        for parse in (parse_all, parse_stream):
+            tracemalloc.start()
+            started = time.perf_counter()
+            links = parse()
+            elapsed = time.perf_counter() - started
+            peaks[parse.__name__] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            self.assertEqual(len(links), 100)
+            self.assertLess(elapsed, 10)
+
+        # The peak is one chunk and one entry, instead of every entry
+        self.assertLess(peaks["parse_stream"] * 10, peaks["parse_all"])
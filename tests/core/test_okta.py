@@ -17,11 +17,26 @@ from datetime import datetime
 from collections import OrderedDict
 from requests import ConnectionError
 from requests import ConnectTimeout
+from requests import ReadTimeout
 
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.deadline import Deadline, DeadlineError
+from aws_okta_processor.core.deadline import phase as deadline_phase
 from aws_okta_processor.core.okta import Okta
+from aws_okta_processor.core.okta import OktaError
+from aws_okta_processor.core.okta import OKTA_AUTHENTICATION_FAILED
+from aws_okta_processor.core.okta import get_cached_sessions
+from aws_okta_processor.core.okta import get_remember_device_link
+from aws_okta_processor.core.okta import get_retry_delay
 
 import responses
 import json
+import os
+import shutil
+import tempfile
+import threading
+import email.utils
+import time
 
 
 class StubDate(datetime):
@@ -65,6 +80,82 @@ class TestOkta(TestBase):
         self.assertEqual(okta.organization, "organization.okta.com")
         self.assertEqual(okta.okta_session_id, "session_token")
 
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_not_persist(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod
+    ):
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_TOKEN_RESPONSE)
+        )
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            persist=False
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertIsNone(okta.cache_file_path)
+        mock_makedirs.assert_not_called()
+        mock_open.assert_not_called()
+        mock_chmod.assert_not_called()
+
+    @patch('aws_okta_processor.core.okta.ConnectionWarmer')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_warm_connections(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_warmer
+    ):
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_TOKEN_RESPONSE)
+        )
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            warm_urls=["https://signin.aws.amazon.com/saml"]
+        )
+
+        self.assertEqual(mock_warmer(), okta.warmer)
+        mock_warmer().warm.assert_called_once_with(urls=[
+            'https://organization.okta.com/api/v1/authn',
+            'https://signin.aws.amazon.com/saml'
+        ])
+
     @patch('aws_okta_processor.core.okta.os.chmod')
     @patch('aws_okta_processor.core.okta.open')
     @patch('aws_okta_processor.core.okta.getpass')
@@ -103,6 +194,96 @@ class TestOkta(TestBase):
         self.assertEqual(okta.organization, "organization.okta.com")
         self.assertEqual(okta.okta_session_id, "session_token")
 
+    def write_cached_session(
+            self, cache_directory, user_name, organization, expires_at, used
+    ):
+        path = os.path.join(
+            cache_directory, f"{user_name}-{organization}-session.json"
+        )
+        session = dict(
+            json.loads(SESSION_RESPONSE),
+            expiresAt=expires_at,
+            **{
+                "aws-okta-processor": {
+                    "user_name": user_name,
+                    "organization": organization,
+                }
+            }
+        )
+        with open(path, "w") as file:
+            json.dump(session, file)
+        os.utime(path, (used, used))
+
+        return path
+
+    def test_get_cached_sessions(self):
+        cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_directory)
+        now = time.time()
+
+        one = self.write_cached_session(
+            cache_directory, "jdoe", "one.okta.com", "2999-01-01T00:00:00.000Z", now - 60
+        )
+        two = self.write_cached_session(
+            cache_directory, "jdoe", "two.okta.com", "2999-01-01T00:00:00.000Z", now
+        )
+        self.write_cached_session(
+            cache_directory, "ssmith", "one.okta.com", "2019-04-09T06:37:43.000Z", now
+        )
+        with open(os.path.join(cache_directory, "x-y-session.json"), "w") as file:
+            file.write("{")
+
+        self.assertEqual(
+            list(get_cached_sessions(cache_directory=cache_directory).items()),
+            [(("jdoe", "two.okta.com"), two), (("jdoe", "one.okta.com"), one)]
+        )
+        self.assertEqual(
+            list(get_cached_sessions(
+                cache_directory=cache_directory, organization="one.okta.com"
+            )),
+            [("jdoe", "one.okta.com")]
+        )
+
+    @patch('aws_okta_processor.core.okta.os.path.expanduser')
+    @patch('aws_okta_processor.core.okta.prompt.get_item')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_find_cached_session(
+            self, mock_print_tty, mock_get_item, mock_expanduser
+    ):
+        home_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home_directory)
+        mock_expanduser.return_value = home_directory
+        cache_directory = os.path.join(home_directory, ".aws-okta-processor", "cache")
+        os.makedirs(cache_directory)
+        now = time.time()
+
+        for organization, used in (("one.okta.com", now - 60), ("two.okta.com", now)):
+            self.write_cached_session(
+                cache_directory, "jdoe", organization, "2999-01-01T00:00:00.000Z", used
+            )
+        mock_get_item.return_value = ("jdoe", "one.okta.com")
+
+        responses.add(
+            responses.POST,
+            'https://one.okta.com/api/v1/sessions/me/lifecycle/refresh',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        okta = Okta()
+
+        self.assertEqual(okta.user_name, "jdoe")
+        self.assertEqual(okta.organization, "one.okta.com")
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual(len(responses.calls), 1)
+        mock_get_item.assert_called_once_with(
+            items=OrderedDict([
+                ("jdoe@two.okta.com", ("jdoe", "two.okta.com")),
+                ("jdoe@one.okta.com", ("jdoe", "one.okta.com")),
+            ]),
+            label="Okta session"
+        )
+
     @patch('aws_okta_processor.core.okta.Okta.read_aop_from_okta_session')
     @patch('aws_okta_processor.core.okta.os.chmod')
     @patch('aws_okta_processor.core.okta.open')
@@ -144,6 +325,47 @@ class TestOkta(TestBase):
 
         mock_read_aop_session.assert_called_once_with(session_refresh)
 
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.datetime.datetime', StubDate)
+    @patch('aws_okta_processor.core.okta.os.path.isfile')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_defer_refresh(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_isfile,
+            mock_open,
+            mock_chmod
+    ):
+        mock_isfile.return_value = True
+        mock_enter = MagicMock()
+        mock_enter.read.return_value = SESSION_RESPONSE
+        mock_open().__enter__.return_value = mock_enter
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            defer_refresh=True
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual(0, len(responses.calls))
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions/me/lifecycle/refresh',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        okta.refresh_deferred_okta_session()
+        okta.refresh_deferred_okta_session()
+        self.assertEqual(1, len(responses.calls))
+        self.assertEqual(okta.okta_session_id, "session_token")
+
     @patch('aws_okta_processor.core.okta.os.makedirs')
     @patch('aws_okta_processor.core.okta.print_tty')
     @responses.activate
@@ -204,38 +426,523 @@ class TestOkta(TestBase):
             call("Error: Summary: bar")
         ]
 
-        mock_print_tty.assert_has_calls(print_tty_calls)
+        mock_print_tty.assert_has_calls(print_tty_calls)
+
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_auth_rejected_error(
+            self,
+            mock_print_tty,
+            mock_makedirs
+    ):
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json={
+                "errorCode": "E0000004",
+                "errorSummary": "Authentication failed"
+            },
+            status=401
+        )
+
+        with self.assertRaises(OktaError) as context:
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com"
+            )
+
+        self.assertEqual(1, context.exception.code)
+        self.assertEqual(401, context.exception.status_code)
+        self.assertEqual(OKTA_AUTHENTICATION_FAILED, context.exception.error_code)
+        self.assertEqual(
+            "Error: Status Code: 401\nError: Summary: Authentication failed",
+            context.exception.message
+        )
+
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_push_challenge(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod
+    ):
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_MFA_PUSH_RESPONSE)
+        )
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify',
+            json=json.loads(MFA_WAITING_RESPONSE)
+        )
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/lifecycle/activate/poll',
+            json=json.loads(AUTH_TOKEN_RESPONSE)
+        )
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com"
+        )
+
+        self.assertEqual(okta.okta_single_use_token, "single_use_token")
+        self.assertEqual(okta.organization, "organization.okta.com")
+        self.assertEqual(okta.okta_session_id, "session_token")
+
+    @patch('aws_okta_processor.core.okta.os.path.expanduser')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_remember_device(self, mock_print_tty, mock_expanduser):
+        home_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home_directory)
+        mock_expanduser.return_value = home_directory
+
+        self.add_push_responses({
+            "json": json.loads(AUTH_TOKEN_RESPONSE),
+            "headers": {
+                "Set-Cookie": "DT=device_token; Expires=Fri, 01 Jan 2100 00:00:00 GMT; Path=/"
+            }
+        })
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            remember_device=True
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual(
+            responses.calls[1].request.url,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify?rememberDevice=true'
+        )
+
+        cookie_file_path = os.path.join(
+            home_directory,
+            ".aws-okta-processor",
+            "cache",
+            "user_name-organization.okta.com-cookies.json"
+        )
+        self.assertEqual(os.stat(cookie_file_path).st_mode & 0o777, 0o600)
+        with open(cookie_file_path) as file:
+            cookies = json.load(file)
+        self.assertEqual([cookie["name"] for cookie in cookies], ["DT"])
+
+        responses.reset()
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_TOKEN_RESPONSE)
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            no_okta_cache=True
+        )
+
+        self.assertEqual(
+            responses.calls[0].request.headers["Cookie"], "DT=device_token"
+        )
+
+    def test_get_remember_device_link(self):
+        self.assertEqual(
+            get_remember_device_link(link="https://organization.okta.com/verify"),
+            "https://organization.okta.com/verify?rememberDevice=true"
+        )
+        self.assertEqual(
+            get_remember_device_link(link="https://organization.okta.com/verify?a=b"),
+            "https://organization.okta.com/verify?a=b&rememberDevice=true"
+        )
+
+    def add_push_responses(self, *poll_responses):
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_MFA_PUSH_RESPONSE)
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify',
+            json=json.loads(MFA_WAITING_RESPONSE)
+        )
+        for poll_response in poll_responses:
+            responses.add(
+                responses.POST,
+                'https://organization.okta.com/api/v1/authn/factors/id/lifecycle/activate/poll',
+                **poll_response
+            )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+    @patch('aws_okta_processor.core.okta.time.sleep')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_push_should_back_off(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_sleep
+    ):
+        waiting = {"json": json.loads(MFA_WAITING_RESPONSE)}
+        self.add_push_responses(
+            waiting, waiting, waiting, waiting,
+            {"json": json.loads(AUTH_TOKEN_RESPONSE)}
+        )
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            factor_poll_max=1.5
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual(
+            [call(0.5), call(0.75), call(1.125), call(1.5), call(1.5)],
+            mock_sleep.call_args_list
+        )
+        self.assertEqual("push", okta.factor_metrics["factor"])
+        self.assertEqual("SUCCESS", okta.factor_metrics["result"])
+        self.assertEqual(6, okta.factor_metrics["polls"])
+
+    @patch('aws_okta_processor.core.okta.time.sleep')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_push_should_honour_retry_after(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_sleep
+    ):
+        self.add_push_responses(
+            {
+                "json": {"errorCode": "E0000047"},
+                "status": 429,
+                "headers": {"Retry-After": "7"}
+            },
+            {"json": json.loads(AUTH_TOKEN_RESPONSE)}
+        )
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com"
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual([call(0.5), call(7.0)], mock_sleep.call_args_list)
+
+    @patch('aws_okta_processor.core.okta.time.sleep')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_push_should_give_up_after_timeout(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_sleep
+    ):
+        self.add_push_responses({"json": json.loads(MFA_WAITING_RESPONSE)})
+
+        with self.assertRaises(OktaError) as context:
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com",
+                factor_timeout=1
+            )
+
+        self.assertEqual(
+            "Error: MFA was not verified within 1 seconds",
+            context.exception.message
+        )
+        self.assertEqual(2, mock_sleep.call_count)
+
+    @patch('aws_okta_processor.core.ratelimit.time.time')
+    @patch('aws_okta_processor.core.okta.time.sleep')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_retry_rate_limited_call(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_sleep,
+            mock_time
+    ):
+        clock = [1000.0]
+        mock_time.side_effect = lambda: clock[0]
+        mock_sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+
+        rate_limit_headers = {
+            "X-Rate-Limit-Limit": "10",
+            "X-Rate-Limit-Remaining": "0",
+            "X-Rate-Limit-Reset": "1020"
+        }
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json={"errorCode": "E0000047"},
+            status=429,
+            headers=rate_limit_headers
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_TOKEN_RESPONSE)
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com"
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual(len(responses.calls), 3)
+        mock_sleep.assert_called_once_with(20.0)
+
+    @patch('aws_okta_processor.core.okta.time.sleep')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_not_wait_for_distant_rate_limit_reset(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_sleep
+    ):
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json={"errorCode": "E0000047", "errorSummary": "API call exceeded rate limit"},
+            status=429,
+            headers={"Retry-After": "600"}
+        )
+
+        with self.assertRaises(OktaError) as context:
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com"
+            )
+
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(len(responses.calls), 1)
+        mock_sleep.assert_not_called()
+        mock_print_tty.assert_any_call(
+            "Error: Okta rate limit exceeded, retry in 600s"
+        )
+
+    def test_get_retry_delay(self):
+        response = MagicMock(status_code=200, headers={})
+        self.assertEqual(0.5, get_retry_delay(response=response, delay=0.5))
+
+        response.headers = {"Retry-After": "3"}
+        self.assertEqual(3, get_retry_delay(response=response, delay=0.5))
+
+        response.headers = {
+            "X-Rate-Limit-Remaining": "0",
+            "X-Rate-Limit-Reset": str(time.time() + 10)
+        }
+        self.assertAlmostEqual(
+            10, get_retry_delay(response=response, delay=0.5), delta=1
+        )
+
+        response.headers = {
+            "X-Rate-Limit-Remaining": "5",
+            "X-Rate-Limit-Reset": str(time.time() + 10)
+        }
+        self.assertEqual(0.5, get_retry_delay(response=response, delay=0.5))
+
+    def test_get_retry_delay_should_parse_dates(self):
+        retry_at = time.time() + 10
+        response = MagicMock(status_code=429, headers={
+            "Retry-After": email.utils.formatdate(retry_at, usegmt=True)
+        })
+        self.assertAlmostEqual(
+            10, get_retry_delay(response=response, delay=0.5), delta=2
+        )
+
+        # A '-0000' zone parses to a naive date
+        response.headers = {"Retry-After": email.utils.formatdate(retry_at)}
+        self.assertAlmostEqual(
+            10, get_retry_delay(response=response, delay=0.5), delta=2
+        )
+
+    def test_get_retry_delay_should_ignore_malformed_headers(self):
+        response = MagicMock(status_code=429, headers={"Retry-After": "soon"})
+        self.assertEqual(0.5, get_retry_delay(response=response, delay=0.5))
+
+        response.headers = {"X-Rate-Limit-Reset": "later"}
+        self.assertEqual(0.5, get_retry_delay(response=response, delay=0.5))
+
+    @patch('aws_okta_processor.core.okta.getpass.getpass')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_totp_challenge(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_get_pass
+    ):
+        mock_get_pass.return_value = "123456"
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_MFA_TOTP_RESPONSE)
+        )
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify',
+            json=json.loads(AUTH_TOKEN_RESPONSE)
+        )
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com"
+        )
+
+        self.assertEqual(okta.okta_single_use_token, "single_use_token")
+        self.assertEqual(okta.organization, "organization.okta.com")
+        self.assertEqual(okta.okta_session_id, "session_token")
+
+    @patch('aws_okta_processor.core.okta.getpass.getpass')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_totp_challenge_should_report_rejected_passcode(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_get_pass
+    ):
+        mock_get_pass.return_value = "000000"
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_MFA_TOTP_RESPONSE)
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify',
+            json={"errorCode": "E0000068", "errorSummary": "Invalid Passcode/Answer"},
+            status=403
+        )
+
+        with self.assertRaises(SystemExit):
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com"
+            )
+
+        messages = [args[0] for args, _ in mock_print_tty.call_args_list]
+        self.assertIn("Info: MFA E0000068", [
+            message.split(" after ")[0] for message in messages
+        ])
 
+    @patch('aws_okta_processor.core.okta.get_passcode')
     @patch('aws_okta_processor.core.okta.os.chmod')
     @patch('aws_okta_processor.core.okta.open')
     @patch('aws_okta_processor.core.okta.os.makedirs')
     @patch('aws_okta_processor.core.okta.print_tty')
     @responses.activate
-    def test_okta_mfa_push_challenge(
+    def test_okta_mfa_totp_seed(
             self,
             mock_print_tty,
             mock_makedirs,
             mock_open,
-            mock_chmod
+            mock_chmod,
+            mock_get_passcode
     ):
+        totp_provider = MagicMock()
+        totp_provider.get_passcode.return_value = "123456"
+
         responses.add(
             responses.POST,
             'https://organization.okta.com/api/v1/authn',
-            json=json.loads(AUTH_MFA_PUSH_RESPONSE)
+            json=json.loads(AUTH_MFA_MULTIPLE_RESPONSE)
         )
-
         responses.add(
             responses.POST,
             'https://organization.okta.com/api/v1/authn/factors/id/verify',
-            json=json.loads(MFA_WAITING_RESPONSE)
-        )
-
-        responses.add(
-            responses.POST,
-            'https://organization.okta.com/api/v1/authn/factors/id/lifecycle/activate/poll',
             json=json.loads(AUTH_TOKEN_RESPONSE)
         )
-
         responses.add(
             responses.POST,
             'https://organization.okta.com/api/v1/sessions',
@@ -245,41 +952,52 @@ class TestOkta(TestBase):
         okta = Okta(
             user_name="user_name",
             user_pass="user_pass",
-            organization="organization.okta.com"
+            organization="organization.okta.com",
+            totp_provider=totp_provider
         )
 
-        self.assertEqual(okta.okta_single_use_token, "single_use_token")
-        self.assertEqual(okta.organization, "organization.okta.com")
         self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual(
+            json.loads(responses.calls[1].request.body)["passCode"], "123456"
+        )
+        self.assertEqual(okta.factor_metrics["polls"], 1)
+        mock_get_passcode.assert_not_called()
 
-    @patch('aws_okta_processor.core.okta.getpass.getpass')
+    @patch('aws_okta_processor.core.okta.time')
     @patch('aws_okta_processor.core.okta.os.chmod')
     @patch('aws_okta_processor.core.okta.open')
     @patch('aws_okta_processor.core.okta.os.makedirs')
     @patch('aws_okta_processor.core.okta.print_tty')
     @responses.activate
-    def test_okta_mfa_totp_challenge(
+    def test_okta_mfa_totp_seed_should_retry_next_window(
             self,
             mock_print_tty,
             mock_makedirs,
             mock_open,
             mock_chmod,
-            mock_get_pass
+            mock_time
     ):
-        mock_get_pass.return_value = "123456"
+        mock_time.time.return_value = 59.5
+        mock_time.monotonic.return_value = 0
+        totp_provider = MagicMock()
+        totp_provider.get_passcode.side_effect = ["111111", "222222"]
 
         responses.add(
             responses.POST,
             'https://organization.okta.com/api/v1/authn',
             json=json.loads(AUTH_MFA_TOTP_RESPONSE)
         )
-
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify',
+            json={"errorCode": "E0000068", "errorSummary": "Invalid Passcode/Answer"},
+            status=403
+        )
         responses.add(
             responses.POST,
             'https://organization.okta.com/api/v1/authn/factors/id/verify',
             json=json.loads(AUTH_TOKEN_RESPONSE)
         )
-
         responses.add(
             responses.POST,
             'https://organization.okta.com/api/v1/sessions',
@@ -289,12 +1007,57 @@ class TestOkta(TestBase):
         okta = Okta(
             user_name="user_name",
             user_pass="user_pass",
-            organization="organization.okta.com"
+            organization="organization.okta.com",
+            totp_provider=totp_provider
         )
 
-        self.assertEqual(okta.okta_single_use_token, "single_use_token")
-        self.assertEqual(okta.organization, "organization.okta.com")
         self.assertEqual(okta.okta_session_id, "session_token")
+        totp_provider.get_passcode.assert_has_calls(
+            [call(timestamp=59.5), call(timestamp=60)]
+        )
+        mock_time.sleep.assert_called_once_with(0.5)
+        self.assertEqual(okta.factor_metrics["polls"], 2)
+
+    @patch('aws_okta_processor.core.okta.time')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_totp_seed_should_give_up_after_next_window(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_time
+    ):
+        mock_time.time.return_value = 10
+        totp_provider = MagicMock()
+        totp_provider.get_passcode.return_value = "111111"
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_MFA_TOTP_RESPONSE)
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify',
+            json={"errorCode": "E0000068", "errorSummary": "Invalid Passcode/Answer"},
+            status=403
+        )
+
+        with self.assertRaises(SystemExit):
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com",
+                totp_provider=totp_provider
+            )
+
+        self.assertEqual(len(responses.calls), 3)
+        mock_time.sleep.assert_called_once_with(20)
 
     @patch('aws_okta_processor.core.okta.Okta.get_okta_single_use_token')
     @patch('aws_okta_processor.core.okta.Okta.create_and_store_okta_session')
@@ -462,6 +1225,244 @@ class TestOkta(TestBase):
         self.assertEqual(okta.organization, "organization.okta.com")
         self.assertEqual(okta.okta_session_id, "session_token")
 
+    def add_race_responses(self, totp_response, poll_response, totp_status=200):
+        verify_bodies = []
+
+        def verify(request):
+            body = json.loads(request.body)
+            verify_bodies.append(body)
+            if "passCode" in body:
+                return totp_status, {}, totp_response
+            return 200, {}, MFA_WAITING_RESPONSE
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_MFA_MULTIPLE_RESPONSE)
+        )
+        responses.add_callback(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/verify',
+            callback=verify
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn/factors/id/lifecycle/activate/poll',
+            body=poll_response
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+
+        return verify_bodies
+
+    @patch('aws_okta_processor.core.okta.FACTOR_POLL_INTERVAL', 0)
+    @patch('aws_okta_processor.core.okta.input_tty')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_race_push_wins(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_input
+    ):
+        verify_bodies = self.add_race_responses(
+            totp_response=AUTH_TOKEN_RESPONSE, poll_response=AUTH_TOKEN_RESPONSE
+        )
+        # Waits for the push like a user who doesn't type
+        mock_input.side_effect = lambda cancel: None if cancel.wait(5) else "123456"
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            factor="push+totp"
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertEqual([{"stateToken": "state_token"}], verify_bodies)
+        mock_input.assert_called_once()
+
+    @patch('aws_okta_processor.core.okta.FACTOR_POLL_INTERVAL', 0.01)
+    @patch('aws_okta_processor.core.okta.input_tty')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_race_totp_wins(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_input
+    ):
+        verify_bodies = self.add_race_responses(
+            totp_response=AUTH_TOKEN_RESPONSE, poll_response=MFA_WAITING_RESPONSE
+        )
+        mock_input.return_value = "123456"
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com",
+            factor="push+token:software:totp:okta"
+        )
+
+        self.assertEqual(okta.okta_session_id, "session_token")
+        self.assertIn(
+            {"stateToken": "state_token", "passCode": "123456"}, verify_bodies
+        )
+
+        # Polling stops once the passcode is accepted
+        time.sleep(0.1)
+        calls = len(responses.calls)
+        time.sleep(0.1)
+        self.assertEqual(calls, len(responses.calls))
+
+    @patch('aws_okta_processor.core.okta.FACTOR_POLL_INTERVAL', 0)
+    @patch('aws_okta_processor.core.okta.input_tty')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_race_should_retry_rejected_passcode(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_input
+    ):
+        self.add_race_responses(
+            totp_response=json.dumps(
+                {"errorCode": "E0000068", "errorSummary": "Invalid Passcode"}
+            ),
+            poll_response=json.dumps({"factorResult": "REJECTED"}),
+            totp_status=403
+        )
+        rejected = threading.Event()
+        mock_print_tty.side_effect = lambda *args, **kwargs: (
+            args and args[0].startswith("Push was not approved") and rejected.set()
+        )
+        passcodes = iter(["000000"])
+
+        def input_passcode(cancel):
+            # Types a passcode once the push is rejected, then gives up
+            rejected.wait(5)
+            for passcode in passcodes:
+                return passcode
+            raise KeyboardInterrupt
+
+        mock_input.side_effect = input_passcode
+
+        with self.assertRaises(KeyboardInterrupt):
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com",
+                factor="push+totp"
+            )
+
+        mock_print_tty.assert_any_call("Error: Summary: Invalid Passcode")
+        self.assertEqual(2, mock_input.call_count)
+
+    def input_after_rejected_push(self, mock_print_tty, passcode):
+        # Types the passcode once the push poller is done, so that it doesn't
+        # outlive the test
+        rejected = threading.Event()
+        mock_print_tty.side_effect = lambda *args, **kwargs: (
+            args and args[0].startswith("Push was not approved") and rejected.set()
+        )
+
+        def input_passcode(cancel):
+            rejected.wait(5)
+            return passcode
+
+        return input_passcode
+
+    @patch('aws_okta_processor.core.okta.FACTOR_POLL_INTERVAL', 0)
+    @patch('aws_okta_processor.core.okta.input_tty')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_race_should_give_up_after_rejected_passcodes(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_input
+    ):
+        self.add_race_responses(
+            totp_response=json.dumps(
+                {"errorCode": "E0000068", "errorSummary": "Invalid Passcode"}
+            ),
+            poll_response=json.dumps({"factorResult": "REJECTED"}),
+            totp_status=403
+        )
+        mock_input.side_effect = self.input_after_rejected_push(
+            mock_print_tty, "000000"
+        )
+
+        with self.assertRaises(SystemExit):
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com",
+                factor="push+totp"
+            )
+
+        self.assertEqual(3, mock_input.call_count)
+
+    @patch('aws_okta_processor.core.okta.FACTOR_POLL_INTERVAL', 0)
+    @patch('aws_okta_processor.core.okta.input_tty')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_mfa_race_should_stop_on_expired_state_token(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_input
+    ):
+        self.add_race_responses(
+            totp_response=json.dumps(
+                {"errorCode": "E0000011", "errorSummary": "Invalid token provided"}
+            ),
+            poll_response=json.dumps({"factorResult": "REJECTED"}),
+            totp_status=401
+        )
+        mock_input.side_effect = self.input_after_rejected_push(
+            mock_print_tty, "123456"
+        )
+
+        with self.assertRaises(SystemExit):
+            Okta(
+                user_name="user_name",
+                user_pass="user_pass",
+                organization="organization.okta.com",
+                factor="push+totp"
+            )
+
+        self.assertEqual(1, mock_input.call_count)
+        mock_print_tty.assert_any_call("Error: Summary: Invalid token provided")
+
     @patch('aws_okta_processor.core.okta.os.chmod')
     @patch('aws_okta_processor.core.okta.open')
     @patch('aws_okta_processor.core.okta.os.makedirs')
@@ -757,6 +1758,63 @@ class TestOkta(TestBase):
 
         self.assertEqual(applications, expected_applications)
 
+    @patch('aws_okta_processor.core.okta.os.path.expanduser')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_should_cache_applications(self, mock_print_tty, mock_expanduser):
+        home_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home_directory)
+        mock_expanduser.return_value = home_directory
+        applications_url = 'https://organization.okta.com/api/v1/users/me/appLinks'
+
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            json=json.loads(AUTH_TOKEN_RESPONSE)
+        )
+        responses.add(
+            responses.POST,
+            'https://organization.okta.com/api/v1/sessions',
+            json=json.loads(SESSION_RESPONSE)
+        )
+        responses.add(
+            responses.GET,
+            applications_url,
+            json=json.loads(APPLICATIONS_RESPONSE),
+            headers={"ETag": 'W/"applications"'}
+        )
+        responses.add(responses.GET, applications_url, status=304)
+
+        okta = Okta(
+            user_name="user_name",
+            user_pass="user_pass",
+            organization="organization.okta.com"
+        )
+
+        applications = okta.get_applications()
+        self.assertEqual(list(applications), ['AWS', 'AWS GOV'])
+
+        applications_file_path = os.path.join(
+            home_directory,
+            ".aws-okta-processor",
+            "cache",
+            "user_name-organization.okta.com-applications.json"
+        )
+        self.assertEqual(os.stat(applications_file_path).st_mode & 0o777, 0o600)
+
+        # Revalidated with the ETag
+        self.assertEqual(okta.get_applications(), applications)
+        self.assertEqual(
+            responses.calls[-1].request.headers["If-None-Match"], 'W/"applications"'
+        )
+
+        # Used as is for a while without an ETag
+        okta.store_applications(applications=applications)
+        calls = len(responses.calls)
+
+        self.assertEqual(okta.get_applications(), applications)
+        self.assertEqual(len(responses.calls), calls)
+
     @patch('aws_okta_processor.core.okta.os.chmod')
     @patch('aws_okta_processor.core.okta.open')
     @patch('aws_okta_processor.core.okta.os.makedirs')
@@ -830,6 +1888,44 @@ class TestOkta(TestBase):
 
         mock_print_tty.assert_has_calls(print_tty_calls)
 
+    @patch('aws_okta_processor.core.deadline.print_tty')
+    @patch('aws_okta_processor.core.okta.os.chmod')
+    @patch('aws_okta_processor.core.okta.open')
+    @patch('aws_okta_processor.core.okta.os.makedirs')
+    @patch('aws_okta_processor.core.okta.print_tty')
+    @responses.activate
+    def test_okta_timeout_should_report_deadline_phase(
+            self,
+            mock_print_tty,
+            mock_makedirs,
+            mock_open,
+            mock_chmod,
+            mock_deadline_print_tty
+    ):
+        def authn(request):
+            # Times out once the time left is used up; a POST to authn is not
+            # sent again after a read timeout
+            time.sleep(0.1)
+            raise ReadTimeout()
+
+        responses.add_callback(
+            responses.POST,
+            'https://organization.okta.com/api/v1/authn',
+            callback=authn
+        )
+
+        with hooks.use_deadline(Deadline(seconds=0.05)):
+            with deadline_phase(name="okta_login"):
+                with self.assertRaises(DeadlineError) as context:
+                    Okta(
+                        user_name="user_name",
+                        user_pass="user_pass",
+                        organization="organization.okta.com"
+                    )
+
+        self.assertEqual("okta_login", context.exception.phase)
+        self.assertNotIn(call("Error: Timed Out"), mock_print_tty.call_args_list)
+
     @patch('aws_okta_processor.core.okta.os.chmod')
     @patch('aws_okta_processor.core.okta.open')
     @patch('aws_okta_processor.core.okta.os.makedirs')
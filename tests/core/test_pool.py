@@ -0,0 +1,116 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from tests.test_base import TestBase
+
+from aws_okta_processor.commands.authenticate import Authenticate
+from aws_okta_processor.core.pool import CredentialPool, MemoryCache, UserPools
+
+
+class TestMemoryCache(TestCase):
+    def test_should_read_through_and_keep_entries(self):
+        backing = {"key": {"value": 1}}
+        cache = MemoryCache(cache=backing)
+
+        self.assertIn("key", cache)
+        self.assertEqual({"value": 1}, cache["key"])
+
+        del backing["key"]
+        self.assertEqual({"value": 1}, cache["key"])
+
+    def test_should_write_through(self):
+        backing = {}
+        cache = MemoryCache(cache=backing)
+        cache["key"] = {"value": 2}
+
+        self.assertEqual({"value": 2}, backing["key"])
+        self.assertEqual({"value": 2}, cache["key"])
+
+        del cache["key"]
+        self.assertNotIn("key", cache)
+        self.assertNotIn("key", backing)
+
+    def test_should_work_without_backing_cache(self):
+        cache = MemoryCache()
+
+        self.assertNotIn("key", cache)
+        with self.assertRaises(KeyError):
+            cache["key"]
+
+
+class TestCredentialPool(TestBase):
+    @patch("aws_okta_processor.core.pool.SAMLFetcher")
+    def test_fetch_credentials_should_reuse_okta_session(self, mock_saml_fetcher):
+        okta = MagicMock()
+        mock_saml_fetcher.return_value.okta = okta
+        mock_saml_fetcher.return_value.fetch_credentials.return_value = {
+            "AccessKeyId": "access_key_id"
+        }
+        session = MagicMock()
+        pool = CredentialPool(session=session)
+
+        credentials = pool.fetch_credentials(authenticate=Authenticate(self.OPTIONS))
+        pool.fetch_credentials(authenticate=Authenticate(self.OPTIONS))
+
+        self.assertEqual({"AccessKeyId": "access_key_id"}, credentials)
+        first, second = mock_saml_fetcher.call_args_list
+        self.assertIsNone(first.kwargs["okta"])
+        self.assertIs(okta, second.kwargs["okta"])
+        self.assertIs(session, second.kwargs["session"])
+        self.assertIs(pool.cache, second.kwargs["cache"])
+        self.assertIs(okta, pool.oktas[("org.okta.com", "user_name")])
+
+    def test_get_lock_should_return_same_lock_per_key(self):
+        pool = CredentialPool(session=MagicMock())
+
+        self.assertIs(pool.get_lock("one"), pool.get_lock("one"))
+        self.assertIsNot(pool.get_lock("one"), pool.get_lock("two"))
+
+
+class TestUserPools(TestCase):
+    def test_get_pool_should_isolate_users(self):
+        pools = UserPools()
+
+        first = pools.get_pool(uid=1000)
+        second = pools.get_pool(uid=1001)
+
+        self.assertIs(first, pools.get_pool(uid=1000))
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.cache, second.cache)
+        self.assertIsNot(first.session, second.session)
+        self.assertIs(
+            first.session.get_adapter("https://org.okta.com"),
+            second.session.get_adapter("https://org.okta.com"),
+        )
+        self.assertIs(first.account_role_cache, second.account_role_cache)
+        self.assertFalse(first.persist)
+        self.assertIsNone(first.cache._cache)
+
+    def test_get_pool_should_evict_least_recently_used(self):
+        pools = UserPools(max_users=2)
+
+        first = pools.get_pool(uid=1)
+        pools.get_pool(uid=2)
+        pools.get_pool(uid=1)
+        pools.get_pool(uid=3)
+
+        self.assertEqual(2, len(pools))
+        self.assertIs(first, pools.get_pool(uid=1))
+        self.assertEqual(2, len(pools))
+
+    @patch("aws_okta_processor.core.pool.time.monotonic")
+    def test_evict_should_drop_idle_users(self, mock_monotonic):
+        pools = UserPools(idle_timeout=60)
+
+        mock_monotonic.return_value = 0
+        pools.get_pool(uid=1)
+        mock_monotonic.return_value = 30
+        pools.get_pool(uid=2)
+
+        mock_monotonic.return_value = 70
+        pools.evict()
+        self.assertEqual(1, len(pools))
+
+        mock_monotonic.return_value = 100
+        pools.evict()
+        self.assertEqual(0, len(pools))
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import time
+
+from unittest import TestCase
+
+from mock import MagicMock
+
+from aws_okta_processor.core.ratelimit import (
+    RateLimiter,
+    get_rate_limit,
+    get_rate_limit_key,
+)
+
+AUTHN_URL = "https://organization.okta.com/api/v1/authn"
+
+
+def rate_limited_response(remaining=None, reset=None, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {
+        "X-Rate-Limit-Limit": "10",
+        "X-Rate-Limit-Remaining": str(remaining),
+        "X-Rate-Limit-Reset": str(reset),
+    }
+    return response
+
+
+class TestRateLimiter(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "cache", "rate-limits.json")
+
+    def test_get_rate_limit_key(self):
+        self.assertEqual(
+            get_rate_limit_key(url=AUTHN_URL), "organization.okta.com/api/v1/authn"
+        )
+        self.assertEqual(
+            get_rate_limit_key(
+                url="https://organization.okta.com/api/v1/authn/factors/id/verify"
+            ),
+            "organization.okta.com/api/v1/authn/factors"
+        )
+        self.assertEqual(
+            get_rate_limit_key(
+                url="https://organization.okta.com/api/v1/sessions/me/lifecycle/refresh"
+            ),
+            "organization.okta.com/api/v1/sessions"
+        )
+
+    def test_get_rate_limit(self):
+        response = rate_limited_response(remaining=3, reset=100)
+
+        self.assertEqual(
+            get_rate_limit(response=response),
+            {"limit": 10, "remaining": 3, "reset": 100.0}
+        )
+
+        response.headers = {}
+        self.assertIsNone(get_rate_limit(response=response))
+
+    def test_acquire_should_take_tokens_until_reset(self):
+        limiter = RateLimiter()
+        reset = time.time() + 30
+
+        self.assertEqual(limiter.acquire(url=AUTHN_URL), 0)
+
+        limiter.update(
+            url=AUTHN_URL, response=rate_limited_response(remaining=2, reset=reset)
+        )
+
+        self.assertEqual(limiter.acquire(url=AUTHN_URL), 0)
+        self.assertEqual(limiter.acquire(url=AUTHN_URL), 0)
+        self.assertAlmostEqual(limiter.acquire(url=AUTHN_URL), 30, delta=1)
+        # Other endpoints have their own quota
+        self.assertEqual(
+            limiter.acquire(url="https://organization.okta.com/api/v1/sessions"), 0
+        )
+
+    def test_acquire_should_ignore_reset_limits(self):
+        limiter = RateLimiter()
+        limiter.update(
+            url=AUTHN_URL,
+            response=rate_limited_response(remaining=0, reset=time.time() - 1)
+        )
+
+        self.assertEqual(limiter.acquire(url=AUTHN_URL), 0)
+
+    def test_update_should_empty_bucket_on_429(self):
+        limiter = RateLimiter()
+        limiter.update(
+            url=AUTHN_URL,
+            response=rate_limited_response(
+                remaining=5, reset=time.time() + 10, status_code=429
+            )
+        )
+
+        self.assertGreater(limiter.acquire(url=AUTHN_URL), 0)
+
+    def test_file_should_be_shared(self):
+        first = RateLimiter(path=self.path)
+        second = RateLimiter(path=self.path)
+
+        self.assertEqual(first.acquire(url=AUTHN_URL), 0)
+        self.assertFalse(os.path.exists(self.path))
+
+        first.update(
+            url=AUTHN_URL,
+            response=rate_limited_response(remaining=1, reset=time.time() + 30)
+        )
+
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        self.assertEqual(second.acquire(url=AUTHN_URL), 0)
+        self.assertGreater(first.acquire(url=AUTHN_URL), 0)
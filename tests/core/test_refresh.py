@@ -0,0 +1,111 @@
+from unittest import TestCase
+
+from aws_okta_processor.core import refresh
+from aws_okta_processor.core.refresh import FixedRefreshPolicy, RefreshPolicy
+
+DAY = 24 * 60 * 60
+
+
+def count_refreshes(policy, duration, key="key", interval=30):
+    """Simulates a day of invocations every interval seconds and counts refreshes."""
+    window = policy.get_window(duration=duration, key=key)
+    refreshes = 0
+    expiration = None
+
+    for now in range(0, DAY, interval):
+        if expiration is None or expiration - now < window:
+            expiration = now + duration
+            refreshes += 1
+
+    return refreshes
+
+
+def get_refresh_times(policy, duration, hosts=100):
+    """Returns the offset from expiry at which each host refreshes."""
+    return sorted(
+        policy.get_window(duration=duration, key="key")
+        for policy in [
+            RefreshPolicy(
+                fraction=policy.fraction,
+                jitter=policy.jitter,
+                seed=f"host-{host}"
+            )
+            for host in range(hosts)
+        ]
+    )
+
+
+class TestRefreshPolicy(TestCase):
+    def test_fixed_policy_should_return_window(self):
+        policy = FixedRefreshPolicy(window=600)
+
+        self.assertEqual(600, policy.get_window(duration=900, key="key"))
+        self.assertEqual(600, policy.get_window(duration=43200, key="key"))
+
+    def test_adaptive_policy_should_scale_with_duration(self):
+        policy = RefreshPolicy(jitter=0)
+
+        self.assertEqual(90, policy.get_window(duration=900, key="key"))
+        self.assertEqual(360, policy.get_window(duration=3600, key="key"))
+        self.assertEqual(900, policy.get_window(duration=43200, key="key"))
+        self.assertEqual(60, policy.get_window(duration=300, key="key"))
+        self.assertEqual(50, policy.get_window(duration=100, key="key"))
+
+    def test_adaptive_policy_should_be_stable_per_host(self):
+        policy = RefreshPolicy(seed="host-1")
+        other = RefreshPolicy(seed="host-1")
+
+        self.assertEqual(
+            policy.get_window(duration=43200, key="key"),
+            other.get_window(duration=43200, key="key")
+        )
+
+    def test_adaptive_policy_should_stay_within_jitter(self):
+        for window in get_refresh_times(RefreshPolicy(), duration=43200):
+            self.assertGreaterEqual(window, 900)
+            self.assertLess(window, 1350)
+
+    def test_simulation_short_sessions_should_refresh_less(self):
+        fixed = count_refreshes(FixedRefreshPolicy(window=600), duration=900)
+        adaptive = count_refreshes(RefreshPolicy(), duration=900)
+
+        # A fixed window uses only about a third of a 15 minute session
+        self.assertGreater(fixed, DAY / 900 * 2.5)
+        self.assertLess(adaptive, fixed / 2)
+
+    def test_simulation_long_sessions_should_refresh_as_often(self):
+        fixed = count_refreshes(FixedRefreshPolicy(window=600), duration=43200)
+        adaptive = count_refreshes(RefreshPolicy(), duration=43200)
+
+        self.assertEqual(fixed, adaptive)
+
+    def test_simulation_long_sessions_should_spread_hosts(self):
+        fixed = {
+            FixedRefreshPolicy(window=600).get_window(duration=43200, key="key")
+            for _ in range(100)
+        }
+        adaptive = get_refresh_times(RefreshPolicy(), duration=43200)
+
+        # Every host refreshes at the same instant with a fixed window
+        self.assertEqual(1, len(fixed))
+        self.assertGreater(len(set(adaptive)), 90)
+        self.assertGreater(adaptive[-1] - adaptive[0], 300)
+
+    def test_get_refresh_policy_should_read_configuration(self):
+        policy = refresh.get_refresh_policy(
+            configuration={"AWS_OKTA_REFRESH_WINDOW": "600"}
+        )
+        self.assertIsInstance(policy, FixedRefreshPolicy)
+        self.assertEqual(600, policy.window)
+
+        policy = refresh.get_refresh_policy(configuration={
+            "AWS_OKTA_REFRESH_FRACTION": "0.2",
+            "AWS_OKTA_REFRESH_JITTER": "0"
+        })
+        self.assertIsInstance(policy, RefreshPolicy)
+        self.assertEqual(0.2, policy.fraction)
+        self.assertEqual(0, policy.jitter)
+
+        policy = refresh.get_refresh_policy(configuration={})
+        self.assertEqual(refresh.DEFAULT_REFRESH_FRACTION, policy.fraction)
+        self.assertEqual(refresh.DEFAULT_REFRESH_JITTER, policy.jitter)
@@ -0,0 +1,144 @@
+import threading
+
+from unittest import TestCase
+
+import requests
+
+from mock import MagicMock, patch
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from aws_okta_processor.core.retry import (
+    LatencyTracker,
+    RetryPolicy,
+    get_backoff,
+    is_connect_error,
+    is_idempotent,
+)
+
+APP_LINKS_URL = "https://organization.okta.com/api/v1/users/me/appLinks"
+VERIFY_URL = "https://organization.okta.com/api/v1/authn/factors/id/verify"
+SIGN_IN_URL = "https://signin.aws.amazon.com/saml"
+
+
+def get_response(status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    return response
+
+
+def get_connect_error():
+    reason = NewConnectionError(None, "Name or service not known")
+    return requests.ConnectionError(MaxRetryError(None, VERIFY_URL, reason))
+
+
+@patch('aws_okta_processor.core.retry.time.sleep')
+class TestRetryPolicy(TestCase):
+    def test_is_idempotent(self, mock_sleep):
+        self.assertTrue(is_idempotent(method="GET", url=VERIFY_URL))
+        self.assertTrue(is_idempotent(method="POST", url=SIGN_IN_URL))
+        self.assertTrue(
+            is_idempotent(
+                method="POST",
+                url="https://organization.okta.com/api/v1/sessions/me/lifecycle/refresh"
+            )
+        )
+        self.assertFalse(is_idempotent(method="POST", url=VERIFY_URL))
+
+    def test_is_connect_error(self, mock_sleep):
+        self.assertTrue(is_connect_error(error=requests.ConnectTimeout()))
+        self.assertTrue(is_connect_error(error=get_connect_error()))
+        self.assertFalse(is_connect_error(error=requests.ConnectionError("aborted")))
+        self.assertFalse(is_connect_error(error=requests.ReadTimeout()))
+
+    def test_get_backoff(self, mock_sleep):
+        for retry in range(1, 10):
+            self.assertLessEqual(get_backoff(retry=retry), min(8, 0.5 * 2 ** (retry - 1)))
+
+    def test_should_retry_idempotent_request(self, mock_sleep):
+        session = MagicMock()
+        session.post.side_effect = [
+            requests.ReadTimeout(), get_response(status_code=503), get_response()
+        ]
+
+        response = RetryPolicy().request(session, "POST", SIGN_IN_URL, data={})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session.post.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_should_return_last_transient_response(self, mock_sleep):
+        session = MagicMock()
+        session.get.return_value = get_response(status_code=502)
+
+        response = RetryPolicy(retries=1).request(session, "GET", APP_LINKS_URL)
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_should_retry_post_only_before_it_is_sent(self, mock_sleep):
+        session = MagicMock()
+        session.post.side_effect = [get_connect_error(), get_response()]
+
+        response = RetryPolicy().request(session, "POST", VERIFY_URL, json={})
+
+        self.assertEqual(response.status_code, 200)
+
+        session.post.side_effect = [requests.ReadTimeout(), get_response()]
+
+        with self.assertRaises(requests.ReadTimeout):
+            RetryPolicy().request(session, "POST", VERIFY_URL, json={})
+
+        session.post.side_effect = None
+        session.post.return_value = get_response(status_code=503)
+
+        response = RetryPolicy().request(session, "POST", VERIFY_URL, json={})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(session.post.call_count, 4)
+
+    def test_should_raise_after_retries(self, mock_sleep):
+        session = MagicMock()
+        session.get.side_effect = requests.ConnectTimeout()
+
+        with self.assertRaises(requests.ConnectTimeout):
+            RetryPolicy(retries=2).request(session, "GET", APP_LINKS_URL)
+
+        self.assertEqual(session.get.call_count, 3)
+
+    @patch('aws_okta_processor.core.retry.HEDGE_DELAY', 0.01)
+    def test_should_hedge_slow_get(self, mock_sleep):
+        stuck = threading.Event()
+        self.addCleanup(stuck.set)
+        hedge_response = get_response()
+
+        def get(url, **kwargs):
+            if session.get.call_count == 1:
+                stuck.wait(5)
+                return get_response(status_code=504)
+            return hedge_response
+
+        session = MagicMock()
+        session.get.side_effect = get
+
+        response = RetryPolicy(hedge=True).request(session, "GET", APP_LINKS_URL)
+
+        self.assertIs(response, hedge_response)
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_should_hedge_after_percentile_latency(self, mock_sleep):
+        latencies = LatencyTracker()
+        self.assertIsNone(latencies.get_percentile(url=APP_LINKS_URL))
+
+        for latency in range(100):
+            latencies.add(url=APP_LINKS_URL + "?q=1", latency=latency / 100)
+
+        self.assertEqual(latencies.get_percentile(url=APP_LINKS_URL), 0.95)
+
+        session = MagicMock()
+        session.get.return_value = get_response()
+
+        RetryPolicy(hedge=True, latencies=latencies).request(
+            session, "GET", APP_LINKS_URL
+        )
+
+        self.assertEqual(session.get.call_count, 1)
@@ -53,3 +53,42 @@ class TestSAMLUtils(TestCase):
         self.assertIn("arn:aws:iam::1:role/Role-Two", aws_roles["Account: account-one (1)"]) # noqa
         self.assertIn("Account: account-two (2)", aws_roles)
         self.assertIn("arn:aws:iam::2:role/Role-One", aws_roles["Account: account-two (2)"]) # noqa
+
+    @patch('aws_okta_processor.core.saml.requests')
+    def test_get_aws_roles_should_use_account_role_cache(self, mock_requests):
+        mock_response = MagicMock()
+        mock_response.text = SIGN_IN_RESPONSE
+        mock_requests.post.return_value = mock_response
+        account_role_cache = saml.AccountRoleCache()
+
+        saml_assertion = saml.get_saml_assertion(saml_response=SAML_RESPONSE)
+        first = saml.get_aws_roles(
+            saml_assertion=saml_assertion, account_role_cache=account_role_cache
+        )
+        second = saml.get_aws_roles(
+            saml_assertion=saml_assertion, account_role_cache=account_role_cache
+        )
+
+        mock_requests.post.assert_called_once()
+        self.assertEqual(list(first), list(second))
+        self.assertIsNot(
+            first["Account: account-one (1)"]["arn:aws:iam::1:role/Role-One"],
+            second["Account: account-one (1)"]["arn:aws:iam::1:role/Role-One"]
+        )
+        self.assertEqual(
+            "arn:aws:iam::1:saml-provider/OktaIDP",
+            second["Account: account-one (1)"]["arn:aws:iam::1:role/Role-One"].principal_arn # noqa
+        )
+
+    def test_account_role_cache_should_miss_unknown_roles(self):
+        account_role_cache = saml.AccountRoleCache(max_size=1)
+        account_role_cache.set_account_roles(account_roles=[
+            saml.AWSRole(account_name="one", role_arn="arn:one"),
+            saml.AWSRole(account_name="two", role_arn="arn:two"),
+        ])
+
+        self.assertIsNone(account_role_cache.get_account_roles(role_arns=["arn:one"]))
+        self.assertEqual(
+            "two",
+            account_role_cache.get_account_roles(role_arns=["arn:two"])[0].account_name
+        )
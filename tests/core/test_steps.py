@@ -0,0 +1,105 @@
+import threading
+import time
+
+from unittest import TestCase
+
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.steps import StepGraph
+
+
+class TestStepGraph(TestCase):
+    def test_run_should_pass_dependency_results(self):
+        graph = StepGraph()
+        graph.add("one", lambda: 1)
+        graph.add("two", lambda: 2)
+        graph.add("sum", lambda one, two: one + two, requires=("one", "two"))
+
+        graph.run()
+
+        self.assertEqual(3, graph.result("sum"))
+
+    def test_run_should_overlap_independent_steps(self):
+        barrier = threading.Barrier(2, timeout=5)
+        graph = StepGraph()
+        graph.add("one", barrier.wait)
+        graph.add("two", barrier.wait)
+
+        # Deadlocks with a broken barrier unless both steps run at once
+        graph.run()
+
+        self.assertEqual({0, 1}, {graph.result("one"), graph.result("two")})
+
+    def test_run_should_skip_steps_of_failed_steps(self):
+        calls = []
+
+        def fail():
+            raise SystemExit(1)
+
+        graph = StepGraph()
+        graph.add("fail", fail)
+        graph.add("after", lambda fail: calls.append(fail), requires=("fail",))
+        graph.add("other", lambda: "other")
+
+        graph.run()
+
+        self.assertEqual([], calls)
+        self.assertEqual("other", graph.result("other"))
+        with self.assertRaises(SystemExit):
+            graph.result("after")
+
+    def test_run_should_fail_unknown_requirements(self):
+        graph = StepGraph()
+        graph.add("step", lambda missing: missing, requires=("missing",))
+
+        graph.run()
+
+        with self.assertRaises(KeyError):
+            graph.result("step")
+
+    def test_run_should_run_interactive_steps_in_calling_thread(self):
+        barrier = threading.Barrier(2, timeout=5)
+        graph = StepGraph()
+        graph.add("worker", lambda: (barrier.wait(), threading.current_thread()))
+        graph.add(
+            "prompt",
+            lambda: (barrier.wait(), threading.current_thread()),
+            interactive=True,
+        )
+        graph.add(
+            "after",
+            lambda prompt: threading.current_thread(),
+            requires=("prompt",),
+            interactive=True,
+        )
+
+        # Deadlocks with a broken barrier unless the worker step runs meanwhile
+        graph.run()
+
+        self.assertNotEqual(threading.current_thread(), graph.result("worker")[1])
+        self.assertEqual(threading.current_thread(), graph.result("prompt")[1])
+        self.assertEqual(threading.current_thread(), graph.result("after"))
+
+    def test_run_should_apply_hooks(self):
+        graph = StepGraph()
+        graph.add("hook", lambda: hooks.get_hook("password")())
+
+        with hooks.use_hooks(password=lambda: "secret"):
+            graph.run()
+
+        self.assertEqual("secret", graph.result("hook"))
+
+    def test_get_critical_path(self):
+        graph = StepGraph()
+        graph.add("short", lambda: time.sleep(0.01))
+        graph.add("long", lambda: time.sleep(0.1))
+        graph.add("last", lambda long: None, requires=("long",))
+
+        graph.run()
+        path, duration = graph.get_critical_path()
+        report = graph.get_report()
+
+        self.assertEqual(("long", "last"), path)
+        self.assertGreaterEqual(duration, 0.1)
+        self.assertLess(duration, graph.get_duration("short") + duration)
+        self.assertEqual(4, len(report))
+        self.assertTrue(report[-1].startswith("Timing: critical path long > last: "))
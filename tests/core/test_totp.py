@@ -0,0 +1,105 @@
+import base64
+import os
+import shutil
+import sys
+import tempfile
+
+from unittest import TestCase
+
+from mock import patch
+
+from aws_okta_processor.core.totp import (
+    TOTPProvider,
+    decode_seed,
+    get_next_window,
+    get_totp,
+    get_totp_provider,
+)
+
+# The SHA-1 secret of the RFC 6238 test vectors
+RFC_SECRET = b"12345678901234567890"
+RFC_SEED = base64.b32encode(RFC_SECRET).decode()
+
+
+class TestTOTP(TestCase):
+    def test_get_totp(self):
+        # RFC 6238, appendix B
+        vectors = [
+            (59, "94287082"),
+            (1111111109, "07081804"),
+            (1111111111, "14050471"),
+            (1234567890, "89005924"),
+            (2000000000, "69279037"),
+        ]
+        for timestamp, passcode in vectors:
+            self.assertEqual(
+                get_totp(secret=RFC_SECRET, timestamp=timestamp, digits=8), passcode
+            )
+
+        self.assertEqual(get_totp(secret=RFC_SECRET, timestamp=59), "287082")
+
+    def test_get_next_window(self):
+        self.assertEqual(get_next_window(timestamp=59), 60)
+        self.assertEqual(get_next_window(timestamp=60), 90)
+
+    def test_decode_seed(self):
+        self.assertEqual(decode_seed(seed=RFC_SEED.lower() + "\n"), RFC_SECRET)
+        self.assertEqual(
+            decode_seed(seed=f"otpauth://totp/Okta:jdoe?secret={RFC_SEED}&issuer=Okta"),
+            RFC_SECRET
+        )
+        self.assertEqual(decode_seed(seed="GEZD GNBV"), b"12345")
+
+        with self.assertRaises(ValueError):
+            decode_seed(seed="not base32!")
+
+        with self.assertRaises(ValueError):
+            decode_seed(seed="")
+
+    def test_provider_should_read_seed_file_first(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        seed_file = os.path.join(directory, "seed")
+        with open(seed_file, "w") as file:
+            file.write(RFC_SEED + "\n")
+
+        provider = TOTPProvider(seed="AAAAAAAA", seed_file=seed_file)
+
+        self.assertEqual(provider.get_passcode(timestamp=59), "287082")
+
+    @patch('aws_okta_processor.core.totp.print_tty')
+    def test_provider_should_exit_on_missing_seed_file(self, mock_print_tty):
+        provider = TOTPProvider(seed_file="/nonexistent/seed")
+
+        with self.assertRaises(SystemExit):
+            provider.get_passcode()
+
+    def test_provider_should_run_seed_command_once(self):
+        provider = TOTPProvider(
+            seed_command=f"{sys.executable} -c \"print('{RFC_SEED}')\""
+        )
+
+        with patch(
+            'aws_okta_processor.core.totp.subprocess.run',
+            wraps=__import__("subprocess").run
+        ) as mock_run:
+            self.assertEqual(provider.get_passcode(timestamp=59), "287082")
+            self.assertEqual(provider.get_passcode(timestamp=1111111109), "081804")
+
+        mock_run.assert_called_once()
+
+    @patch('aws_okta_processor.core.totp.print_tty')
+    def test_provider_should_exit_on_failed_seed_command(self, mock_print_tty):
+        provider = TOTPProvider(seed_command=f"{sys.executable} -c \"exit(1)\"")
+
+        with self.assertRaises(SystemExit):
+            provider.get_passcode()
+
+        mock_print_tty.assert_called_once_with("Error: TOTP seed command failed")
+
+    def test_get_totp_provider(self):
+        self.assertIsNone(get_totp_provider(configuration={}))
+
+        provider = get_totp_provider(configuration={"AWS_OKTA_TOTP_SEED": RFC_SEED})
+
+        self.assertEqual(provider.get_passcode(timestamp=59), "287082")
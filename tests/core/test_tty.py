@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 import unittest
 
 from unittest import TestCase
@@ -9,6 +10,9 @@ from mock import MagicMock
 
 import aws_okta_processor.core.tty as tty
 
+from aws_okta_processor.core import hooks
+from aws_okta_processor.core.deadline import Deadline, DeadlineError
+
 
 class UnixTtyTests(TestCase):
     @patch('aws_okta_processor.core.tty.import_msvcrt')
@@ -195,6 +199,54 @@ class UnixTtyTests(TestCase):
 
         self.assertEqual(actual, 'return-value')
 
+    @patch('aws_okta_processor.core.tty.import_msvcrt')
+    @patch('aws_okta_processor.core.tty.os')
+    def test_unix_input_tty_cancel(
+            self,
+            mock_os,
+            mock_import_msvcrt
+    ):
+        mock_import_msvcrt.side_effect = ImportError
+        mock_os.open.side_effect = IOError
+        read_fd, write_fd = os.pipe()
+        cancel = threading.Event()
+
+        with os.fdopen(read_fd) as stdin, os.fdopen(write_fd, "w") as writer:
+            with patch('aws_okta_processor.core.tty.sys.stdin', stdin):
+                threading.Timer(0.05, cancel.set).start()
+                self.assertIsNone(tty.input_tty(cancel=cancel))
+
+                cancel.clear()
+                writer.write("123456\n")
+                writer.flush()
+                self.assertEqual("123456", tty.input_tty(cancel=cancel))
+
+    @patch('aws_okta_processor.core.deadline.print_tty')
+    @patch('aws_okta_processor.core.tty.import_msvcrt')
+    @patch('aws_okta_processor.core.tty.os')
+    def test_unix_input_tty_without_terminal(
+            self,
+            mock_os,
+            mock_import_msvcrt,
+            mock_print_tty
+    ):
+        mock_import_msvcrt.side_effect = ImportError
+        mock_os.open.side_effect = OSError
+        read_fd, write_fd = os.pipe()
+        os.close(write_fd)
+
+        with os.fdopen(read_fd) as stdin:
+            with patch('aws_okta_processor.core.tty.sys.stdin', stdin):
+                self.assertFalse(tty.has_terminal())
+
+                with hooks.use_deadline(Deadline(seconds=60)):
+                    with self.assertRaises(DeadlineError):
+                        tty.input_tty()
+
+        mock_print_tty.assert_called_once_with(
+            "Error: Input is needed, but there is no terminal to prompt on"
+        )
+
 
 class WindowsTtyTests(unittest.TestCase):
     @patch('aws_okta_processor.core.tty.import_msvcrt')
@@ -255,3 +307,15 @@ class WindowsTtyTests(unittest.TestCase):
         actual = tty.input_tty()
 
         self.assertEqual(actual, 'abc')
+
+    @patch('aws_okta_processor.core.tty.CANCEL_POLL_INTERVAL', 0)
+    @patch('aws_okta_processor.core.tty.import_msvcrt')
+    def test_win_input_tty_cancel(self, mock_import_msvcrt):
+        mock_msvcrt = MagicMock()
+        mock_import_msvcrt.return_value = mock_msvcrt
+        mock_msvcrt.kbhit.return_value = False
+        cancel = threading.Event()
+        cancel.set()
+
+        self.assertIsNone(tty.input_tty(cancel=cancel))
+        mock_msvcrt.getwch.assert_not_called()
@@ -0,0 +1,107 @@
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+import requests
+
+from aws_okta_processor.core.warmup import ConnectionWarmer, get_origin
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.send_header("Set-Cookie", "warm=1")
+        self.end_headers()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    ).start()
+    return server
+
+
+class TestConnectionWarmer(TestCase):
+    def setUp(self):
+        self.server = start_server()
+        self.unused_server = start_server()
+        self.url = "http://127.0.0.1:{}/api".format(self.server.server_address[1])
+        self.unused_url = "http://127.0.0.1:{}/".format(
+            self.unused_server.server_address[1]
+        )
+
+    def tearDown(self):
+        for server in [self.server, self.unused_server]:
+            server.shutdown()
+            server.server_close()
+
+    def test_get_origin(self):
+        self.assertEqual(
+            "https://organization.okta.com",
+            get_origin("https://organization.okta.com/api/v1/authn")
+        )
+
+    def test_warm_should_pool_connection(self):
+        session = requests.Session()
+        warmer = ConnectionWarmer(session=session)
+
+        warmer.warm(urls=[self.url, self.url, self.unused_url])
+        warmer.join(timeout=5)
+        response = session.get(self.url)
+
+        self.assertEqual("ok", response.text)
+        self.assertEqual(1, self.server.connections)
+        # Warm-up cookies stay out of the session
+        self.assertEqual({}, session.cookies.get_dict())
+
+        report = warmer.get_report()
+        self.assertEqual(2, len(report))
+        used = [line for line in report if line.endswith(", used")]
+        unused = [line for line in report if line.endswith(", unused")]
+        self.assertEqual(1, len(used))
+        self.assertTrue(used[0].startswith(f"Timing: warm-up {get_origin(self.url)}: "))
+        self.assertEqual(1, len(unused))
+
+    def test_warm_should_report_failures(self):
+        session = requests.Session()
+        warmer = ConnectionWarmer(session=session)
+        self.unused_server.shutdown()
+        self.unused_server.server_close()
+
+        warmer.warm(urls=[self.unused_url])
+        warmer.join(timeout=5)
+
+        self.assertEqual(
+            [f"Timing: warm-up {get_origin(self.unused_url)}: not connected"],
+            warmer.get_report()
+        )
+
+    def test_close_should_stop_recording(self):
+        session = requests.Session()
+        warmer = ConnectionWarmer(session=session)
+
+        warmer.close()
+        session.get(self.url)
+
+        self.assertEqual([], session.hooks["response"])
+        self.assertEqual(set(), warmer.used)
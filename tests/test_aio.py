@@ -0,0 +1,271 @@
+import asyncio
+import time
+
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase, skipUnless
+from unittest.mock import patch
+
+from tests.test_base import (
+    APPLICATIONS_RESPONSE,
+    AUTH_MFA_PUSH_RESPONSE,
+    AUTH_TOKEN_RESPONSE,
+    MFA_WAITING_RESPONSE,
+    SAML_RESPONSE,
+    SESSION_RESPONSE,
+    SIGN_IN_RESPONSE,
+)
+
+from aws_okta_processor import api
+
+try:
+    from aws_okta_processor import aio
+except ImportError:
+    aio = None
+
+APPLICATION_URL = "https://organization.okta.com/home/amazon_aws/0oa3omz2i9XRNSRIHBZO/272"  # noqa: E501
+
+STS_RESPONSE = """<AssumeRoleWithSAMLResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+  <AssumeRoleWithSAMLResult>
+    <Credentials>
+      <AccessKeyId>{role_arn}</AccessKeyId>
+      <SecretAccessKey>secret_access_key</SecretAccessKey>
+      <SessionToken>session_token</SessionToken>
+      <Expiration>2030-01-01T00:00:00Z</Expiration>
+    </Credentials>
+  </AssumeRoleWithSAMLResult>
+</AssumeRoleWithSAMLResponse>"""
+
+STS_ERROR_RESPONSE = """<ErrorResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+  <Error>
+    <Type>Sender</Type>
+    <Code>ValidationError</Code>
+    <Message>Invalid duration</Message>
+  </Error>
+</ErrorResponse>"""
+
+
+class FakeResponse:
+    def __init__(self, status, text):
+        self.status = status
+        self._text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def text(self):
+        return self._text
+
+
+class FakeSession:
+    """Answers the Okta, sign-in and STS requests of the fixtures."""
+
+    def __init__(self, push=False, pending=False, sts_delay=0, sts_status=200):
+        self.calls = Counter()
+        self.push = push
+        self.pending = pending
+        self.sts_delay = sts_delay
+        self.sts_status = sts_status
+
+    def request(self, method, url, **kwargs):
+        return FakeRequest(self, method, url, kwargs)
+
+    async def respond(self, method, url, kwargs):
+        await asyncio.sleep(0)
+
+        if url.endswith("/api/v1/authn"):
+            self.calls["authn"] += 1
+            return 200, AUTH_MFA_PUSH_RESPONSE if self.push else AUTH_TOKEN_RESPONSE
+        if url.endswith("/factors/id/verify"):
+            self.calls["verify"] += 1
+            return 200, MFA_WAITING_RESPONSE
+        if url.endswith("/lifecycle/activate/poll"):
+            self.calls["poll"] += 1
+            return 200, MFA_WAITING_RESPONSE if self.pending else AUTH_TOKEN_RESPONSE
+        if url.endswith("/api/v1/sessions"):
+            self.calls["sessions"] += 1
+            return 200, SESSION_RESPONSE
+        if url.endswith("/api/v1/users/me/appLinks"):
+            self.calls["appLinks"] += 1
+            return 200, APPLICATIONS_RESPONSE
+        if "/home/amazon_aws/" in url:
+            self.calls["saml"] += 1
+            assert kwargs["headers"]["Cookie"] == "sid=session_token"
+            return 200, SAML_RESPONSE
+        if url == "https://signin.aws.amazon.com/saml":
+            self.calls["signin"] += 1
+            return 200, SIGN_IN_RESPONSE
+        if "sts" in url:
+            self.calls["sts"] += 1
+            await asyncio.sleep(self.sts_delay)
+            if self.sts_status != 200:
+                return self.sts_status, STS_ERROR_RESPONSE
+            return 200, STS_RESPONSE.format(role_arn=kwargs["data"]["RoleArn"])
+
+        raise AssertionError(f"Unexpected request {method} {url}")
+
+
+class FakeRequest:
+    def __init__(self, session, method, url, kwargs):
+        self.session = session
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+
+    async def __aenter__(self):
+        status, text = await self.session.respond(self.method, self.url, self.kwargs)
+        return FakeResponse(status, text)
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def get_config(**kwargs):
+    return api.Config(**dict({
+        "organization": "organization.okta.com",
+        "user": "user_name",
+        "password": "user_pass",
+        "application": APPLICATION_URL,
+        "role": "arn:aws:iam::1:role/Role-One",
+    }, **kwargs))
+
+
+@skipUnless(aio is not None, "requires aiohttp")
+class TestAsyncClient(IsolatedAsyncioTestCase):
+    async def test_get_credentials(self):
+        session = FakeSession()
+        client = aio.AsyncClient(session=session)
+
+        credentials = await client.get_credentials(get_config())
+
+        self.assertEqual(
+            api.Credentials(
+                access_key_id="arn:aws:iam::1:role/Role-One",
+                secret_access_key="secret_access_key",
+                session_token="session_token",
+                expiration="2030-01-01T00:00:00Z",
+            ),
+            credentials
+        )
+
+    async def test_gather_should_share_login_and_assertion(self):
+        session = FakeSession(sts_delay=0.05)
+        client = aio.AsyncClient(session=session)
+        roles = [
+            "arn:aws:iam::1:role/Role-One",
+            "arn:aws:iam::1:role/Role-Two",
+            "arn:aws:iam::2:role/Role-One",
+        ] * 34
+
+        started = time.monotonic()
+        results = await asyncio.gather(*[
+            client.get_credentials(get_config(role=role)) for role in roles
+        ])
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(roles, [result.access_key_id for result in results])
+        self.assertEqual(1, session.calls["authn"])
+        self.assertEqual(1, session.calls["sessions"])
+        self.assertEqual(1, session.calls["saml"])
+        self.assertEqual(1, session.calls["signin"])
+        self.assertEqual(102, session.calls["sts"])
+        # Sequential calls would take over five seconds
+        self.assertLess(elapsed, 1)
+
+    async def test_get_credentials_should_poll_push(self):
+        session = FakeSession(push=True)
+        client = aio.AsyncClient(session=session)
+
+        with patch("aws_okta_processor.aio.FACTOR_POLL_INTERVAL", 0):
+            await client.get_credentials(get_config())
+
+        self.assertEqual(1, session.calls["verify"])
+        self.assertEqual(1, session.calls["poll"])
+
+    async def test_get_credentials_should_stop_polling_push_after_timeout(self):
+        session = FakeSession(push=True, pending=True)
+        client = aio.AsyncClient(session=session)
+
+        with patch("aws_okta_processor.aio.FACTOR_POLL_INTERVAL", 0.01):
+            with self.assertRaises(api.AuthenticationError) as context:
+                await client.get_credentials(get_config(factor_timeout=0.05))
+
+        self.assertEqual(
+            "Error: MFA was not verified within 0.05 seconds",
+            context.exception.message
+        )
+        self.assertEqual(0, session.calls["sts"])
+
+    async def test_get_credentials_should_stop_at_deadline(self):
+        session = FakeSession(push=True, pending=True)
+        client = aio.AsyncClient(session=session)
+
+        with patch("aws_okta_processor.aio.FACTOR_POLL_INTERVAL", 0.01):
+            with self.assertRaises(api.Error) as context:
+                await client.get_credentials(get_config(deadline=0.05))
+
+        self.assertIn("0.05", context.exception.message)
+        self.assertEqual(0, session.calls["sts"])
+
+    async def test_get_credentials_should_reject_secondary_role(self):
+        session = FakeSession()
+        client = aio.AsyncClient(session=session)
+
+        with self.assertRaises(api.Error):
+            await client.get_credentials(
+                get_config(secondary_role="arn:aws:iam::1:role/Secondary")
+            )
+
+        self.assertEqual(0, sum(session.calls.values()))
+
+    async def test_get_credentials_should_select_with_callback(self):
+        session = FakeSession()
+        labels = []
+
+        async def select(label, keys):
+            labels.append(label)
+            return keys[-1]
+
+        client = aio.AsyncClient(session=session, select=select)
+
+        credentials = await client.get_credentials(
+            get_config(application=None, role=None)
+        )
+
+        self.assertEqual(["AWS application", "AWS Role"], labels)
+        self.assertEqual("arn:aws:iam::2:role/Role-One", credentials.access_key_id)
+
+    async def test_get_credentials_should_require_password_callback(self):
+        client = aio.AsyncClient(session=FakeSession())
+
+        with self.assertRaises(api.PromptError):
+            await client.get_credentials(get_config(password=None))
+
+    async def test_get_credentials_should_raise_sts_errors(self):
+        client = aio.AsyncClient(session=FakeSession(sts_status=400))
+
+        with self.assertRaises(api.AuthenticationError) as context:
+            await client.get_credentials(get_config())
+
+        self.assertEqual(400, context.exception.status_code)
+        self.assertEqual("ValidationError", context.exception.error_code)
+
+    async def test_get_credentials_should_raise_missing_role(self):
+        client = aio.AsyncClient(session=FakeSession())
+
+        with self.assertRaises(api.Error) as context:
+            await client.get_credentials(get_config(role="arn:aws:iam::3:role/None"))
+
+        self.assertEqual(
+            "ERROR: AWS Role arn:aws:iam::3:role/None not found!",
+            context.exception.message
+        )
+
+    async def test_client_should_own_session(self):
+        async with aio.AsyncClient() as client:
+            session = client._session
+            self.assertFalse(session.closed)
+
+        self.assertTrue(session.closed)
@@ -0,0 +1,158 @@
+import sys
+import threading
+
+from collections import OrderedDict
+from unittest import TestCase
+from unittest.mock import patch
+
+from aws_okta_processor import api
+from aws_okta_processor.commands.authenticate import CONFIG_MAP
+from aws_okta_processor.core import hooks, okta, prompt
+from aws_okta_processor.core.okta import OktaError
+from aws_okta_processor.core.tty import print_tty
+
+CONFIG = api.Config(
+    organization="org.okta.com",
+    user="jdoe",
+    password="secret",
+    role="arn:aws:iam::1:role/Role-One",
+)
+
+CREDENTIALS = {
+    "AccessKeyId": "access_key_id",
+    "SecretAccessKey": "secret_access_key",
+    "SessionToken": "session_token",
+    "Expiration": "2030-01-01T00:00:00Z",
+}
+
+ROLES = OrderedDict([
+    ("Account: one (1)", OrderedDict([
+        ("arn:aws:iam::1:role/Role-One", "role-one"),
+        ("arn:aws:iam::1:role/Role-Two", "role-two"),
+    ])),
+])
+
+
+class TestApi(TestCase):
+    def test_config_should_cover_authenticate_options(self):
+        configuration = CONFIG.get_configuration()
+
+        self.assertEqual(sorted(CONFIG_MAP.values()), sorted(configuration))
+        self.assertEqual("jdoe", configuration["AWS_OKTA_USER"])
+        self.assertEqual("3600", configuration["AWS_OKTA_DURATION"])
+        self.assertTrue(configuration["AWS_OKTA_SILENT"])
+
+    def test_config_command_should_not_share_configuration(self):
+        command = api.ConfigCommand(CONFIG)
+        command.configuration["AWS_OKTA_PASS"] = ""
+
+        self.assertIsNone(command.get_pass())
+        self.assertEqual("secret", api.ConfigCommand(CONFIG).get_pass())
+        self.assertEqual(
+            {"Organization": "org.okta.com", "User": "jdoe", "Key": None},
+            command.get_key_dict()
+        )
+
+    @patch("aws_okta_processor.api.CredentialPool.fetch_credentials")
+    def test_get_credentials(self, mock_fetch_credentials):
+        mock_fetch_credentials.return_value = dict(CREDENTIALS)
+
+        credentials = api.Client().get_credentials(CONFIG)
+
+        self.assertEqual(
+            api.Credentials(
+                access_key_id="access_key_id",
+                secret_access_key="secret_access_key",
+                session_token="session_token",
+                expiration="2030-01-01T00:00:00Z",
+            ),
+            credentials
+        )
+
+    @patch("aws_okta_processor.api.CredentialPool.fetch_credentials")
+    def test_get_credentials_should_raise_authentication_error(
+        self, mock_fetch_credentials
+    ):
+        mock_fetch_credentials.side_effect = OktaError(
+            message="Error: Status Code: 401", status_code=401, error_code="E0000004"
+        )
+
+        with self.assertRaises(api.AuthenticationError) as context:
+            api.Client().get_credentials(CONFIG)
+
+        self.assertEqual(401, context.exception.status_code)
+        self.assertEqual("E0000004", context.exception.error_code)
+        self.assertEqual("Error: Status Code: 401", context.exception.message)
+
+    @patch("aws_okta_processor.api.CredentialPool.fetch_credentials")
+    def test_get_credentials_should_raise_printed_errors(
+        self, mock_fetch_credentials
+    ):
+        def fetch_credentials(authenticate=None):
+            print_tty("Info: Calling https://org.okta.com/api/v1/authn")
+            print_tty("ERROR: AWS Role arn:aws:iam::1:role/Role-One not found!")
+            sys.exit(1)
+
+        mock_fetch_credentials.side_effect = fetch_credentials
+
+        with patch("aws_okta_processor.core.tty.unix_print_tty") as mock_print:
+            with self.assertRaises(api.Error) as context:
+                api.Client().get_credentials(CONFIG)
+
+        mock_print.assert_not_called()
+        self.assertEqual(
+            "ERROR: AWS Role arn:aws:iam::1:role/Role-One not found!",
+            context.exception.message
+        )
+
+    @patch("aws_okta_processor.api.CredentialPool.fetch_credentials")
+    def test_get_credentials_should_use_callbacks(self, mock_fetch_credentials):
+        selections = []
+
+        def fetch_credentials(authenticate=None):
+            selections.append(prompt.get_item(items=ROLES, label="AWS Role"))
+            selections.append(okta.get_password())
+            selections.append(okta.get_passcode(factor=okta.FactorType.TOTP))
+            return dict(CREDENTIALS)
+
+        mock_fetch_credentials.side_effect = fetch_credentials
+        client = api.Client(
+            select=lambda label, keys: keys[-1],
+            password=lambda: "password",
+            passcode=lambda factor: f"{factor.value}:123456",
+        )
+
+        client.get_credentials(CONFIG)
+
+        self.assertEqual(
+            ["role-two", "password", "token:software:totp:123456"], selections
+        )
+
+    @patch("aws_okta_processor.api.CredentialPool.fetch_credentials")
+    def test_get_credentials_should_require_callbacks(self, mock_fetch_credentials):
+        mock_fetch_credentials.side_effect = lambda authenticate=None: prompt.get_item(
+            items=ROLES, label="AWS Role"
+        )
+
+        with self.assertRaises(api.PromptError):
+            api.Client().get_credentials(CONFIG)
+
+    def test_hooks_should_be_per_thread(self):
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def run(name):
+            with hooks.use_hooks(select=lambda label, keys: name):
+                barrier.wait()
+                results[name] = hooks.get_hook("select")(None, None)
+
+        threads = [
+            threading.Thread(target=run, args=(name,)) for name in ["one", "two"]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual({"one": "one", "two": "two"}, results)
+        self.assertIsNone(hooks.get_hook("select"))
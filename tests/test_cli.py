@@ -22,3 +22,21 @@ class TestCli(TestCase):
     def test_main_should_raise_exception_on_missing_command(self):
         sys.argv = ["aws-okta-processor", "not-found"]
         self.assertRaises(SystemExit, cli.main)
+
+    def test_main_should_run_warm(self):
+        sys.argv = ["aws-okta-processor", "warm"]
+        with patch("aws_okta_processor.commands.warm.Warm.run") as mock_run:
+            cli.main()
+        mock_run.assert_called_once()
+
+    def test_main_should_run_agent(self):
+        sys.argv = ["aws-okta-processor", "agent"]
+        with patch("aws_okta_processor.commands.agent.Agent.run") as mock_run:
+            cli.main()
+        mock_run.assert_called_once()
+
+    def test_main_should_run_serve(self):
+        sys.argv = ["aws-okta-processor", "serve"]
+        with patch("aws_okta_processor.commands.serve.Serve.run") as mock_run:
+            cli.main()
+        mock_run.assert_called_once()
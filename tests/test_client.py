@@ -0,0 +1,105 @@
+import os
+import socket
+import sys
+import tempfile
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from aws_okta_processor import client
+
+
+class TestClient(TestCase):
+    def test_get_socket_path_should_read_environment(self):
+        self.assertEqual(
+            "/run/agent.sock",
+            client.get_socket_path(environ={"AWS_OKTA_AGENT_SOCKET": "/run/agent.sock"})
+        )
+        self.assertEqual(
+            os.path.expanduser(client.DEFAULT_SOCKET_PATH),
+            client.get_socket_path(environ={})
+        )
+
+    @patch("aws_okta_processor.client.os.path.exists")
+    def test_get_socket_path_should_fall_back_to_broker(self, mock_exists):
+        mock_exists.side_effect = lambda path: path == client.DEFAULT_BROKER_SOCKET_PATH
+
+        self.assertEqual(
+            client.DEFAULT_BROKER_SOCKET_PATH, client.get_socket_path(environ={})
+        )
+
+    def test_send_request_should_return_none_without_agent(self):
+        socket_path = os.path.join(tempfile.mkdtemp(), "missing.sock")
+
+        self.assertIsNone(
+            client.send_request(argv=["authenticate"], socket_path=socket_path)
+        )
+
+    def test_send_request_should_return_none_on_timeout(self):
+        socket_path = os.path.join(tempfile.mkdtemp(), "agent.sock")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(socket_path)
+        server.listen(1)
+
+        try:
+            # The agent accepts the request but never replies
+            self.assertIsNone(client.send_request(
+                argv=["authenticate"], socket_path=socket_path, timeout=0.1
+            ))
+        finally:
+            server.close()
+
+    def test_get_timeout_should_read_environment(self):
+        self.assertEqual(
+            30, client.get_timeout(environ={"AWS_OKTA_AGENT_TIMEOUT": "30"})
+        )
+        self.assertEqual(client.DEFAULT_TIMEOUT, client.get_timeout(environ={}))
+
+    @patch("aws_okta_processor.client.send_request")
+    @patch("aws_okta_processor.client.sys.stdout.write")
+    def test_main_should_print_agent_reply(self, mock_write, mock_send_request):
+        sys.argv = ["aws-okta-processor-client", "authenticate"]
+        mock_send_request.return_value = {"status": 0, "stdout": "{}\n"}
+
+        with self.assertRaises(SystemExit) as context:
+            client.main()
+
+        self.assertEqual(0, context.exception.code)
+        mock_write.assert_called_once_with("{}\n")
+
+    @patch("aws_okta_processor.client.send_request", return_value=None)
+    def test_main_should_fall_back_without_agent(self, mock_send_request):
+        sys.argv = ["aws-okta-processor-client", "authenticate"]
+
+        with patch("aws_okta_processor.commands.authenticate.Authenticate.run") as mock_run:
+            client.main()
+
+        mock_run.assert_called_once()
+
+    @patch("aws_okta_processor.client.send_request")
+    def test_main_should_fall_back_when_login_is_needed(self, mock_send_request):
+        sys.argv = ["aws-okta-processor-client", "authenticate"]
+        mock_send_request.return_value = {"status": 1, "stdout": "", "login": True}
+
+        with patch("aws_okta_processor.commands.authenticate.Authenticate.run") as mock_run:
+            client.main()
+
+        mock_run.assert_called_once()
+
+    @patch("aws_okta_processor.client.send_request")
+    def test_main_should_run_other_commands_in_process(self, mock_send_request):
+        sys.argv = ["aws-okta-processor-client", "get-roles"]
+
+        with patch("aws_okta_processor.commands.getroles.GetRoles.run") as mock_run:
+            client.main()
+
+        mock_run.assert_called_once()
+        mock_send_request.assert_not_called()
+
+    def test_is_batch(self):
+        self.assertTrue(client.is_batch(argv=["authenticate", "--batch", "-"], environ={}))
+        self.assertTrue(client.is_batch(argv=["authenticate", "--batch=jobs"], environ={}))
+        self.assertTrue(
+            client.is_batch(argv=["authenticate"], environ={"AWS_OKTA_BATCH": "jobs"})
+        )
+        self.assertFalse(client.is_batch(argv=["authenticate", "-k", "x"], environ={}))
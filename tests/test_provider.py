@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from botocore.credentials import RefreshableCredentials
+from botocore.exceptions import CredentialRetrievalError
+
+from aws_okta_processor import provider
+from aws_okta_processor.core.okta import OktaError
+
+AWS_CONFIG = """
+[profile okta]
+credential_process=aws-okta-processor authenticate -o org.okta.com -u jdoe -r arn:aws:iam::1:role/Role-One
+
+[profile other]
+credential_process=other-tool authenticate
+"""  # noqa: E501
+
+CREDENTIALS = {
+    "AccessKeyId": "access_key_id",
+    "SecretAccessKey": "secret_access_key",
+    "SessionToken": "session_token",
+    "Expiration": "2030-01-01T00:00:00Z",
+}
+
+
+class TestProvider(TestCase):
+    def setUp(self):
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".ini", delete=False)
+        config_file.write(AWS_CONFIG)
+        config_file.close()
+        self.config_file = config_file.name
+
+    def tearDown(self):
+        os.remove(self.config_file)
+
+    def test_get_argv_should_read_credential_process(self):
+        okta_provider = provider.OktaProvider(
+            load_config=lambda: {
+                "credential_process": "aws-okta-processor authenticate -u jdoe"
+            },
+            cache={},
+        )
+
+        self.assertEqual(["-u", "jdoe"], okta_provider.get_argv())
+
+    def test_load_should_skip_other_profiles(self):
+        okta_provider = provider.OktaProvider(
+            load_config=lambda: {"credential_process": "other-tool authenticate"},
+            cache={},
+        )
+
+        self.assertIsNone(okta_provider.load())
+
+    @patch("aws_okta_processor.provider.CredentialPool.fetch_credentials")
+    def test_load_should_return_refreshable_credentials(self, mock_fetch_credentials):
+        mock_fetch_credentials.return_value = dict(CREDENTIALS)
+        okta_provider = provider.OktaProvider(argv=["-u", "jdoe"], cache={})
+
+        credentials = okta_provider.load()
+
+        self.assertIsInstance(credentials, RefreshableCredentials)
+        self.assertEqual("aws-okta-processor", credentials.method)
+        frozen = credentials.get_frozen_credentials()
+        self.assertEqual("access_key_id", frozen.access_key)
+        self.assertEqual("session_token", frozen.token)
+        self.assertEqual(
+            provider.ADVISORY_REFRESH_WINDOW,
+            mock_fetch_credentials.call_args.kwargs["refresh_within"]
+        )
+        authenticate = mock_fetch_credentials.call_args.kwargs["authenticate"]
+        self.assertEqual("jdoe", authenticate.configuration["AWS_OKTA_USER"])
+
+    @patch("aws_okta_processor.provider.CredentialPool.fetch_credentials")
+    def test_load_should_raise_retrieval_error(self, mock_fetch_credentials):
+        mock_fetch_credentials.side_effect = OktaError(
+            message="Authentication failed", status_code=401
+        )
+        okta_provider = provider.OktaProvider(argv=["-u", "jdoe"], cache={})
+
+        with self.assertRaises(CredentialRetrievalError) as context:
+            okta_provider.load()
+
+        self.assertIn("Authentication failed", str(context.exception))
+
+    def test_load_should_reject_invalid_options(self):
+        okta_provider = provider.OktaProvider(argv=["--unknown"], cache={})
+
+        with self.assertRaises(CredentialRetrievalError):
+            okta_provider.load()
+
+    @patch("aws_okta_processor.provider.CredentialPool.fetch_credentials")
+    def test_get_session_should_replace_credential_process(self, mock_fetch_credentials):
+        mock_fetch_credentials.return_value = dict(CREDENTIALS)
+
+        with patch.dict(os.environ, {"AWS_CONFIG_FILE": self.config_file}):
+            botocore_session = provider.get_session(profile_name="okta", cache={})
+            credentials = botocore_session.get_credentials()
+
+        self.assertEqual("aws-okta-processor", credentials.method)
+        self.assertEqual("access_key_id", credentials.access_key)
+
+        resolver = botocore_session.get_component("credential_provider")
+        methods = [item.METHOD for item in resolver.providers]
+        self.assertEqual(
+            methods.index(provider.PROCESS_PROVIDER) - 1,
+            methods.index("aws-okta-processor")
+        )
+
+    def test_get_session_with_argv_should_come_first(self):
+        botocore_session = provider.get_session(argv=["-u", "jdoe"], cache={})
+
+        resolver = botocore_session.get_component("credential_provider")
+        self.assertEqual("aws-okta-processor", resolver.providers[0].METHOD)